@@ -0,0 +1 @@
+# HTTP API helpers (kept free of Flask so they can be tested without starting a node)
@@ -0,0 +1,89 @@
+from backend.config import API_BULK_MAX_ITEMS
+
+
+class BulkQueryError(Exception):
+    pass
+
+
+def parse_items(body, field: str, max_items: int = API_BULK_MAX_ITEMS) -> list:
+    """
+    The list of strings under `field` in a request body, or BulkQueryError.
+    """
+    items = body.get(field) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+        raise BulkQueryError(f"{field} must be a list of strings")
+    if len(items) > max_items:
+        raise BulkQueryError(f"at most {max_items} {field} per request")
+    return items
+
+
+def chain_view(blockchain):
+    """
+    A chain list and the snapshot at its tip, read as one consistent pair: the chain list is
+    only ever appended to or replaced whole, so a snapshot whose tip sits on it stays valid.
+    """
+    while True:
+        chain = blockchain.chain
+        snapshot = blockchain.snapshot()
+        if snapshot.height < len(chain) and chain[snapshot.height].hash == snapshot.tip_hash:
+            return chain, snapshot
+
+
+class NodeView:
+    """
+    What one API request reads, taken once when it starts: a chain list fixed at the snapshot
+    height and a mempool copy. Only chain[:snapshot.height + 1] belongs to the view; the list
+    may grow past it while the request runs.
+    """
+    def __init__(self, chain, snapshot, mempool):
+        self.chain = chain
+        self.snapshot = snapshot
+        self.mempool = mempool
+
+    @property
+    def height(self) -> int:
+        return self.snapshot.height
+
+    @property
+    def tip(self):
+        return self.chain[self.snapshot.height]
+
+
+def node_view(blockchain, transaction_pool) -> NodeView:
+    chain, snapshot = chain_view(blockchain)
+    return NodeView(chain, snapshot, transaction_pool.snapshot())
+
+
+def bulk_balances(snapshot, addresses) -> dict:
+    return {
+        "height": snapshot.height,
+        "tip": snapshot.tip_hash,
+        "balances": {address: snapshot.balance_of(address) for address in addresses},
+    }
+
+
+def transaction_status(chain, snapshot, mempool, txid) -> dict:
+    """
+    Status of one transaction against a chain view: confirmed (with its block and the number
+    of blocks on top of it, as /transactions/<txid> counts them), mempool, or unknown.
+    """
+    height = snapshot.transactions.get(txid)
+    if height is not None and height <= snapshot.height:
+        return {
+            "id": txid,
+            "status": "confirmed",
+            "height": height,
+            "block_hash": chain[height].hash,
+            "confirmations": snapshot.height - height,
+        }
+    if txid in mempool:
+        return {"id": txid, "status": "mempool", "height": None, "block_hash": None, "confirmations": 0}
+    return {"id": txid, "status": "unknown", "height": None, "block_hash": None, "confirmations": 0}
+
+
+def bulk_transaction_statuses(chain, snapshot, mempool, txids) -> dict:
+    return {
+        "height": snapshot.height,
+        "tip": snapshot.tip_hash,
+        "transactions": [transaction_status(chain, snapshot, mempool, txid) for txid in txids],
+    }
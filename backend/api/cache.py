@@ -0,0 +1,84 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from backend.config import (
+    API_CACHE_MAX_ENTRIES,
+    API_CACHE_MAX_BYTES,
+    API_COMPRESSION_MIN_BYTES,
+    API_COMPRESSION_LEVEL,
+)
+
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/javascript", "text/")
+
+
+class CachedResponse:
+    """
+    A response body encoded once, its gzip variant when worth it, and a strong ETag per variant.
+    """
+    def __init__(self, body: bytes, mimetype: str, min_compress: int = API_COMPRESSION_MIN_BYTES,
+                 level: int = API_COMPRESSION_LEVEL):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.gzip_body = None
+        if len(body) >= min_compress and mimetype.startswith(COMPRESSIBLE_MIMETYPES):
+            compressed = gzip.compress(body, compresslevel=level, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+
+    @property
+    def gzip_etag(self) -> str:
+        # A strong ETag names one exact byte sequence, so the compressed variant gets its own.
+        return f"{self.etag}-gz"
+
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+
+class ResponseCache:
+    """
+    LRU of CachedResponse keyed by the request and the state it was built from (tip hash,
+    mempool version, ...), so unchanged data is never re-encoded or re-compressed and a state
+    change simply stops matching old keys. Bounded in entries and bytes.
+    """
+    def __init__(self, max_entries: int = API_CACHE_MAX_ENTRIES, max_bytes: int = API_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build, mimetype: str = "application/json") -> CachedResponse:
+        """
+        Cached response for `key`, or one built from `build()` (bytes or str) and stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        body = build()
+        entry = CachedResponse(body.encode() if isinstance(body, str) else body, mimetype)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size()
+            self._entries[key] = entry
+            self._bytes += entry.size()
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size()
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_json(self):
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,267 @@
+import json
+import queue
+import threading
+
+from backend.config import (
+    EVENTS_POLL_SECONDS,
+    EVENTS_SUBSCRIBER_QUEUE,
+    EVENTS_MAX_SUBSCRIBERS,
+)
+
+
+KEEPALIVE = ": keepalive\n\n"
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def transaction_addresses(tx_json: dict) -> set:
+    """
+    Lower-cased sender and recipient addresses of a transaction.
+    """
+    addresses = {address.lower() for address in (tx_json.get("output") or {}) if isinstance(address, str)}
+    sender = (tx_json.get("input") or {}).get("address")
+    if isinstance(sender, str):
+        addresses.add(sender.lower())
+    return addresses
+
+
+def transaction_summary(tx_json: dict) -> dict:
+    tx_input = tx_json.get("input") or {}
+    return {
+        "id": tx_json.get("id"),
+        "from": tx_input.get("address"),
+        "output": tx_json.get("output"),
+        "fee": tx_input.get("fee", 0),
+    }
+
+
+class Subscription:
+    """
+    One event-stream client: an optional address filter and a bounded queue of encoded events.
+    """
+    def __init__(self, addresses=None, depth: int = EVENTS_SUBSCRIBER_QUEUE):
+        addresses = frozenset(address.strip().lower() for address in (addresses or ()) if address.strip())
+        self.addresses = addresses or None
+        self.queue = queue.Queue(depth)
+        self.closed = False
+        # called after every push and on close, e.g. to wake an asyncio reader
+        self.wake = None
+
+    def push(self, chunk: str) -> bool:
+        """
+        Queue an encoded event. A subscriber whose queue is full is closed instead.
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(chunk)
+        except queue.Full:
+            self.close()
+            return False
+        if self.wake:
+            self.wake()
+        return True
+
+    def next(self, timeout: float):
+        """
+        Next encoded event, a keepalive comment after `timeout` idle seconds, or None once closed.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None if self.closed else KEEPALIVE
+
+    def next_nowait(self):
+        """
+        Next encoded event without blocking (None once closed); raises queue.Empty.
+        """
+        return self.queue.get_nowait()
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                self.queue.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+        if self.wake:
+            self.wake()
+
+
+class EventHub:
+    """
+    Fans tip, mempool and sync changes out to event-stream subscribers.
+
+    While anyone is subscribed, one watcher thread compares the tip and the mempool with the
+    previous round every `poll_seconds` (or as soon as `notify` is called). Each event is
+    encoded once per distinct address filter and the same text is queued for every matching
+    subscriber, so idle subscribers cost a blocked thread and nothing else.
+    """
+    def __init__(self, blockchain, transaction_pool, poll_seconds: float = EVENTS_POLL_SECONDS,
+                 max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.blockchain = blockchain
+        self.transaction_pool = transaction_pool
+        self.poll_seconds = poll_seconds
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="api-events", daemon=True)
+        self._recent_hashes = []
+        self._mempool = {}
+        self._mempool_version = None
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def start(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+
+    def subscribe(self, addresses=None):
+        """
+        New subscription, or None when the subscriber limit is reached.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if not self._subscribers:
+                self._reset()
+            subscription = Subscription(addresses)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self):
+        """
+        Collect changes now instead of at the next poll, e.g. right after a local block or tx.
+        """
+        self._wake.set()
+
+    def publish_sync(self, synced: bool):
+        self._fan_out("sync", lambda addresses: {"synced": synced})
+
+    def _reset(self):
+        chain = self.blockchain.chain
+        self._recent_hashes = [block.hash for block in chain[-100:]]
+        self._mempool = self.transaction_pool.transaction_map.copy()
+        self._mempool_version = self.transaction_pool.version
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._subscribers:
+                self.poll()
+
+    def poll(self):
+        """
+        Publish what changed since the previous round.
+        """
+        self._poll_tip()
+        self._poll_mempool()
+
+    def _poll_tip(self):
+        chain = self.blockchain.chain
+        tip = chain[-1]
+        if self._recent_hashes and self._recent_hashes[-1] == tip.hash:
+            return
+        fork_height = None
+        for block_hash in reversed(self._recent_hashes):
+            height = self.blockchain.height_of(block_hash)
+            if height is not None:
+                fork_height = height
+                break
+        if fork_height is None:
+            fork_height = max(-1, len(chain) - 1 - len(self._recent_hashes))
+        # The previous tip left the chain: blocks above fork_height were replaced.
+        reorg = bool(self._recent_hashes) and self.blockchain.height_of(self._recent_hashes[-1]) is None
+        connected = chain[fork_height + 1:]
+        self._recent_hashes = [block.hash for block in chain[-100:]]
+
+        self._fan_out("tip", lambda addresses: {
+            "height": len(chain) - 1,
+            "hash": tip.hash,
+            "work": self.blockchain.total_work(),
+            "reorg": reorg,
+            "fork_height": fork_height if reorg else None,
+        })
+        confirmed = [
+            (fork_height + 1 + offset, block.hash, tx_json)
+            for offset, block in enumerate(connected)
+            for tx_json in block.data
+            if isinstance(tx_json, dict)
+        ]
+        if confirmed:
+            self._fan_out("confirmed", lambda addresses: None if addresses is None else self._confirmed_for(confirmed, addresses))
+
+    @staticmethod
+    def _confirmed_for(confirmed, addresses):
+        """
+        Confirmed transactions touching a filter; unfiltered subscribers follow `tip` instead.
+        """
+        transactions = [
+            {**transaction_summary(tx_json), "height": height, "block_hash": block_hash}
+            for height, block_hash, tx_json in confirmed
+            if transaction_addresses(tx_json) & addresses
+        ]
+        return {"transactions": transactions} if transactions else None
+
+    def _poll_mempool(self):
+        if self.transaction_pool.version == self._mempool_version:
+            return
+        self._mempool_version = self.transaction_pool.version
+        current = self.transaction_pool.transaction_map.copy()
+        previous = self._mempool
+        self._mempool = current
+        added = [current[txid].to_json() for txid in current.keys() - previous.keys()]
+        removed = [previous[txid].to_json() for txid in previous.keys() - current.keys()]
+        if not added and not removed:
+            return
+
+        def build(addresses):
+            picked_added = [tx for tx in added if addresses is None or transaction_addresses(tx) & addresses]
+            picked_removed = [tx for tx in removed if addresses is None or transaction_addresses(tx) & addresses]
+            if not picked_added and not picked_removed:
+                return None
+            return {
+                "added": [transaction_summary(tx) for tx in picked_added],
+                "removed": [tx.get("id") for tx in picked_removed],
+                "size": len(current),
+            }
+
+        self._fan_out("mempool", build)
+
+    def _fan_out(self, event: str, build):
+        """
+        Queue `event` for every subscriber; `build(addresses)` returns its data for one filter
+        (None to skip) and runs once per distinct filter.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        encoded = {}
+        for subscription in subscribers:
+            if subscription.addresses not in encoded:
+                data = build(subscription.addresses)
+                encoded[subscription.addresses] = None if data is None else format_event(event, data)
+            chunk = encoded[subscription.addresses]
+            if chunk is None:
+                continue
+            if subscription.push(chunk):
+                self.published += 1
+            else:
+                self.dropped_subscribers += 1
+                with self._lock:
+                    self._subscribers.discard(subscription)
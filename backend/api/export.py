@@ -0,0 +1,55 @@
+import json
+
+from backend.config import EXPORT_CHUNK_BYTES
+
+EXPORT_KINDS = ("blocks", "transactions")
+
+
+def block_line(height: int, block_text: str) -> str:
+    return f'{{"height": {height}, "block": {block_text}}}\n'
+
+
+def transaction_lines(height: int, block):
+    """
+    One flattened line per transaction: its position in the chain, then the transaction.
+    """
+    for index, tx_json in enumerate(block.data):
+        if not isinstance(tx_json, dict):
+            continue
+        position = json.dumps({
+            "height": height,
+            "index": index,
+            "block_hash": block.hash,
+            "block_timestamp": block.timestamp,
+        })
+        yield f'{position[:-1]}, {json.dumps(tx_json)[1:]}\n' if tx_json else f"{position}\n"
+
+
+def export_lines(blockchain, chain, start: int, end: int, kind: str = "blocks"):
+    """
+    NDJSON lines for heights start..end (inclusive) of `chain`, one block at a time. Blocks
+    are encoded without entering the block text cache, so an export stays in constant memory.
+    """
+    for height in range(start, end + 1):
+        block = chain[height]
+        if kind == "blocks":
+            yield block_line(height, blockchain.encoded_block(block, cache=False))
+        else:
+            yield from transaction_lines(height, block)
+
+
+def chunked(lines, chunk_bytes: int = EXPORT_CHUNK_BYTES):
+    """
+    Join lines into chunks of roughly `chunk_bytes`, so a stream is not written line by line.
+    """
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
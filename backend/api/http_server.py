@@ -0,0 +1,355 @@
+import asyncio
+import io
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from urllib.parse import parse_qs, unquote
+
+from backend.api.events import KEEPALIVE
+from backend.config import (
+    EVENTS_KEEPALIVE_SECONDS,
+    API_ASYNC_MAX_CONNECTIONS,
+    API_ASYNC_WORKERS,
+    API_ASYNC_KEEPALIVE_SECONDS,
+    API_ASYNC_REQUEST_TIMEOUT_SECONDS,
+    API_ASYNC_MAX_HEADER_BYTES,
+    API_ASYNC_MAX_BODY_BYTES,
+)
+from backend.util.log import log_info, log_warn
+
+
+class BadRequest(Exception):
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, target, version, headers, content_length=0):
+        self.method = method
+        self.target = target
+        self.version = version
+        # lower-cased name -> value; repeated headers are joined with ", "
+        self.headers = headers
+        self.content_length = content_length
+        self.path, _, self.query_string = target.partition("?")
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in connection
+        return "keep-alive" in connection
+
+
+async def read_request(reader, first_line_timeout: float, timeout: float = API_ASYNC_REQUEST_TIMEOUT_SECONDS,
+                       max_header_bytes: int = API_ASYNC_MAX_HEADER_BYTES, max_body_bytes: int = API_ASYNC_MAX_BODY_BYTES):
+    """
+    Next request on a connection, or None when the client closed it or stayed idle.
+    """
+    try:
+        line = await asyncio.wait_for(reader.readline(), first_line_timeout)
+    except (asyncio.TimeoutError, ConnectionError):
+        return None
+    while line in (b"\r\n", b"\n"):
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise BadRequest("400 Bad Request", "Malformed request line")
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise BadRequest("505 HTTP Version Not Supported", "Unsupported HTTP version")
+
+    headers = {}
+    size = len(line)
+    while True:
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        size += len(line)
+        if size > max_header_bytes:
+            raise BadRequest("431 Request Header Fields Too Large", "Request headers too large")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, separator, value = line.decode("latin-1").partition(":")
+        if not separator:
+            raise BadRequest("400 Bad Request", "Malformed header line")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise BadRequest("411 Length Required", "Chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest("400 Bad Request", "Invalid Content-Length")
+    if length < 0 or length > max_body_bytes:
+        raise BadRequest("413 Payload Too Large", "Request body too large")
+    return Request(method, target, version, headers, length)
+
+
+def wsgi_environ(request: Request, body: bytes, server_name: str, server_port: int, remote_addr: str) -> dict:
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": unquote(request.path, encoding="latin-1"),
+        "QUERY_STRING": request.query_string,
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": request.version,
+        "REMOTE_ADDR": remote_addr,
+        "CONTENT_LENGTH": str(len(body)) if body else "",
+        "CONTENT_TYPE": request.headers.get("content-type", ""),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in request.headers.items():
+        if name not in ("content-type", "content-length"):
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+class AsyncHTTPServer:
+    """
+    HTTP/1.1 front end on an asyncio loop for a WSGI app.
+
+    Connections, keep-alive and request parsing live on the loop, so idle and waiting clients
+    cost no threads; at most `max_connections` are open at once. The app itself runs on a pool
+    of `workers` threads, which bounds how many requests execute concurrently (the rest wait
+    on the loop). Responses without a Content-Length are streamed with chunked encoding, one
+    chunk pulled per worker call. `event_streams` maps paths to an (open, close) pair: `open`
+    takes the query arguments and returns an event-stream Subscription and the text to send
+    first (None when full), `close` releases it. Those streams are served from the loop
+    without holding a worker.
+    """
+    def __init__(self, app, host: str, port: int, event_streams=None,
+                 max_connections: int = API_ASYNC_MAX_CONNECTIONS, workers: int = API_ASYNC_WORKERS,
+                 keepalive_seconds: float = API_ASYNC_KEEPALIVE_SECONDS):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.event_streams = event_streams or {}
+        self.max_connections = max_connections
+        self.keepalive_seconds = keepalive_seconds
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.connections = 0
+        self.requests = 0
+        self.rejected = 0
+        self._date = (0, "")
+
+    def start(self, loop=None):
+        """
+        Serve on `loop` (e.g. P2PNode.loop, already running in its thread), or on a new loop
+        in a thread of its own. Returns once the socket is listening.
+        """
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=loop.run_forever, name="api-http", daemon=True)
+            self.thread.start()
+        self.loop = loop
+        asyncio.run_coroutine_threadsafe(self.serve(), loop).result()
+        log_info(f"[HTTP] asyncio server listening on {self.host}:{self.port}")
+
+    async def serve(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        if self.port == 0:
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        if self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+        self.executor.shutdown(wait=False)
+
+    def to_json(self):
+        return {"connections": self.connections, "requests": self.requests, "rejected": self.rejected}
+
+    async def _handle_connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            self.rejected += 1
+            await self._send_simple(writer, "503 Service Unavailable", "Too many connections", keep_alive=False)
+            writer.close()
+            return
+        self.connections += 1
+        try:
+            peer = writer.get_extra_info("peername")
+            remote_addr = peer[0] if peer else ""
+            timeout = self.keepalive_seconds
+            while True:
+                try:
+                    request = await read_request(reader, timeout)
+                except BadRequest as exc:
+                    await self._send_simple(writer, exc.status, str(exc), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                if request.headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                body = b""
+                if request.content_length:
+                    body = await asyncio.wait_for(reader.readexactly(request.content_length), API_ASYNC_REQUEST_TIMEOUT_SECONDS)
+                self.requests += 1
+                stream = self.event_streams.get(request.path) if request.method == "GET" else None
+                if stream is not None:
+                    await self._serve_event_stream(writer, request, *stream)
+                    break
+                environ = wsgi_environ(request, body, self.host, self.port, remote_addr)
+                if not await self._serve_wsgi(writer, request, environ):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except Exception as exc:
+            log_warn(f"[HTTP] Connection error: {exc}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def _call_app(self, environ):
+        """
+        Run the app on a worker thread. A response with a Content-Length is read whole here;
+        otherwise its iterator is returned for streaming.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = status
+            started["headers"] = headers
+            return lambda data: None
+
+        result = self.app(environ, start_response)
+        headers = started["headers"]
+        if any(name.lower() == "content-length" for name, _ in headers):
+            try:
+                return started["status"], headers, b"".join(result), None
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        return started["status"], headers, None, result
+
+    async def _serve_wsgi(self, writer, request, environ) -> bool:
+        """
+        Write the app's response; returns whether the connection can take another request.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, body, iterator = await loop.run_in_executor(self.executor, self._call_app, environ)
+        except Exception as exc:
+            log_warn(f"[HTTP] {request.method} {request.path} failed: {exc}")
+            await self._send_simple(writer, "500 Internal Server Error", "Internal Server Error", keep_alive=False)
+            return False
+
+        keep_alive = request.keep_alive
+        chunked = iterator is not None and request.version == "HTTP/1.1"
+        if iterator is not None and not chunked:
+            keep_alive = False
+        head = [f"HTTP/1.1 {status}", f"Date: {self._http_date()}"]
+        head += [f"{name}: {value}" for name, value in headers if name.lower() not in ("connection", "transfer-encoding")]
+        if chunked:
+            head.append("Transfer-Encoding: chunked")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if request.method == "HEAD":
+            if iterator is not None and hasattr(iterator, "close"):
+                await loop.run_in_executor(self.executor, iterator.close)
+            await writer.drain()
+            return keep_alive
+        if iterator is None:
+            writer.write(body)
+            await writer.drain()
+            return keep_alive
+
+        iterator_next = iter(iterator).__next__
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, _next_chunk, iterator_next)
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        finally:
+            if hasattr(iterator, "close"):
+                await loop.run_in_executor(self.executor, iterator.close)
+        return keep_alive
+
+    async def _serve_event_stream(self, writer, request, open_stream, close_stream):
+        """
+        Serve an event-stream Subscription from the loop: pushes wake this coroutine, so an
+        idle subscriber holds no thread.
+        """
+        opened = open_stream(parse_qs(request.query_string))
+        if opened is None:
+            await self._send_simple(
+                writer, "503 Service Unavailable", '{"error": "too many event subscribers"}', keep_alive=False,
+                content_type="application/json",
+            )
+            return
+        subscription, first = opened
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription.wake = lambda: loop.call_soon_threadsafe(ready.set)
+        try:
+            writer.write((
+                f"HTTP/1.1 200 OK\r\nDate: {self._http_date()}\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                "Cache-Control: no-cache\r\nX-Accel-Buffering: no\r\nConnection: close\r\n\r\n" + first
+            ).encode())
+            await writer.drain()
+            while True:
+                try:
+                    chunk = subscription.next_nowait()
+                except queue.Empty:
+                    ready.clear()
+                    if not subscription.queue.empty():
+                        continue
+                    try:
+                        await asyncio.wait_for(ready.wait(), EVENTS_KEEPALIVE_SECONDS)
+                        continue
+                    except asyncio.TimeoutError:
+                        chunk = KEEPALIVE
+                if chunk is None:
+                    return
+                writer.write(chunk.encode())
+                await writer.drain()
+        finally:
+            subscription.wake = None
+            close_stream(subscription)
+
+    async def _send_simple(self, writer, status: str, message: str, keep_alive: bool,
+                           content_type: str = "text/plain; charset=utf-8"):
+        body = message.encode()
+        writer.write((
+            f"HTTP/1.1 {status}\r\nDate: {self._http_date()}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _http_date(self) -> str:
+        now = int(self.loop.time()) if self.loop else 0
+        if self._date[0] != now:
+            self._date = (now, formatdate(usegmt=True))
+        return self._date[1]
+
+
+def _next_chunk(iterator_next):
+    try:
+        chunk = iterator_next()
+    except StopIteration:
+        return None
+    return chunk.encode() if isinstance(chunk, str) else chunk
@@ -0,0 +1,327 @@
+import json
+import os
+import secrets
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from backend.api.bulk import chain_view
+from backend.api.events import transaction_addresses
+from backend.config import (
+    WEBHOOK_POLL_SECONDS,
+    WEBHOOK_BATCH_MAX,
+    WEBHOOK_TIMEOUT_SECONDS,
+    WEBHOOK_RETRY_BASE_SECONDS,
+    WEBHOOK_RETRY_MAX_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_MAX_PENDING_EVENTS,
+    WEBHOOK_FINALITY_BLOCKS,
+    WEBHOOK_MAX_REGISTRATIONS,
+    WEBHOOK_MAX_CONFIRMATIONS,
+)
+from backend.util.log import log_warn
+
+
+class WebhookError(Exception):
+    pass
+
+
+class Registration:
+    """
+    A callback URL waiting for a transaction, or every transaction touching an address in
+    blocks above `height`, to reach `confirmations`. `tracked` maps txid -> the block hash and
+    height it was reported confirmed in (None while not reported).
+    """
+    def __init__(self, id, url, confirmations, txid=None, address=None, height=0, tracked=None):
+        self.id = id
+        self.url = url
+        self.confirmations = confirmations
+        self.txid = txid
+        self.address = address
+        self.height = height
+        self.tracked = tracked if tracked is not None else ({txid: None} if txid else {})
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "url": self.url,
+            "confirmations": self.confirmations,
+            "txid": self.txid,
+            "address": self.address,
+            "height": self.height,
+            "tracked": dict(self.tracked),
+        }
+
+    @staticmethod
+    def from_json(registration_json):
+        return Registration(**registration_json)
+
+
+class Outbox:
+    """
+    Events waiting for delivery to one URL, with the retry state of its oldest batch.
+    """
+    def __init__(self, events=None, attempts=0, next_attempt=0.0):
+        self.events = events or []
+        self.attempts = attempts
+        self.next_attempt = next_attempt
+
+    def to_json(self):
+        return {"events": self.events, "attempts": self.attempts, "next_attempt": self.next_attempt}
+
+
+class WebhookNotifier:
+    """
+    Confirmation-threshold callbacks.
+
+    A background thread re-evaluates registrations whenever the tip changes: transactions are
+    located through the snapshot's txid index, and blocks connected since the previous round
+    are scanned once for watched addresses. Crossing a threshold queues a `confirmed` event;
+    a reorg that moves a reported transaction out of its block (or below the threshold) queues
+    a `reversed` event and re-arms it. Events are POSTed per URL in batches of at most
+    `batch_max` as `{"events": [...]}`, retried with exponential backoff, and registrations,
+    the scan cursor and undelivered events are saved to `path` so they survive restarts.
+    """
+    def __init__(self, blockchain, path=None, is_ready=lambda: True, post=requests.post,
+                 poll_seconds: float = WEBHOOK_POLL_SECONDS, batch_max: int = WEBHOOK_BATCH_MAX):
+        self.blockchain = blockchain
+        self.path = path
+        self.is_ready = is_ready
+        self.post = post
+        self.poll_seconds = poll_seconds
+        self.batch_max = batch_max
+        self.registrations = {}
+        self.outboxes = {}
+        # hashes of the last scanned blocks, oldest first, to find the fork point after a reorg
+        self._scanned = []
+        self._scanned_height = -1
+        self._evaluated_tip = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.changed = False
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="api-webhooks", daemon=True)
+        if path:
+            self._load()
+
+    def start(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def register(self, url, confirmations, txid=None, address=None) -> Registration:
+        """
+        Add a registration for exactly one of `txid` or `address`; raises WebhookError.
+        """
+        parsed = urlparse(url) if isinstance(url, str) else None
+        if parsed is None or parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise WebhookError("url must be an http(s) URL")
+        if isinstance(confirmations, bool) or not isinstance(confirmations, int) \
+                or not 0 <= confirmations <= WEBHOOK_MAX_CONFIRMATIONS:
+            raise WebhookError(f"confirmations must be an integer from 0 to {WEBHOOK_MAX_CONFIRMATIONS}")
+        if (txid is None) == (address is None):
+            raise WebhookError("exactly one of txid or address is required")
+        if not isinstance(txid or address, str) or not (txid or address):
+            raise WebhookError("txid and address must be non-empty strings")
+        _, snapshot = chain_view(self.blockchain)
+        with self._lock:
+            if len(self.registrations) >= WEBHOOK_MAX_REGISTRATIONS:
+                raise WebhookError("too many webhook registrations")
+            registration = Registration(
+                secrets.token_hex(16), url, confirmations, txid=txid,
+                address=address.lower() if address else None, height=snapshot.height,
+            )
+            self.registrations[registration.id] = registration
+            self._evaluated_tip = None
+            self.changed = True
+        self.notify()
+        return registration
+
+    def get(self, registration_id):
+        return self.registrations.get(registration_id)
+
+    def remove(self, registration_id) -> bool:
+        with self._lock:
+            removed = self.registrations.pop(registration_id, None) is not None
+            self.changed = self.changed or removed
+        return removed
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as exc:
+                log_warn(f"[WEBHOOK] Round failed: {exc}")
+
+    def poll(self, now=None):
+        """
+        One round: evaluate thresholds if the tip changed, deliver due batches, save state.
+        """
+        if self.is_ready():
+            chain, snapshot = chain_view(self.blockchain)
+            if snapshot.tip_hash != self._evaluated_tip:
+                with self._lock:
+                    self._scan(chain, snapshot)
+                    self._evaluate(chain, snapshot)
+                    self._evaluated_tip = snapshot.tip_hash
+                    self.changed = True
+        self.deliver(time.time() if now is None else now)
+        if self.path and self.changed:
+            self._save()
+
+    def _scan(self, chain, snapshot):
+        """
+        Track transactions touching watched addresses in blocks connected since the last scan.
+        """
+        start = self._scanned_height + 1
+        if self._scanned and snapshot.block_heights.get(self._scanned[-1]) is None:
+            start = max(0, self._scanned_height - len(self._scanned) + 1)
+            for block_hash in reversed(self._scanned):
+                height = snapshot.block_heights.get(block_hash)
+                if height is not None:
+                    start = height + 1
+                    break
+        watched = {}
+        for registration in self.registrations.values():
+            if registration.address:
+                watched.setdefault(registration.address, []).append(registration)
+        if watched:
+            for height in range(max(start, 0), snapshot.height + 1):
+                for tx_json in chain[height].data:
+                    if not isinstance(tx_json, dict):
+                        continue
+                    for address in transaction_addresses(tx_json) & watched.keys():
+                        for registration in watched[address]:
+                            if height > registration.height:
+                                registration.tracked.setdefault(tx_json.get("id"), None)
+        self._scanned = [block.hash for block in chain[max(0, snapshot.height - WEBHOOK_FINALITY_BLOCKS + 1):snapshot.height + 1]]
+        self._scanned_height = snapshot.height
+
+    def _evaluate(self, chain, snapshot):
+        for registration in list(self.registrations.values()):
+            for txid, reported in list(registration.tracked.items()):
+                height = snapshot.transactions.get(txid)
+                block_hash = chain[height].hash if height is not None else None
+                confirmations = snapshot.height - height if height is not None else None
+                if reported and (block_hash != reported["block_hash"] or confirmations < registration.confirmations):
+                    self._queue(registration, "reversed", txid, reported["height"], reported["block_hash"], confirmations, snapshot)
+                    registration.tracked[txid] = reported = None
+                if reported is None and height is not None and confirmations >= registration.confirmations:
+                    self._queue(registration, "confirmed", txid, height, block_hash, confirmations, snapshot)
+                    registration.tracked[txid] = reported = {"height": height, "block_hash": block_hash}
+                if reported is None and height is None and registration.address:
+                    # reorged out before reaching the threshold; found again if it is re-mined
+                    del registration.tracked[txid]
+                elif reported and confirmations >= registration.confirmations + WEBHOOK_FINALITY_BLOCKS:
+                    del registration.tracked[txid]
+                    if registration.txid:
+                        del self.registrations[registration.id]
+
+    def _queue(self, registration, event, txid, height, block_hash, confirmations, snapshot):
+        outbox = self.outboxes.setdefault(registration.url, Outbox())
+        if len(outbox.events) >= WEBHOOK_MAX_PENDING_EVENTS:
+            outbox.events.pop(0)
+            self.dropped += 1
+        outbox.events.append({
+            "id": f"{registration.id}:{txid}:{event}:{block_hash}",
+            "event": event,
+            "registration": registration.id,
+            "txid": txid,
+            "address": registration.address,
+            "height": height,
+            "block_hash": block_hash,
+            "confirmations": confirmations,
+            "threshold": registration.confirmations,
+            "tip_height": snapshot.height,
+            "tip": snapshot.tip_hash,
+        })
+
+    def deliver(self, now: float):
+        """
+        POST the oldest batch of every URL whose retry time has come, until one fails.
+        """
+        with self._lock:
+            due = [url for url, outbox in self.outboxes.items() if outbox.events and outbox.next_attempt <= now]
+        for url in due:
+            while True:
+                with self._lock:
+                    outbox = self.outboxes.get(url)
+                    batch = outbox.events[:self.batch_max] if outbox else []
+                if not batch:
+                    break
+                try:
+                    response = self.post(url, json={"events": batch}, timeout=WEBHOOK_TIMEOUT_SECONDS)
+                    delivered = 200 <= response.status_code < 300
+                except requests.RequestException:
+                    delivered = False
+                with self._lock:
+                    self.changed = True
+                    if delivered:
+                        # events queued meanwhile were appended after the batch
+                        del outbox.events[:len(batch)]
+                        outbox.attempts = 0
+                        self.delivered += len(batch)
+                        if not outbox.events:
+                            self.outboxes.pop(url, None)
+                        continue
+                    outbox.attempts += 1
+                    self.failed_attempts += 1
+                    if outbox.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                        log_warn(f"[WEBHOOK] Dropping {len(batch)} events for {url} after {outbox.attempts} attempts")
+                        del outbox.events[:len(batch)]
+                        self.dropped += len(batch)
+                        outbox.attempts = 0
+                    else:
+                        delay = WEBHOOK_RETRY_BASE_SECONDS * 2 ** (outbox.attempts - 1)
+                        outbox.next_attempt = now + min(WEBHOOK_RETRY_MAX_SECONDS, delay)
+                    break
+
+    def to_json(self):
+        return {
+            "registrations": len(self.registrations),
+            "pending_events": sum(len(outbox.events) for outbox in self.outboxes.values()),
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "dropped": self.dropped,
+        }
+
+    def _save(self):
+        """
+        Write the state atomically so a crash never leaves a truncated file behind.
+        """
+        with self._lock:
+            text = json.dumps({
+                "registrations": [registration.to_json() for registration in self.registrations.values()],
+                "outboxes": {url: outbox.to_json() for url, outbox in self.outboxes.items()},
+                "scanned": self._scanned,
+                "scanned_height": self._scanned_height,
+            })
+            self.changed = False
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as state_file:
+            state_file.write(text)
+        os.replace(temporary, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path) as state_file:
+                state = json.load(state_file)
+            registrations = [Registration.from_json(item) for item in state.get("registrations", [])]
+            outboxes = {url: Outbox(**item) for url, item in state.get("outboxes", {}).items()}
+            self._scanned = list(state.get("scanned", []))
+            self._scanned_height = int(state.get("scanned_height", -1))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            log_warn(f"[WEBHOOK] Ignoring unreadable state {self.path}: {exc}")
+            return
+        self.registrations = {registration.id: registration for registration in registrations}
+        self.outboxes = outboxes
@@ -1,22 +1,33 @@
 import os
+import json
+import math
 import random
 import datetime
+import mimetypes
 
-from flask import Flask, jsonify, request, render_template, abort
+from flask import Flask, Response, jsonify, request, render_template, abort
+from werkzeug.security import safe_join
 from cryptography.hazmat.primitives import serialization
 
+from backend.blockchain.block import Block
 from backend.blockchain.blockchain import Blockchain
 from backend.wallet.wallet import Wallet
 from backend.wallet.transaction import Transaction
 from backend.wallet.transaction_pool import TransactionPool
 from backend.p2p.node import P2PNode
+from backend.p2p.bootstrap import BootstrapError, import_bootstrap
+from backend.api.events import EventHub, format_event
+from backend.api.cache import ResponseCache
+from backend.api.export import EXPORT_KINDS, export_lines, chunked
+from backend.api.webhooks import WebhookNotifier, WebhookError
+from backend.api.http_server import AsyncHTTPServer
+from backend.api.bulk import BulkQueryError, parse_items, chain_view, node_view, bulk_balances, bulk_transaction_statuses
 from backend.economics import block_reward
 from backend.config import (
     P2P_HOST,
     P2P_PORT,
     P2P_SYNC_INTERVAL_SECONDS,
     MINING_REWARD_INPUT,
-    MAX_TXS_PER_BLOCK,
     AUTO_MINE_ENABLED,
     MINER_ADDRESS_OVERRIDE,
     MINER_NAME,
@@ -26,12 +37,21 @@ from backend.config import (
     COIN_NAME,
     UNIT_NAME,
     UNITS_PER_COIN,
+    FEE_ESTIMATE_DEFAULT_TARGET,
+    API_BLOCKS_PAGE_LIMIT,
+    API_BLOCKS_MAX_PAGE_LIMIT,
+    EVENTS_KEEPALIVE_SECONDS,
+    API_STATIC_MAX_AGE_SECONDS,
+    API_HOST,
 )
 from backend.util.log import log_info, log_success, log_warn
 import threading
 import time
 
-app = Flask(__name__)
+# Static files are served by route_static below, from the response cache.
+app = Flask(__name__, static_folder=None)
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+response_cache = ResponseCache()
 blockchain = Blockchain()
 wallet = Wallet(blockchain)
 transaction_pool = TransactionPool(blockchain)
@@ -58,22 +78,45 @@ require_sync_before_mining = peer_mode_env or bool(seed_peers)
 log_info(f"[HTTP] API port={PORT} peer_mode={peer_mode_env}")
 log_info(f"[P2P] Host={P2P_HOST} port={p2p_port} seeds={seed_peers or ['<none>']}")
 
+# Import a local bootstrap file first; P2P sync then continues from its tip.
+bootstrap_path = os.environ.get('BOOTSTRAP_FILE')
+if bootstrap_path:
+    log_info(f"[BOOTSTRAP] Importing {bootstrap_path}")
+    try:
+        bootstrap_stats = import_bootstrap(
+            blockchain, bootstrap_path, progress=lambda height: log_info(f"[BOOTSTRAP] Imported up to height {height}")
+        )
+        log_success(f"[BOOTSTRAP] Imported {bootstrap_stats['imported']} blocks in {bootstrap_stats['seconds']}s, height={bootstrap_stats['height']}")
+    except (OSError, BootstrapError) as exc:
+        log_warn(f"[BOOTSTRAP] Import stopped at height {len(blockchain.chain) - 1}: {exc}")
+
 p2p_node = P2PNode(
     P2P_HOST,
     p2p_port,
     blockchain,
     transaction_pool,
     seeds=seed_peers,
-    sync_interval=P2P_SYNC_INTERVAL_SECONDS
+    sync_interval=P2P_SYNC_INTERVAL_SECONDS,
+    address_book_path=os.environ.get('P2P_ADDRESS_BOOK', f'p2p_peers_{p2p_port}.json') or None,
 )
 p2p_node.start()
+events = EventHub(blockchain, transaction_pool)
+events.start()
+webhooks = WebhookNotifier(
+    blockchain,
+    path=os.environ.get('WEBHOOKS_PATH', f'webhooks_{p2p_port}.json') or None,
+    is_ready=lambda: p2p_node.synced or not require_sync_before_mining,
+)
+webhooks.start()
 log_success(f"[NODE] Node online | wallet={wallet.address[:8]}... | chain_height={len(blockchain.chain)-1}")
 
 
 def mine_once():
+    """
+    Build a template and mine it. Chain and mempool changes happen under blockchain.lock,
+    shared with the P2P validation worker and the API; the proof of work runs outside it.
+    """
     with mining_lock:
-        prioritized = transaction_pool.prioritized_transactions(limit=MAX_TXS_PER_BLOCK)
-        accepted = []
         pending_spent = {}
         dropped_ids = []
 
@@ -82,30 +125,35 @@ def mine_once():
             change_back = tx.output.get(sender_address, 0)
             return max(0, spend - change_back)
 
-        for tx in prioritized:
+        def _accept(tx):
             # Skip any reward/genesis noise that might be in the pool (shouldn't happen).
             if tx.input == MINING_REWARD_INPUT or tx.input.get("type") == "GENESIS":
                 dropped_ids.append(tx.id)
-                continue
+                return False
 
             sender = tx.input.get("address")
             if not sender:
                 dropped_ids.append(tx.id)
-                continue
+                return False
 
-            available = Wallet.calculate_balance(blockchain, sender) - pending_spent.get(sender, 0)
+            available = blockchain.balance_of(sender) - pending_spent.get(sender, 0)
             sender_net_spend = _net_spend(tx, sender)
             if sender_net_spend > available:
                 log_warn(f"[MINER] Dropping tx {tx.id[:8]}: input exceeds current balance for {sender[:8]}...")
                 dropped_ids.append(tx.id)
-                continue
+                return False
 
-            accepted.append(tx)
             pending_spent[sender] = pending_spent.get(sender, 0) + sender_net_spend
+            return True
 
-        # Remove dropped transactions from the mempool to avoid reprocessing invalid ones.
-        for txid in dropped_ids:
-            transaction_pool.transaction_map.pop(txid, None)
+        with blockchain.lock:
+            last_block = blockchain.chain[-1]
+            height = len(blockchain.chain)
+            accepted = transaction_pool.block_template(accept=_accept)
+
+            # Remove dropped transactions from the mempool to avoid reprocessing invalid ones.
+            for txid in dropped_ids:
+                transaction_pool.transaction_map.pop(txid, None)
 
         transaction_data = [tx.to_json() for tx in accepted]
 
@@ -117,7 +165,7 @@ def mine_once():
         ])
         policy = blockchain.policy()
         reward_amount = block_reward(
-            len(blockchain.chain),
+            height,
             start_reward=policy["start_reward"],
             halving_interval=policy["halving_interval"],
             supply_model=policy["supply_model"],
@@ -135,12 +183,15 @@ def mine_once():
             reward_outputs[FOUNDATION_ADDRESS] = reward_amount - miner_take
 
         transaction_data.append(Transaction(input=MINING_REWARD_INPUT, output=reward_outputs).to_json())
-        blockchain.add_block(transaction_data)
+        block = Block.mine_block(last_block, transaction_data)
+        with blockchain.lock:
+            blockchain.append_block(block)
+            transaction_pool.clear_blockchain_transactions(blockchain)
 
-        block = blockchain.chain[-1]
-        log_success(f"[MINER] Mined block height={len(blockchain.chain)-1} txs={len(transaction_data)} reward={reward_amount} to={reward_address[:8]}... foundation={foundation_cut}")
+        log_success(f"[MINER] Mined block height={height} txs={len(transaction_data)} reward={reward_amount} to={reward_address[:8]}... foundation={foundation_cut}")
         p2p_node.broadcast_block(block)
-        transaction_pool.clear_blockchain_transactions(blockchain)
+        events.notify()
+        webhooks.notify()
         return block
 
 
@@ -192,6 +243,8 @@ def _handle_sync_change(is_synced: bool):
 
 p2p_node.on_synced(_start_miner_if_ready)
 p2p_node.on_sync_change(_handle_sync_change)
+p2p_node.on_sync_change(events.publish_sync)
+p2p_node.on_change(events.notify)
 
 if auto_mine_enabled:
     if require_sync_before_mining:
@@ -200,6 +253,64 @@ if auto_mine_enabled:
         start_auto_miner()
 
 
+def _send_cached(entry, cache_control="no-cache"):
+    """
+    Serve a cached response: 304 when the client already holds it, the gzip variant when accepted.
+    """
+    use_gzip = entry.gzip_body is not None and request.accept_encodings["gzip"] > 0
+    if request.if_none_match.contains(entry.etag) or request.if_none_match.contains(entry.gzip_etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry.gzip_body if use_gzip else entry.body, mimetype=entry.mimetype)
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(entry.gzip_etag if use_gzip else entry.etag)
+    response.headers["Cache-Control"] = cache_control
+    if entry.gzip_body is not None:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def _cached_json(build, *state, cache_control="no-cache"):
+    """
+    JSON response for this request, encoded once per `state` (tip hash, mempool version, ...).
+    """
+    key = (request.path, request.query_string, *state)
+    return _send_cached(response_cache.get(key, lambda: app.json.dumps(build())), cache_control)
+
+
+def _static_entry(filename):
+    path = safe_join(STATIC_FOLDER, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+
+    def read():
+        with open(path, "rb") as static_file:
+            return static_file.read()
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return response_cache.get(("static", filename, os.stat(path).st_mtime_ns), read, mimetype)
+
+
+@app.url_defaults
+def _version_static_urls(endpoint, values):
+    # Static URLs carry a content hash, so browsers may keep them until the file changes.
+    if endpoint == "static" and "filename" in values:
+        entry = _static_entry(values["filename"])
+        if entry is not None:
+            values["v"] = entry.etag[:12]
+
+
+@app.route("/static/<path:filename>", endpoint="static")
+def route_static(filename):
+    entry = _static_entry(filename)
+    if entry is None:
+        abort(404)
+    if request.args.get("v") == entry.etag[:12]:
+        return _send_cached(entry, f"public, max-age={API_STATIC_MAX_AGE_SECONDS}, immutable")
+    return _send_cached(entry)
+
+
 @app.route("/")
 def route_default():
     return render_template("index.html")
@@ -220,7 +331,7 @@ def route_config_page():
 def route_config():
     global auto_mine_enabled, miner_address_override, miner_name, refresh_interval_seconds
     if request.method == "GET":
-        return jsonify({
+        return _cached_json(lambda: {
             "auto_mine": auto_mine_enabled,
             "miner_address": miner_address_override or wallet.address,
             "default_wallet_address": wallet.address,
@@ -229,7 +340,7 @@ def route_config():
             "coin_name": COIN_NAME,
             "unit_name": UNIT_NAME,
             "units_per_coin": UNITS_PER_COIN,
-        })
+        }, auto_mine_enabled, miner_address_override, wallet.address, miner_name, refresh_interval_seconds)
 
     body = request.get_json() or {}
     auto_mine_enabled = bool(body.get("auto_mine", auto_mine_enabled))
@@ -257,30 +368,140 @@ def route_config():
 
 @app.route("/block/<block_hash>")
 def route_block_detail(block_hash):
-    target = None
-    idx = None
-    for block in blockchain.chain:
-        if block.hash == block_hash:
-            target = block
-            idx = blockchain.chain.index(block)
-            break
-    if not target:
+    chain, snapshot = chain_view(blockchain)
+    idx = snapshot.block_heights.get(block_hash)
+    if idx is None:
         abort(404)
-    prev_hash = blockchain.chain[idx-1].hash if idx is not None and idx > 0 else None
-    next_hash = blockchain.chain[idx+1].hash if idx is not None and idx < len(blockchain.chain)-1 else None
+    target = chain[idx]
+    prev_hash = chain[idx-1].hash if idx > 0 else None
+    next_hash = chain[idx+1].hash if idx < snapshot.height else None
     human_time = datetime.datetime.fromtimestamp(target.timestamp / 1_000_000_000).strftime("%Y-%m-%d %H:%M:%S")
-    return render_template("block.html", block=target, chain_height=len(blockchain.chain)-1, prev_hash=prev_hash, next_hash=next_hash, human_time=human_time)
+    return render_template("block.html", block=target, chain_height=snapshot.height, prev_hash=prev_hash, next_hash=next_hash, human_time=human_time)
 
 
 @app.route("/address/<address>")
 def route_address_detail(address):
-    balance = Wallet.calculate_balance(blockchain, address)
+    _, snapshot = chain_view(blockchain)
+    balance = snapshot.balance_of(address)
     return render_template("address.html", address=address, balance=balance)
 
 
 @app.route("/blockchain")
 def route_blockchain():
-    return jsonify(blockchain.to_json())
+    chain, snapshot = chain_view(blockchain)
+    # The response cache keeps the whole text, so the blocks are not cached one by one as well.
+    return _send_cached(response_cache.get(
+        ("/blockchain", snapshot.tip_hash),
+        lambda: blockchain.encoded_chain(0, snapshot.height + 1, cache=False, chain=chain),
+    ))
+
+
+def _tip_json(snapshot, synced):
+    return {
+        "height": snapshot.height,
+        "hash": snapshot.tip_hash,
+        "work": snapshot.work,
+        "synced": synced,
+    }
+
+
+@app.route("/tip")
+def route_tip():
+    _, snapshot = chain_view(blockchain)
+    synced = p2p_node.synced
+    return _cached_json(lambda: _tip_json(snapshot, synced), snapshot.tip_hash, synced)
+
+
+def _open_event_stream(address):
+    """
+    A new event subscription for a comma-separated address filter and the text it starts with
+    (the current tip and sync state), or None when the subscriber limit is reached.
+    """
+    subscription = events.subscribe((address or "").split(","))
+    if subscription is None:
+        return None
+    _, snapshot = chain_view(blockchain)
+    synced = p2p_node.synced
+    first = "retry: 3000\n\n" + format_event("tip", _tip_json(snapshot, synced)) + format_event("sync", {"synced": synced})
+    return subscription, first
+
+
+@app.route("/events")
+def route_events():
+    """
+    Server-sent event stream: `tip` and `sync` changes, `mempool` additions/removals and, for
+    an `address` filter (comma-separated), `confirmed` transactions touching those addresses.
+    The current tip and sync state are sent first.
+    """
+    opened = _open_event_stream(request.args.get("address"))
+    if opened is None:
+        return jsonify({"error": "too many event subscribers"}), 503
+    subscription, first = opened
+
+    def stream():
+        try:
+            yield first
+            while True:
+                chunk = subscription.next(EVENTS_KEEPALIVE_SECONDS)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            events.unsubscribe(subscription)
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/blocks")
+def route_blocks():
+    """
+    Up to `limit` blocks from height `from`, with the height and hash of the tip they were
+    read against. Clients append pages past what they hold and detect a reorg when the first
+    block's last_hash no longer matches their own tip.
+    """
+    try:
+        start = max(0, int(request.args.get("from", 0)))
+        limit = max(1, min(API_BLOCKS_MAX_PAGE_LIMIT, int(request.args.get("limit", API_BLOCKS_PAGE_LIMIT))))
+    except (TypeError, ValueError):
+        return jsonify({"error": "from and limit must be integers"}), 400
+    chain, snapshot = chain_view(blockchain)
+
+    def build():
+        header = json.dumps({"from": start, "height": snapshot.height, "tip": snapshot.tip_hash})
+        blocks = blockchain.encoded_chain(start, min(start + limit, snapshot.height + 1), chain=chain)
+        return f'{header[:-1]}, "blocks": {blocks}}}'
+
+    return _send_cached(response_cache.get(("/blocks", start, limit, snapshot.tip_hash), build))
+
+
+@app.route("/export")
+def route_export():
+    """
+    Stream heights `from`..`to` (inclusive, default up to the tip) as newline-delimited JSON:
+    `kind=blocks` (default) gives `{"height", "block"}` per line, `kind=transactions` one
+    flattened transaction per line with its height, index and block. The range is read
+    against the chain as it was when the request started.
+    """
+    kind = request.args.get("kind", "blocks")
+    if kind not in EXPORT_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(EXPORT_KINDS)}"}), 400
+    chain, snapshot = chain_view(blockchain)
+    try:
+        start = max(0, int(request.args.get("from", 0)))
+        end = min(snapshot.height, int(request.args.get("to", snapshot.height)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "from and to must be integers"}), 400
+    log_info(f"[EXPORT] Streaming {kind} for heights {start}..{end}")
+    return Response(
+        chunked(export_lines(blockchain, chain, start, end, kind)),
+        mimetype="application/x-ndjson",
+        headers={"X-Chain-Height": str(snapshot.height), "X-Chain-Tip": snapshot.tip_hash},
+    )
+
+
+@app.route("/p2p/stats")
+def route_p2p_stats():
+    return jsonify(p2p_node.threadsafe_stats())
 
 
 @app.route("/blockchain/mine")
@@ -297,24 +518,45 @@ def route_wallet_transact():
     transaction_data = request.get_json()
 
     try:
+        fee = None
+        if transaction_data.get('target_blocks'):
+            fee = _estimated_fee(
+                {transaction_data['recipient']: transaction_data['amount'], wallet.address: 0},
+                transaction_data['target_blocks']
+            )
         transaction = Transaction(
             wallet,
             transaction_data['recipient'],
             transaction_data['amount'],
+            fee=fee,
             mempool_size=len(transaction_pool.transaction_map),
         )
         log_info(f"[TX] Creating transaction to={transaction_data['recipient']} amount={transaction_data['amount']}")
 
-        transaction_pool.set_transaction(transaction)
+        with blockchain.lock:
+            transaction_pool.set_transaction(transaction)
     except Exception as exc:
         log_warn(f"[TX] Transaction rejected: {exc}")
         return jsonify({"error": str(exc)}), 400
 
     p2p_node.broadcast_transaction(transaction)
+    events.notify()
     log_success(f"[TX] Broadcast transaction {transaction.id[:8]}...")
 
     return jsonify(transaction.to_json())
 
+
+def _estimated_fee(output, target_blocks):
+    """
+    Fee for confirmation within `target_blocks` from the historical estimator, or None when
+    there is not enough confirmation history yet.
+    """
+    fee_rate = transaction_pool.fee_estimator.estimate_fee_rate(target_blocks)
+    if fee_rate is None:
+        return None
+    return int(math.ceil(fee_rate * Transaction.estimate_size(output, wallet)))
+
+
 @app.route("/wallet/estimate_fee", methods=["GET"])
 def route_wallet_estimate_fee():
     recipient = request.args.get("recipient") or wallet.address
@@ -322,18 +564,24 @@ def route_wallet_estimate_fee():
         amount = float(request.args.get("amount", 0))
     except ValueError:
         return jsonify({"error": "invalid amount"}), 400
+    try:
+        target_blocks = int(request.args.get("target_blocks", FEE_ESTIMATE_DEFAULT_TARGET))
+    except ValueError:
+        return jsonify({"error": "invalid target_blocks"}), 400
 
     try:
         if amount <= 0:
             return jsonify({"error": "amount must be positive"}), 400
 
-        balance = wallet.balance
+        view = node_view(blockchain, transaction_pool)
+        balance = view.snapshot.balance_of(wallet.address)
         provisional_change = balance - amount
         if provisional_change < 0:
             provisional_change = 0
 
         dummy_output = {recipient: amount, wallet.address: provisional_change}
-        fee = Transaction.compute_fee(dummy_output, mempool_size=len(transaction_pool.transaction_map))
+        fee = Transaction.compute_fee(dummy_output, mempool_size=len(view.mempool))
+        estimated_fee = _estimated_fee(dummy_output, target_blocks)
         insufficient = (amount + fee) > balance
     except Exception as exc:
         return jsonify({"error": str(exc)}), 400
@@ -341,20 +589,29 @@ def route_wallet_estimate_fee():
     return jsonify({
         "fee": fee,
         "total_required": amount + fee,
-        "balance": wallet.balance,
-        "insufficient": insufficient
+        "balance": balance,
+        "insufficient": insufficient,
+        "target_blocks": target_blocks,
+        "estimated_fee": max(fee, estimated_fee) if estimated_fee is not None else None,
+        "fee_rate_by_target": transaction_pool.fee_estimator.estimates(),
     })
 
 
 @app.route("/wallet/info")
 def route_wallet_info():
-    log_info(f"[WALLET] Info requested addr={wallet.address[:8]}... balance={wallet.balance}")
-    return jsonify({
-        "address": wallet.address,
-        "balance": wallet.balance,
-        "public_key": wallet.public_key,
-        "private_key": wallet.private_key.private_numbers().private_value.to_bytes(32, 'big').hex()
-    })
+    _, snapshot = chain_view(blockchain)
+
+    def build():
+        balance = snapshot.balance_of(wallet.address)
+        log_info(f"[WALLET] Info requested addr={wallet.address[:8]}... balance={balance}")
+        return {
+            "address": wallet.address,
+            "balance": balance,
+            "public_key": wallet.public_key,
+            "private_key": wallet.private_key.private_numbers().private_value.to_bytes(32, 'big').hex()
+        }
+
+    return _cached_json(build, wallet.address, snapshot.tip_hash, cache_control="private, no-cache")
 
 @app.route("/wallet/balance")
 def route_wallet_balance():
@@ -362,8 +619,20 @@ def route_wallet_balance():
     if not address:
         return jsonify({"error": "address is required"}), 400
     log_info(f"[WALLET] Balance requested for {address[:8]}...")
-    balance = Wallet.calculate_balance(blockchain, address)
-    return jsonify({"address": address, "balance": balance})
+    _, snapshot = chain_view(blockchain)
+    return jsonify({"address": address, "balance": snapshot.balance_of(address)})
+
+@app.route("/wallet/balances", methods=["POST"])
+def route_wallet_balances():
+    """
+    Balances of many addresses, body `{"addresses": [...]}`, all read at one tip.
+    """
+    try:
+        addresses = parse_items(request.get_json(silent=True), "addresses")
+    except BulkQueryError as exc:
+        return jsonify({"error": str(exc)}), 400
+    _, snapshot = chain_view(blockchain)
+    return jsonify(bulk_balances(snapshot, addresses))
 
 
 def _tx_matches_address(tx_json: dict, address: str) -> bool:
@@ -412,9 +681,16 @@ def route_transactions_feed():
     except (TypeError, ValueError):
         limit = 50
 
+    view = node_view(blockchain, transaction_pool)
+    return _cached_json(
+        lambda: _transactions_feed(view, address, limit), view.snapshot.tip_hash, view.mempool.version
+    )
+
+
+def _transactions_feed(view, address, limit):
     seen_ids = set()
     mempool_entries = []
-    for tx in transaction_pool.prioritized_transactions():
+    for tx in view.mempool.prioritized():
         tx_json = tx.to_json()
         if not _tx_matches_address(tx_json, address):
             continue
@@ -422,10 +698,10 @@ def route_transactions_feed():
         seen_ids.add(tx.id)
 
     confirmed_entries = []
-    for height in range(len(blockchain.chain) - 1, -1, -1):
+    for height in range(view.height, -1, -1):
         if len(confirmed_entries) >= limit:
             break
-        block = blockchain.chain[height]
+        block = view.chain[height]
         for tx_json in block.data:
             txid = tx_json.get("id")
             if txid in seen_ids:
@@ -445,27 +721,42 @@ def route_transactions_feed():
             if len(confirmed_entries) >= limit:
                 break
 
-    return jsonify({
+    return {
         "mempool": mempool_entries,
         "confirmed": confirmed_entries,
-        "height": len(blockchain.chain) - 1
-    })
+        "height": view.height
+    }
+
+
+@app.route("/transactions/status", methods=["POST"])
+def route_transactions_status():
+    """
+    Status and confirmations of many transactions, body `{"txids": [...]}`, all read at one tip.
+    """
+    try:
+        txids = parse_items(request.get_json(silent=True), "txids")
+    except BulkQueryError as exc:
+        return jsonify({"error": str(exc)}), 400
+    view = node_view(blockchain, transaction_pool)
+    return jsonify(bulk_transaction_statuses(view.chain, view.snapshot, view.mempool.transactions, txids))
 
 
 @app.route("/transactions/<txid>")
 def route_transaction_detail(txid):
     address_filter = (request.args.get("address") or "").strip()
+    view = node_view(blockchain, transaction_pool)
     # Check mempool first
-    tx = transaction_pool.transaction_map.get(txid)
+    tx = view.mempool.transactions.get(txid)
     if tx and _tx_matches_address(tx.to_json(), address_filter):
         entry = _tx_status_entry(tx.to_json(), status="mempool")
         entry["confirmations"] = 0
         return jsonify(entry)
 
-    for height, block in enumerate(blockchain.chain):
+    height = view.snapshot.transactions.get(txid)
+    if height is not None:
+        block = view.chain[height]
         for tx_json in block.data:
             if tx_json.get("id") == txid and _tx_matches_address(tx_json, address_filter):
-                confirmations = (len(blockchain.chain) - 1) - height
                 entry = _tx_status_entry(
                     tx_json,
                     status="confirmed",
@@ -473,12 +764,42 @@ def route_transaction_detail(txid):
                     block_hash=block.hash,
                     timestamp=block.timestamp
                 )
-                entry["confirmations"] = confirmations
+                entry["confirmations"] = view.height - height
                 return jsonify(entry)
 
     return jsonify({"error": "transaction not found", "id": txid, "status": "unknown"}), 404
 
 
+@app.route("/webhooks", methods=["GET", "POST"])
+def route_webhooks():
+    """
+    POST `{"txid" or "address", "confirmations", "url"}` registers a confirmation callback;
+    GET reports delivery counters.
+    """
+    if request.method == "GET":
+        return jsonify(webhooks.to_json())
+    body = request.get_json(silent=True) or {}
+    try:
+        registration = webhooks.register(
+            body.get("url"), body.get("confirmations"), txid=body.get("txid"), address=body.get("address")
+        )
+    except WebhookError as exc:
+        return jsonify({"error": str(exc)}), 400
+    log_info(f"[WEBHOOK] Registered {registration.id[:8]}... for {(registration.txid or registration.address)[:8]}...")
+    return jsonify(registration.to_json()), 201
+
+
+@app.route("/webhooks/<registration_id>", methods=["GET", "DELETE"])
+def route_webhook_detail(registration_id):
+    registration = webhooks.get(registration_id)
+    if registration is None:
+        return jsonify({"error": "webhook not found"}), 404
+    if request.method == "DELETE":
+        webhooks.remove(registration_id)
+        return jsonify({"deleted": registration_id})
+    return jsonify(registration.to_json())
+
+
 @app.route("/wallet/create", methods=["POST"])
 def route_wallet_create():
     """
@@ -525,5 +846,14 @@ def route_wallet_import():
     })
 
 
+def create_http_server(host=API_HOST, port=None):
+    """
+    The asyncio front end for this app; /events streams are served from its loop.
+    """
+    return AsyncHTTPServer(app, host, PORT if port is None else port, event_streams={
+        "/events": (lambda query: _open_event_stream(",".join(query.get("address", []))), events.unsubscribe),
+    })
+
+
 if __name__ == '__main__':
     app.run(port=PORT)
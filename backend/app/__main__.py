@@ -1,7 +1,19 @@
-from backend.app import app, PORT
+import os
+import threading
+
+from backend.app import app, PORT, p2p_node, create_http_server
+from backend.config import API_SERVER, API_ASYNC_ON_P2P_LOOP
 from backend.util.log import log_info
 
 
 if __name__ == "__main__":
-    log_info(f"[HTTP] Flask server starting on port {PORT}")
-    app.run(port=PORT)
+    if os.environ.get("API_SERVER", API_SERVER) == "flask":
+        log_info(f"[HTTP] Flask server starting on port {PORT}")
+        app.run(port=PORT)
+    else:
+        server = create_http_server()
+        server.start(loop=p2p_node.loop if API_ASYNC_ON_P2P_LOOP else None)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.stop()
@@ -53,6 +53,9 @@ const confirmedCount = document.getElementById("confirmed-count");
 const displayModeSelect = document.getElementById("display-mode");
 let refreshIntervalSeconds = 0;
 let refreshTimer = null;
+let eventSource = null;
+let eventSourceAddress = "";
+let eventsConnected = false;
 const renameWalletModal = document.getElementById("rename-wallet-modal");
 const renameWalletInput = document.getElementById("rename-wallet-input");
 const renameWalletSave = document.getElementById("rename-wallet-save");
@@ -91,6 +94,9 @@ function normalizeWalletEntry(entry) {
   };
 }
 let cachedChain = [];
+let chainLoading = false;
+const BLOCKS_PAGE_LIMIT = 500;
+const REORG_REWIND_BLOCKS = 100;
 
 async function fetchJson(url, opts = {}) {
   const res = await fetch(url, { headers: { "Content-Type": "application/json" }, ...opts });
@@ -131,74 +137,114 @@ async function loadWallet() {
   }
 }
 
+function blockMatches(block, query) {
+  if (!query) return true;
+  const matchBlock = block.hash?.toLowerCase().includes(query);
+  const matchTx = (block.data || []).some((tx) => {
+    const txIdMatch = (tx.id || "").toLowerCase().includes(query);
+    const inputAddrMatch = ((tx.input?.address) || "").toLowerCase().includes(query);
+    const outputAddrMatch = Object.keys(tx.output || {}).some((addr) =>
+      addr.toLowerCase().includes(query)
+    );
+    return txIdMatch || inputAddrMatch || outputAddrMatch;
+  });
+  return matchBlock || matchTx;
+}
+
+function buildBlockElement(block, height) {
+  const div = document.createElement("div");
+  div.className = "block";
+  div.innerHTML = `
+    <div class="block-top">
+      <div>
+        <div class="tag">Height ${height}</div>
+        <p class="mono" style="margin:4px 0 0;"><a class="addr-link" href="/block/${block.hash}">${block.hash}</a></p>
+      </div>
+      <small class="muted">Txs: ${block.data.length}</small>
+    </div>
+  `;
+  block.data.forEach((tx) => {
+    const txDiv = document.createElement("div");
+    txDiv.className = "tx";
+    const isReward = JSON.stringify(tx.input) === JSON.stringify({ address: "+--official-mining-reward--+" });
+    txDiv.innerHTML = `
+      <div class="tx-header">
+        <span class="mono">tx: ${tx.id || "n/a"}</span>
+        <small>${isReward ? "Reward" : "Transfer"}</small>
+      </div>
+      <small>From: ${isReward ? (tx.input?.address ?? "genesis") : `<a class="addr-link" href="/address/${tx.input?.address}">${tx.input?.address ?? "genesis"}</a>`} | Fee: ${formatAmountWithSecondary(tx.input?.fee ?? 0)}</small>
+      <div class="mono">Outputs:</div>
+    `;
+    const outputsList = document.createElement("ul");
+    Object.entries(tx.output || {}).forEach(([addr, val]) => {
+      const li = document.createElement("li");
+      if (isReward) {
+        li.innerHTML = `<span class="addr-link disabled">${addr}</span>: ${formatAmountWithSecondary(val)}`;
+      } else {
+        li.innerHTML = `<a class="addr-link" href="/address/${addr}">${addr}</a>: ${formatAmountWithSecondary(val)}`;
+      }
+      outputsList.appendChild(li);
+    });
+    txDiv.appendChild(outputsList);
+    div.appendChild(txDiv);
+  });
+  return div;
+}
+
 function renderBlocks(chain) {
   if (!blocksEl || !blockCountEl) return;
   cachedChain = chain;
   blockCountEl.textContent = `${chain.length} blocks`;
   blocksEl.innerHTML = "";
   const query = (blockSearchInput?.value || "").toLowerCase();
-  const filtered = [...chain].filter((block) => {
-    if (!query) return true;
-    const matchBlock = block.hash?.toLowerCase().includes(query);
-    const matchTx = (block.data || []).some((tx) => {
-      const txIdMatch = (tx.id || "").toLowerCase().includes(query);
-      const inputAddrMatch = ((tx.input?.address) || "").toLowerCase().includes(query);
-      const outputAddrMatch = Object.keys(tx.output || {}).some((addr) =>
-        addr.toLowerCase().includes(query)
-      );
-      return txIdMatch || inputAddrMatch || outputAddrMatch;
-    });
-    return matchBlock || matchTx;
-  }).reverse();
-
-  filtered.forEach((block, idxFiltered) => {
-    const div = document.createElement("div");
-    div.className = "block";
-    const height = chain.length - 1 - idxFiltered;
-    div.innerHTML = `
-      <div class="block-top">
-        <div>
-          <div class="tag">Height ${height}</div>
-          <p class="mono" style="margin:4px 0 0;"><a class="addr-link" href="/block/${block.hash}">${block.hash}</a></p>
-        </div>
-        <small class="muted">Txs: ${block.data.length}</small>
-      </div>
-    `;
-    block.data.forEach((tx) => {
-      const txDiv = document.createElement("div");
-      txDiv.className = "tx";
-      const isReward = JSON.stringify(tx.input) === JSON.stringify({ address: "+--official-mining-reward--+" });
-      txDiv.innerHTML = `
-        <div class="tx-header">
-          <span class="mono">tx: ${tx.id || "n/a"}</span>
-          <small>${isReward ? "Reward" : "Transfer"}</small>
-        </div>
-        <small>From: ${isReward ? (tx.input?.address ?? "genesis") : `<a class="addr-link" href="/address/${tx.input?.address}">${tx.input?.address ?? "genesis"}</a>`} | Fee: ${formatAmountWithSecondary(tx.input?.fee ?? 0)}</small>
-        <div class="mono">Outputs:</div>
-      `;
-      const outputsList = document.createElement("ul");
-      Object.entries(tx.output || {}).forEach(([addr, val]) => {
-        const li = document.createElement("li");
-        if (isReward) {
-          li.innerHTML = `<span class="addr-link disabled">${addr}</span>: ${formatAmountWithSecondary(val)}`;
-        } else {
-          li.innerHTML = `<a class="addr-link" href="/address/${addr}">${addr}</a>: ${formatAmountWithSecondary(val)}`;
-        }
-        outputsList.appendChild(li);
-      });
-      txDiv.appendChild(outputsList);
-      div.appendChild(txDiv);
-    });
-    blocksEl.appendChild(div);
-  });
+  for (let height = chain.length - 1; height >= 0; height--) {
+    if (blockMatches(chain[height], query)) blocksEl.appendChild(buildBlockElement(chain[height], height));
+  }
+}
+
+function appendBlocks(chain, fromHeight) {
+  // Only the new heights are rendered; the newest block stays on top.
+  if (!blocksEl || !blockCountEl) return;
+  cachedChain = chain;
+  blockCountEl.textContent = `${chain.length} blocks`;
+  const query = (blockSearchInput?.value || "").toLowerCase();
+  for (let height = fromHeight; height < chain.length; height++) {
+    if (blockMatches(chain[height], query)) blocksEl.prepend(buildBlockElement(chain[height], height));
+  }
 }
 
 async function loadChain() {
+  if (!blocksEl || chainLoading) return;
+  chainLoading = true;
   try {
-    const chain = await fetchJson("/blockchain");
-    renderBlocks(chain);
+    const tip = await fetchJson("/tip");
+    if (cachedChain.length && cachedChain[cachedChain.length - 1].hash === tip.hash) return;
+    let chain = cachedChain.slice();
+    let rewound = false;
+    for (;;) {
+      const from = chain.length;
+      const page = await fetchJson(`/blocks?from=${from}&limit=${BLOCKS_PAGE_LIMIT}`);
+      const parent = chain[from - 1];
+      const first = page.blocks[0];
+      const forked = first ? parent && first.last_hash !== parent.hash : parent?.hash !== page.tip;
+      if (forked) {
+        // Reorg: step back until the page links to a block we still share.
+        chain = chain.slice(0, Math.max(0, from - REORG_REWIND_BLOCKS));
+        rewound = true;
+        continue;
+      }
+      chain.push(...page.blocks);
+      if (!first || chain.length > page.height) break;
+    }
+    if (rewound) {
+      renderBlocks(chain);
+    } else {
+      appendBlocks(chain, cachedChain.length);
+    }
   } catch (err) {
     showToast(err.message, "error");
+  } finally {
+    chainLoading = false;
   }
 }
 
@@ -378,7 +424,10 @@ document.getElementById("tx-form")?.addEventListener("submit", async (e) => {
 txAmountInput?.addEventListener("input", updateEstimatedFee);
 txRecipientInput?.addEventListener("input", updateEstimatedFee);
 txRefreshBtn?.addEventListener("click", () => loadTransactionsFeed());
-txAddressFilter?.addEventListener("change", () => loadTransactionsFeed());
+txAddressFilter?.addEventListener("change", () => {
+  loadTransactionsFeed();
+  if (eventSource) applyAutoRefresh();
+});
 txLimitInput?.addEventListener("change", () => loadTransactionsFeed());
 
 // init
@@ -820,14 +869,54 @@ async function updateEstimatedFee() {
   }
 }
 
+function connectEvents() {
+  // Pushed updates replace polling; the address filter of the transactions page is applied server side.
+  if (typeof EventSource === "undefined") return false;
+  const address = (txAddressFilter?.value || "").trim();
+  if (eventSource && eventSourceAddress === address) return true;
+  closeEvents();
+  eventSourceAddress = address;
+  eventSource = new EventSource(address ? `/events?address=${encodeURIComponent(address)}` : "/events");
+  eventSource.onopen = () => {
+    eventsConnected = true;
+    setOnlineStatus(true);
+    applyAutoRefresh();
+  };
+  eventSource.onerror = () => {
+    // The browser reconnects on its own; poll meanwhile.
+    eventsConnected = false;
+    setOnlineStatus(false);
+    applyAutoRefresh();
+  };
+  eventSource.addEventListener("tip", () => {
+    loadChain();
+    loadWallet();
+    loadTransactionsFeed();
+  });
+  eventSource.addEventListener("mempool", () => loadTransactionsFeed());
+  eventSource.addEventListener("sync", (event) => {
+    if (statusDot) statusDot.title = JSON.parse(event.data).synced ? "Synced" : "Syncing";
+  });
+  return true;
+}
+
+function closeEvents() {
+  if (eventSource) eventSource.close();
+  eventSource = null;
+  eventsConnected = false;
+}
+
 function applyAutoRefresh() {
   if (refreshTimer) {
     clearInterval(refreshTimer);
     refreshTimer = null;
   }
-  const canAutoRefresh = !!blocksEl;
-  if (!canAutoRefresh) return;
-  if (!refreshIntervalSeconds || refreshIntervalSeconds <= 0) return;
+  const canAutoRefresh = !!blocksEl || !!mempoolList;
+  if (!canAutoRefresh || !refreshIntervalSeconds || refreshIntervalSeconds <= 0) {
+    closeEvents();
+    return;
+  }
+  if (connectEvents() && eventsConnected) return;
   refreshTimer = setInterval(() => {
     loadChain();
     loadWallet();
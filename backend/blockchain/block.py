@@ -1,10 +1,12 @@
 import time
+import json
 from backend.util.crypto_hash import crypto_hash
-from backend.config import MINE_RATE
+from backend.config import MINE_RATE, MAX_BLOCK_BYTES
 from backend.util.hex_to_binary import hex_to_binary
 from backend.economics import get_genesis_block_data
 
 GENESIS_DATA = get_genesis_block_data()
+HEADER_FIELDS = ('timestamp', 'last_hash', 'hash', 'difficulty', 'nonce')
 
 
 class Block:
@@ -36,6 +38,22 @@ class Block:
         """
         return self.__dict__
 
+    def header(self):
+        """
+        Serialize the block without its data, for headers-first sync.
+        """
+        return {field: getattr(self, field) for field in HEADER_FIELDS}
+
+    def size_bytes(self):
+        """
+        Serialized size of the block data, the unit used by the block size limit.
+        """
+        return Block.data_size(self.data)
+
+    @staticmethod
+    def data_size(data):
+        return len(json.dumps(data).encode("utf-8"))
+
     @staticmethod
     def mine_block(last_block, data):
         """
@@ -66,6 +84,13 @@ class Block:
     def from_json(block_json):
         return Block(**block_json)
 
+    @staticmethod
+    def from_header(header_json):
+        """
+        Build a data-less block from a header; only header checks apply to it.
+        """
+        return Block(data=None, **{field: header_json[field] for field in HEADER_FIELDS})
+
     @staticmethod
     def adjust_difficulty(last_block, new_timestamp):
         """
@@ -80,9 +105,11 @@ class Block:
         return 1
 
     @staticmethod
-    def is_valid_block(last_block, block):
+    def is_valid_header(last_block, block):
         """
-        Validate a block.
+        Validate the linkage and claimed difficulty of a block without looking at its data.
+        The hash covers the data, so this does not prove any work was done: only
+        is_valid_block, given the body, can recompute the hash.
         """
         if block.last_hash != last_block.hash:
             raise Exception("The block last_hash must be correct")
@@ -93,6 +120,16 @@ class Block:
         if abs(last_block.difficulty - block.difficulty) > 1:
             raise Exception("The block difficulty must only adjust by 1")
 
+    @staticmethod
+    def is_valid_block(last_block, block):
+        """
+        Validate a block.
+        """
+        Block.is_valid_header(last_block, block)
+
+        if block.size_bytes() > MAX_BLOCK_BYTES:
+            raise Exception("The block exceeds the maximum size")
+
         reconstruction_hash = crypto_hash(
             block.timestamp,
             block.last_hash,
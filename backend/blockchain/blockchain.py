@@ -1,39 +1,342 @@
+import json
+import threading
+from collections import OrderedDict
+
 from backend.blockchain.block import Block
 from backend.wallet.transaction import Transaction
-from backend.config import MINING_REWARD_INPUT, MAX_TXS_PER_BLOCK, HALVING_INTERVAL, SUPPLY_MODEL, STARTING_REWARD
-from backend.wallet.wallet import Wallet
+from backend.config import MINING_REWARD_INPUT, HALVING_INTERVAL, SUPPLY_MODEL, STARTING_REWARD, BLOCK_TEXT_CACHE_BYTES
 from backend.economics import block_reward
 
 
+class ChainSnapshot:
+    """
+    Balances derived from the chain up to a given tip, extended incrementally as blocks arrive.
+    Snapshots are never mutated once built, so readers can hold one without locking.
+    """
+    def __init__(self, height=-1, tip_hash=None, balances=None, transactions=None, block_heights=None, work=0):
+        self.height = height
+        self.tip_hash = tip_hash
+        self.balances = balances or {}
+        # txid -> height of the block that confirmed it
+        self.transactions = transactions or {}
+        # block hash -> height
+        self.block_heights = block_heights or {}
+        self.work = work
+
+    def extend(self, blocks):
+        """
+        Return a new snapshot with the given blocks applied on top of this one.
+        """
+        balances = dict(self.balances)
+        transactions = dict(self.transactions)
+        block_heights = dict(self.block_heights)
+        work = self.work
+        height = self.height
+        for block in blocks:
+            height += 1
+            ChainSnapshot.apply_block(balances, block)
+            for transaction in block.data:
+                transactions[transaction.get("id")] = height
+            block_heights[block.hash] = height
+            work += 2 ** max(0, block.difficulty)
+        return ChainSnapshot(height, blocks[-1].hash, balances, transactions, block_heights, work)
+
+    def balance_of(self, address):
+        return self.balances.get(address, 0)
+
+    @staticmethod
+    def apply_block(balances, block):
+        """
+        Apply a block's transactions with the same rules as Wallet.calculate_balance.
+        """
+        for transaction in block.data:
+            tx_input = transaction.get("input", {})
+            sender = tx_input.get("address")
+            if sender is not None:
+                balances[sender] = balances.get(sender, 0) - tx_input.get("amount", 0)
+            for address, value in (transaction.get("output") or {}).items():
+                balances[address] = balances.get(address, 0) + value
+
+
+class ChainValidator:
+    """
+    Validate blocks one at a time on top of a trusted prefix. Running balances and
+    transaction ids are carried forward, so each block is checked without rescanning history.
+    """
+    def __init__(self, prefix, snapshot=None):
+        self.chain = list(prefix)
+        self.policy = Blockchain._policy_from_genesis(self.chain[0])
+        if snapshot is not None:
+            self.balances = dict(snapshot.balances)
+            self.transaction_heights = dict(snapshot.transactions)
+            self.work = snapshot.work
+        else:
+            self.balances = {}
+            self.transaction_heights = {}
+            self.work = 0
+            for height, block in enumerate(self.chain):
+                self.apply(block, height)
+        if self.policy["start_reward"] is None and len(self.chain) > 1:
+            self.policy["start_reward"] = ChainValidator._infer_start_reward(self.chain[1])
+
+    @property
+    def height(self):
+        return len(self.chain) - 1
+
+    @property
+    def tip(self):
+        return self.chain[-1]
+
+    def add_block(self, block, verify_signatures=True):
+        """
+        Fully validate a block against the current tip and append it. Signatures may be left
+        unchecked only for blocks at or below a trusted checkpoint.
+        """
+        Block.is_valid_block(self.chain[-1], block)
+        self.validate_transactions(block, verify_signatures)
+        self.apply(block, len(self.chain))
+        self.chain.append(block)
+
+    def validate_transactions(self, block, verify_signatures=True):
+        """
+        Check the transactions of the block that would become the next height.
+        """
+        height = len(self.chain)
+        has_mining_reward = False
+        block_fee_total = 0
+        reward_output_values = None
+        in_block_balances = {}
+        in_block_ids = set()
+
+        for transaction_json in block.data:
+            transaction = Transaction.from_json(transaction_json)
+
+            if transaction.id in in_block_ids or self.transaction_heights.get(transaction.id, 0) > 0:
+                raise Exception(f"Transaction: {transaction.id} is not unique")
+
+            in_block_ids.add(transaction.id)
+
+            if transaction.input == MINING_REWARD_INPUT:
+                if has_mining_reward:
+                    raise Exception(
+                        "There can only be one mining reward per block. "
+                        f"Check block with hash: {block.hash}"
+                    )
+                has_mining_reward = True
+                reward_output_values = list(transaction.output.values())
+            elif transaction.input.get("type") == "GENESIS":
+                continue
+            else:
+                sender_address = transaction.input["address"]
+                historic_balance = self.balances.get(sender_address, 0)
+                available_balance = historic_balance + in_block_balances.get(sender_address, 0)
+                if transaction.input["amount"] > available_balance:
+                    raise Exception(f"Transaction {transaction.id} has an invalid input amount")
+
+                block_fee_total += transaction.input.get("fee", 0)
+
+            Transaction.is_valid_transaction(transaction, verify_signatures)
+            # Apply in-block balance deltas so subsequent txs in the same block see updated balances.
+            if transaction.input not in (MINING_REWARD_INPUT, ) and transaction.input.get("type") != "GENESIS":
+                sender_address = transaction.input["address"]
+                spend_amount = transaction.input["amount"]
+                in_block_balances[sender_address] = in_block_balances.get(sender_address, 0) - spend_amount
+                for out_addr, out_value in transaction.output.items():
+                    in_block_balances[out_addr] = in_block_balances.get(out_addr, 0) + out_value
+
+        if not has_mining_reward:
+            raise Exception(f"Missing mining reward at height {height}")
+
+        policy = dict(self.policy)
+        if policy["start_reward"] is None and height == 1:
+            inferred = reward_output_values and sum(reward_output_values) - block_fee_total
+            policy["start_reward"] = inferred if inferred is not None else STARTING_REWARD
+
+        expected_reward = block_reward(
+            height,
+            start_reward=policy["start_reward"] if policy["start_reward"] is not None else STARTING_REWARD,
+            halving_interval=policy["halving_interval"],
+            supply_model=policy["supply_model"],
+        ) + block_fee_total
+        reward_output_total = sum(reward_output_values or [])
+        if reward_output_total != expected_reward:
+            raise Exception(
+                f"Mining reward incorrect at height {height}: "
+                f"expected {expected_reward}, got {reward_output_total}"
+            )
+
+    def apply(self, block, height):
+        """
+        Record a block's effects without validating it.
+        """
+        ChainSnapshot.apply_block(self.balances, block)
+        for transaction in block.data:
+            self.transaction_heights[transaction.get("id")] = height
+        self.work += 2 ** max(0, block.difficulty)
+        if height == 1 and self.policy["start_reward"] is None:
+            self.policy["start_reward"] = ChainValidator._infer_start_reward(block)
+
+    def snapshot(self) -> ChainSnapshot:
+        return ChainSnapshot(
+            self.height,
+            self.tip.hash,
+            dict(self.balances),
+            dict(self.transaction_heights),
+            {block.hash: height for height, block in enumerate(self.chain)},
+            self.work,
+        )
+
+    @staticmethod
+    def _infer_start_reward(block):
+        """
+        Legacy genesis blocks carry no start_reward; derive it from the first block's reward.
+        """
+        reward_total = 0
+        fee_total = 0
+        for transaction in block.data:
+            tx_input = transaction.get("input", {})
+            if tx_input == MINING_REWARD_INPUT:
+                reward_total += sum(transaction.get("output", {}).values())
+            elif tx_input.get("type") != "GENESIS":
+                fee_total += tx_input.get("fee", 0)
+        return (reward_total - fee_total) if reward_total else STARTING_REWARD
+
+
 class Blockchain:
     def __init__(self):
         self.chain = [Block.genesis()]
+        self._snapshot = None
+        # Held by every thread that changes the chain or the mempool built on it.
+        self.lock = threading.RLock()
+        # block hash -> JSON text the block was validated from (or first encoded as), least recently used first
+        self._encoded = OrderedDict()
+        self._encoded_bytes = 0
+        self._encoded_lock = threading.Lock()
+        self.text_cache_bytes = BLOCK_TEXT_CACHE_BYTES
 
     def add_block(self, data):
         self.chain.append(Block.mine_block(self.chain[-1], data))
 
+    def append_block(self, block):
+        """
+        Append a block mined without holding the lock, unless the tip moved in the meantime.
+        """
+        if block.last_hash != self.chain[-1].hash:
+            raise Exception("The chain tip changed while mining")
+        self.chain.append(block)
+
     def __repr__(self):
         return f'Blockchain: {self.chain}'
 
     def replace_chain(self, chain):
         """
         Replace the local chain if the incoming chain is longer and valid.
+        Blocks shared with the local chain are trusted; only the new suffix is validated.
+        """
+        self._check_replacement(chain, Blockchain.compute_work(chain))
+
+        try:
+            if chain[0] != Block.genesis():
+                raise Exception('The genesis block must be valid')
+            validator = self.validator(max(1, self.common_prefix_length(chain)))
+            for block in chain[len(validator.chain):]:
+                validator.add_block(block)
+        except Exception as e:
+            raise Exception(f'Cannot replace. The incoming chain is invalid: {e}')
+
+        self.adopt(validator)
+
+    def adopt(self, validator):
         """
-        incoming_work = Blockchain.compute_work(chain)
-        local_work = Blockchain.compute_work(self.chain)
+        Switch to a chain that has already been validated block by block.
+        """
+        self._check_replacement(validator.chain, validator.work)
+        self.chain = validator.chain[:]
+        self._snapshot = validator.snapshot()
 
+    def _check_replacement(self, chain, incoming_work):
         if len(chain) < len(self.chain):
             raise Exception('Cannot replace. The incoming chain must be longer.')
 
-        if len(chain) == len(self.chain) and incoming_work <= local_work:
+        if len(chain) == len(self.chain) and incoming_work <= self.total_work():
             raise Exception('Cannot replace. Incoming chain has no more work.')
 
-        try:
-            Blockchain.is_valid_chain(chain)
-        except Exception as e:
-            raise Exception(f'Cannot replace. The incoming chain is invalid: {e}')
+    def validator(self, prefix_length=None) -> ChainValidator:
+        """
+        Build a validator positioned after the first `prefix_length` local blocks
+        (the whole chain by default), reusing the tip snapshot when possible.
+        """
+        chain = self.chain
+        if prefix_length is None or prefix_length >= len(chain):
+            snapshot = self.snapshot()
+            return ChainValidator(chain[:snapshot.height + 1], snapshot=snapshot)
+        return ChainValidator(chain[:prefix_length])
 
-        self.chain = chain
+    def common_prefix_length(self, chain) -> int:
+        """
+        Number of leading blocks the given chain shares with the local one.
+        """
+        local = self.chain
+        limit = min(len(chain), len(local))
+        length = 0
+        while length < limit and (chain[length] is local[length] or chain[length] == local[length]):
+            length += 1
+        return length
+
+    def snapshot(self) -> ChainSnapshot:
+        """
+        Return the derived state at the current tip. Appended blocks are applied to the cached
+        snapshot; a replaced prefix (reorg) triggers a rebuild from genesis.
+        """
+        chain = self.chain
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or snapshot.height >= len(chain)
+            or chain[snapshot.height].hash != snapshot.tip_hash
+        ):
+            snapshot = ChainSnapshot().extend(chain)
+        elif snapshot.height < len(chain) - 1:
+            snapshot = snapshot.extend(chain[snapshot.height + 1:])
+        self._snapshot = snapshot
+        return snapshot
+
+    def balance_of(self, address) -> int:
+        return self.snapshot().balance_of(address)
+
+    def height_of(self, block_hash):
+        """
+        Height of the block with the given hash on the local chain, or None.
+        """
+        return self.snapshot().block_heights.get(block_hash)
+
+    def locator(self):
+        """
+        Block hashes from the tip back to genesis: the last ten one by one,
+        then with exponentially growing gaps.
+        """
+        chain = self.chain
+        hashes = []
+        step = 1
+        height = len(chain) - 1
+        while height > 0:
+            hashes.append(chain[height].hash)
+            if len(hashes) >= 10:
+                step *= 2
+            height -= step
+        hashes.append(chain[0].hash)
+        return hashes
+
+    def find_fork(self, locator):
+        """
+        Height of the most recent locator hash we share, or None if even genesis differs.
+        """
+        block_heights = self.snapshot().block_heights
+        for block_hash in locator:
+            height = block_heights.get(block_hash)
+            if height is not None:
+                return height
+        return None
 
     def to_json(self):
         """
@@ -41,11 +344,50 @@ class Blockchain:
         """
         return list(map(lambda block: block.to_json(), self.chain))
 
+    def encoded_block(self, block, cache: bool = True) -> str:
+        """
+        JSON text of a block on the chain: the exact payload it was validated from while it is
+        cached, otherwise a fresh encoding, kept only if `cache` (passes over the whole chain
+        leave it out so they do not evict recent blocks).
+        """
+        with self._encoded_lock:
+            text = self._encoded.get(block.hash)
+            if text is not None:
+                self._encoded.move_to_end(block.hash)
+                return text
+        text = json.dumps(block.to_json())
+        if cache:
+            self.remember_encoding(block, text)
+        return text
+
+    def remember_encoding(self, block, text: str):
+        """
+        Keep the payload a validated block arrived as, so it is served without re-encoding.
+        The least recently used texts are dropped past `text_cache_bytes`.
+        """
+        with self._encoded_lock:
+            previous = self._encoded.pop(block.hash, None)
+            if previous is not None:
+                self._encoded_bytes -= len(previous)
+            self._encoded[block.hash] = text
+            self._encoded_bytes += len(text)
+            while self._encoded_bytes > self.text_cache_bytes and len(self._encoded) > 1:
+                _, evicted = self._encoded.popitem(last=False)
+                self._encoded_bytes -= len(evicted)
+
+    def encoded_chain(self, start: int = 0, end=None, cache: bool = True, chain=None) -> str:
+        """
+        The chain (or the blocks at heights start..end-1) as a JSON array, assembled from the
+        stored block payloads. `chain` is a chain list read earlier, to encode exactly that view.
+        """
+        chain = self.chain if chain is None else chain
+        return "[" + ", ".join(self.encoded_block(block, cache) for block in chain[start:end]) + "]"
+
     def total_work(self) -> int:
         """
         Sum of work across the chain, used for fork choice.
         """
-        return Blockchain.compute_work(self.chain)
+        return self.snapshot().work
 
     @staticmethod
     def from_json(chain_json):
@@ -74,80 +416,11 @@ class Blockchain:
 
     @staticmethod
     def is_valid_transaction_chain(chain):
-        transactions_ids = set()
-        policy = Blockchain._policy_from_genesis(chain[0])
-
-        for i in range(len(chain)):
-            if i == 0:
-                continue
-
-            block = chain[i]
-            has_mining_reward = False
-            block_fee_total = 0
-            reward_output_values = None
-            in_block_balances = {}
-
-            for transaction_json in block.data:
-                transaction = Transaction.from_json(transaction_json)
-
-                if transaction.id in transactions_ids:
-                    raise Exception(f"Transaction: {transaction.id} is not unique")
-
-                transactions_ids.add(transaction.id)
-
-                if transaction.input == MINING_REWARD_INPUT:
-                    if has_mining_reward:
-                        raise Exception(
-                            "There can only be one mining reward per block. "
-                            f"Check block with hash: {block.hash}"
-                        )
-                    has_mining_reward = True
-                    reward_output_values = list(transaction.output.values())
-                elif transaction.input.get("type") == "GENESIS":
-                    continue
-                else:
-                    historic_blockchain = Blockchain()
-                    historic_blockchain.chain = chain[0:i]
-
-                    sender_address = transaction.input["address"]
-                    historic_balance = Wallet.calculate_balance(
-                        historic_blockchain,
-                        sender_address
-                    )
-                    available_balance = historic_balance + in_block_balances.get(sender_address, 0)
-                    if transaction.input["amount"] > available_balance:
-                        raise Exception(f"Transaction {transaction.id} has an invalid input amount")
-
-                    block_fee_total += transaction.input.get("fee", 0)
-
-                Transaction.is_valid_transaction(transaction)
-                # Apply in-block balance deltas so subsequent txs in the same block see updated balances.
-                if transaction.input not in (MINING_REWARD_INPUT, ) and transaction.input.get("type") != "GENESIS":
-                    sender_address = transaction.input["address"]
-                    spend_amount = transaction.input["amount"]
-                    in_block_balances[sender_address] = in_block_balances.get(sender_address, 0) - spend_amount
-                    for out_addr, out_value in transaction.output.items():
-                        in_block_balances[out_addr] = in_block_balances.get(out_addr, 0) + out_value
-
-            if not has_mining_reward:
-                raise Exception(f"Missing mining reward at height {i}")
-
-            if policy["start_reward"] is None and has_mining_reward and i == 1:
-                inferred = reward_output_values and sum(reward_output_values) - block_fee_total
-                policy["start_reward"] = inferred if inferred is not None else STARTING_REWARD
-
-            expected_reward = block_reward(
-                i,
-                start_reward=policy["start_reward"] if policy["start_reward"] is not None else STARTING_REWARD,
-                halving_interval=policy["halving_interval"],
-                supply_model=policy["supply_model"],
-            ) + block_fee_total
-            reward_output_total = sum(reward_output_values or [])
-            if reward_output_total != expected_reward:
-                raise Exception(
-                    f"Mining reward incorrect at height {i}: "
-                    f"expected {expected_reward}, got {reward_output_total}"
-                )
+        validator = ChainValidator(chain[:1])
+        for height in range(1, len(chain)):
+            validator.validate_transactions(chain[height])
+            validator.apply(chain[height], height)
+            validator.chain.append(chain[height])
 
     @staticmethod
     def compute_work(chain) -> int:
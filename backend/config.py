@@ -8,7 +8,67 @@ MINE_RATE = 15 * SECONDS
 # P2P defaults
 P2P_HOST = "0.0.0.0"
 P2P_PORT = 6000
-P2P_SYNC_INTERVAL_SECONDS = 10
+P2P_SYNC_INTERVAL_SECONDS = 10  # how often our tip is re-announced when it changed
+P2P_MAX_HEADERS_PER_MESSAGE = 2000
+P2P_DOWNLOAD_RANGE_BLOCKS = 200  # body download is split into height ranges of this size, one per peer
+P2P_DOWNLOAD_WINDOW_BLOCKS = 2000  # never schedule ranges further than this past the connect point
+P2P_DOWNLOAD_STALL_SECONDS = 10  # reassign a range whose peer sent nothing for this long
+P2P_SYNC_TIMEOUT_SECONDS = 30  # abandon a sync whose peer stops answering
+P2P_SEGMENT_CHUNK_BLOCKS = 50  # CHAIN_SEGMENT responses are streamed in chunks of at most this many blocks
+P2P_SEGMENT_CHUNK_BYTES = 256 * 1024  # ...and roughly this many bytes (a single larger block goes alone)
+P2P_SEGMENT_WINDOW = 4  # unacknowledged chunks in flight per stream
+P2P_MAX_MESSAGE_BYTES = 4 * 1024 * 1024  # websocket frame limit; must fit one max-size block
+P2P_SEEN_CACHE_SIZE = 50_000  # recently processed tx/block hashes, to drop duplicates and relay loops
+P2P_PEER_KNOWN_INVENTORY = 10_000  # hashes remembered per peer so we never announce them back
+P2P_MAX_INV_ITEMS = 1000  # items per INV/GET_DATA message
+P2P_GETDATA_TIMEOUT_SECONDS = 5  # re-request an announced object from another peer after this long
+P2P_MAX_PENDING_COMPACT_BLOCKS = 8  # compact blocks waiting for missing transactions
+P2P_MAX_ORPHAN_BLOCKS = 100  # relayed blocks held while their missing parent is fetched
+P2P_ORPHAN_MAX_DEPTH = 16  # missing ancestors fetched one by one before switching to a headers sync
+P2P_ORPHAN_EXPIRY_SECONDS = 600  # drop orphans whose parent never arrived
+P2P_OUTBOUND_QUEUE_DEPTH = 1000  # messages queued per peer before low-priority ones are dropped
+P2P_OUTBOUND_MAX_LAG_SECONDS = 20  # disconnect a peer whose oldest queued message waited this long
+P2P_COMPRESSION_MIN_BYTES = 1024  # messages smaller than this are sent as plain text frames
+P2P_COMPRESSION_LEVEL = 6  # zlib level for compressed binary frames
+P2P_TARGET_OUTBOUND = 8  # outbound connections kept open
+P2P_MAX_INBOUND = 24  # inbound connections accepted; beyond this the worst-scored inbound peer is evicted
+P2P_ADDRESS_BUCKETS = 64  # address book buckets, chosen by keyed hash of the address's network
+P2P_ADDRESS_BUCKET_SIZE = 16  # addresses per bucket; a full bucket evicts its worst entry
+P2P_ADDRESS_SOURCE_BUCKETS = 8  # buckets that addresses gossiped from one network may occupy
+P2P_MAX_PEERS_SHARED = 100  # addresses sent in one PEERS message
+P2P_MAX_DIAL_FAILURES = 6  # forget a non-seed address after this many consecutive failed dials
+P2P_PING_INTERVAL_SECONDS = 10  # PING cadence for RTT scoring; outbound slots are refilled and the address book saved on the same tick
+P2P_PEER_MAX_INVALID_EVENTS = 3  # disconnect a peer after this many invalid messages
+P2P_MEMPOOL_SYNC_MAX_TXS = 50_000  # most mempool entries summarized in one reconciliation sketch
+P2P_MEMPOOL_SKETCH_BITS_PER_TX = 10  # Bloom filter bits per summarized transaction (~1% false positives)
+P2P_MEMPOOL_SKETCH_HASHES = 7  # hash functions per Bloom filter entry
+P2P_MEMPOOL_SYNC_BATCH = 500  # transactions per MEMPOOL_TXS message
+# Per-peer token buckets per message type, in cost units (one stored block served = 1) per second
+# and burst size. Types not listed (responses to our own requests) are not metered.
+P2P_MESSAGE_BUDGETS = {
+    "HELLO": (1, 60),
+    "PEERS": (1, 50),
+    "PING": (2, 20),
+    "PONG": (2, 20),
+    "TIP": (5, 50),
+    "INV": (200, 2_000),
+    "GET_DATA": (500, 5_000),
+    "GET_HEADERS": (20, 400),
+    "GET_BLOCK_TXN": (20, 200),
+    "REQUEST_CHAIN": (1_000, 50_000),
+    "TRANSACTION": (1_000, 20_000),
+    "MEMPOOL_SKETCH": (1, 60),
+    "MEMPOOL_TXS": (2_000, 500_000),
+    "BLOCK": (100, 2_000),
+    "CMPCT_BLOCK": (100, 2_000),
+}
+P2P_BUDGET_STRIKES = (0.2, 50)  # over-budget messages forgiven per second and in a burst before disconnecting
+
+# Bootstrap files (backend/p2p/bootstrap.py)
+# Known-good blocks, height -> hash. Imported blocks must match them, and blocks at or below
+# the highest one are imported without re-checking transaction signatures.
+CHECKPOINTS = {}
+BOOTSTRAP_ADOPT_BLOCKS = 1000  # past the last checkpoint, imported blocks become the node's chain in steps of this many
 
 # Coin denomination
 COIN_NAME = "PYTH"
@@ -41,12 +101,63 @@ FEE_CONGESTION_TARGET_TXS = 5000  # mempool size where fee doubles
 FEE_MAX_MULTIPLIER = 8  # cap for congestion multiplier
 MIN_ABSOLUTE_FEE = 10_000  # ~0.0001 COIN absolute floor to deter spam
 TX_SIZE_INPUT_OVERHEAD = 100  # rough bytes overhead for inputs/metadata
-MAX_TXS_PER_BLOCK = 500
+
+# Historical fee estimation (confirmation delay by fee-rate bucket)
+FEE_ESTIMATE_MAX_TARGET = 25  # longest confirmation target tracked, in blocks
+FEE_ESTIMATE_HISTORY_BLOCKS = 200  # confirmations older than this are forgotten
+FEE_ESTIMATE_SUCCESS_RATE = 0.85  # share of txs that must confirm within the target
+FEE_ESTIMATE_MIN_SAMPLES = 5  # samples needed before a bucket is trusted
+FEE_ESTIMATE_DEFAULT_TARGET = 3
+
+# Block size policy: blocks are limited by serialized size, not transaction count.
+MAX_BLOCK_BYTES = 1_000_000  # max JSON-encoded size of a block's data
+BLOCK_RESERVED_BYTES = 1_000  # room kept for the mining reward tx and list framing
+BLOCK_TEXT_CACHE_BYTES = 32 * 1024 * 1024  # JSON text of recently used blocks kept for relays and responses (LRU)
 
 # Miner control
 AUTO_MINE_ENABLED = True
 MINER_ADDRESS_OVERRIDE = None  # if set, reward transactions go here
 MINER_NAME = "Miner"
 
+# HTTP API server
+API_HOST = "127.0.0.1"
+API_SERVER = "asyncio"  # "asyncio" front end, or "flask" for the Flask development server
+API_ASYNC_ON_P2P_LOOP = False  # serve HTTP on P2PNode.loop instead of a loop of its own
+API_ASYNC_MAX_CONNECTIONS = 10_000  # open client connections; more are answered 503 and closed
+API_ASYNC_WORKERS = 16  # threads running route handlers: requests executing at once, the rest wait on the loop
+API_ASYNC_KEEPALIVE_SECONDS = 75  # idle keep-alive connections are closed after this long
+API_ASYNC_REQUEST_TIMEOUT_SECONDS = 30  # time allowed to send the rest of a started request
+API_ASYNC_MAX_HEADER_BYTES = 64 * 1024
+API_ASYNC_MAX_BODY_BYTES = 16 * 1024 * 1024  # fits a bulk query of API_BULK_MAX_ITEMS ids
+
 # UI/refresh
 AUTO_REFRESH_SECONDS = 1  # 0 disables auto refresh
+API_BLOCKS_PAGE_LIMIT = 100  # blocks returned by /blocks when no limit is given
+API_BLOCKS_MAX_PAGE_LIMIT = 500  # largest page /blocks serves
+API_BULK_MAX_ITEMS = 50_000  # addresses or txids accepted by one bulk query
+EXPORT_CHUNK_BYTES = 64 * 1024  # /export writes NDJSON lines in chunks of about this size
+
+# Server-sent events (/events)
+EVENTS_POLL_SECONDS = 0.25  # how often chain and mempool changes are collected while anyone is subscribed
+EVENTS_KEEPALIVE_SECONDS = 15  # idle subscribers get a comment line this often, which also detects closed connections
+EVENTS_SUBSCRIBER_QUEUE = 256  # events buffered per subscriber; a subscriber that falls further behind is dropped
+EVENTS_MAX_SUBSCRIBERS = 1000
+
+# Response cache and compression
+API_CACHE_MAX_ENTRIES = 256  # encoded responses kept, keyed by request and tip hash / mempool version
+API_CACHE_MAX_BYTES = 64 * 1024 * 1024  # ...and their total size including gzip variants
+API_COMPRESSION_MIN_BYTES = 1024  # smaller bodies are not gzipped
+API_COMPRESSION_LEVEL = 6
+API_STATIC_MAX_AGE_SECONDS = 365 * 24 * 3600  # static URLs carry a content hash, so they can be cached for long
+
+# Confirmation webhooks (/webhooks)
+WEBHOOK_POLL_SECONDS = 1  # how often thresholds are re-evaluated (only when the tip changed) and due callbacks sent
+WEBHOOK_BATCH_MAX = 500  # events per callback request
+WEBHOOK_TIMEOUT_SECONDS = 5
+WEBHOOK_RETRY_BASE_SECONDS = 2  # first retry delay, doubled per failed attempt...
+WEBHOOK_RETRY_MAX_SECONDS = 600  # ...up to this
+WEBHOOK_MAX_ATTEMPTS = 10  # a batch still failing after this many attempts is dropped
+WEBHOOK_MAX_PENDING_EVENTS = 10_000  # undelivered events kept per URL; the oldest are dropped first
+WEBHOOK_FINALITY_BLOCKS = 100  # reorgs are watched this deep past the threshold, then the transaction is forgotten
+WEBHOOK_MAX_REGISTRATIONS = 100_000
+WEBHOOK_MAX_CONFIRMATIONS = 1000
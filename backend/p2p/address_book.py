@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import random
+import time
+
+from backend.config import (
+    P2P_ADDRESS_BUCKETS,
+    P2P_ADDRESS_BUCKET_SIZE,
+    P2P_ADDRESS_SOURCE_BUCKETS,
+    P2P_MAX_DIAL_FAILURES,
+)
+
+
+def address_group(address: str) -> str:
+    """
+    Network an address belongs to: the /16 for IPv4, the /32 for IPv6, otherwise the host name.
+    Addresses in one group are treated as one operator when spreading buckets and dials.
+    """
+    host = address.rsplit(":", 1)[0].strip("[]")
+    octets = host.split(".")
+    if len(octets) == 4 and all(octet.isdigit() for octet in octets):
+        return ".".join(octets[:2])
+    if ":" in host:
+        return ":".join(host.split(":")[:2])
+    return host
+
+
+class AddressInfo:
+    """
+    What we know about one dialable address.
+    """
+    def __init__(self, address: str, source=None, last_seen=None, last_success=0.0,
+                 attempts=0, successes=0, failures=0, next_dial=0.0):
+        self.address = address
+        self.source = source
+        self.last_seen = time.time() if last_seen is None else last_seen
+        self.last_success = last_success
+        self.attempts = attempts
+        self.successes = successes
+        self.failures = failures
+        self.next_dial = next_dial
+
+    @property
+    def tried(self) -> bool:
+        return self.successes > 0
+
+    def to_json(self):
+        return {
+            "address": self.address,
+            "source": self.source,
+            "last_seen": self.last_seen,
+            "last_success": self.last_success,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+    @staticmethod
+    def from_json(info_json):
+        return AddressInfo(
+            info_json["address"],
+            source=info_json.get("source"),
+            last_seen=info_json.get("last_seen", 0.0),
+            last_success=info_json.get("last_success", 0.0),
+            attempts=info_json.get("attempts", 0),
+            successes=info_json.get("successes", 0),
+            failures=info_json.get("failures", 0),
+        )
+
+
+class AddressBook:
+    """
+    Bounded, persistent set of dialable peer addresses with last-seen and dial statistics.
+
+    Addresses live in fixed-size buckets picked by a keyed hash, so an attacker cannot choose
+    where its addresses land. Untried addresses are bucketed by the network that told us about
+    them and may only use `source_buckets` buckets per source network; addresses we have
+    connected to are bucketed by their own network. A full bucket evicts its worst entry, and
+    untried addresses never evict tried ones. Seeds are kept outside the buckets and never
+    forgotten.
+    """
+    def __init__(self, seeds=(), buckets: int = P2P_ADDRESS_BUCKETS, bucket_size: int = P2P_ADDRESS_BUCKET_SIZE,
+                 source_buckets: int = P2P_ADDRESS_SOURCE_BUCKETS, max_failures: int = P2P_MAX_DIAL_FAILURES,
+                 secret=None):
+        self.buckets = buckets
+        self.bucket_size = bucket_size
+        self.source_buckets = source_buckets
+        self.max_failures = max_failures
+        self.secret = secret or os.urandom(16).hex()
+        self.seeds = set(seeds)
+        self._entries = {seed: AddressInfo(seed) for seed in self.seeds}
+        self._bucketed = {}
+        self.changed = False
+
+    def _hash(self, *parts) -> int:
+        text = "|".join([self.secret, *map(str, parts)])
+        return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+
+    def _bucket_of(self, info: AddressInfo) -> int:
+        group = address_group(info.address)
+        if info.tried:
+            return self._hash("tried", group) % self.buckets
+        source_group = address_group(info.source) if info.source else group
+        slot = self._hash("slot", group) % self.source_buckets
+        return self._hash("new", source_group, slot) % self.buckets
+
+    def _place(self, info: AddressInfo) -> bool:
+        """
+        Put an entry in its bucket, evicting the bucket's worst entry if needed.
+        """
+        bucket_index = self._bucket_of(info)
+        bucket = self._bucketed.setdefault(bucket_index, set())
+        if len(bucket) >= self.bucket_size:
+            evictable = [self._entries[address] for address in bucket if info.tried or not self._entries[address].tried]
+            if not evictable:
+                return False
+            worst = min(evictable, key=lambda entry: (entry.tried, -entry.failures, entry.last_success, entry.last_seen))
+            self._remove(worst.address)
+        bucket.add(info.address)
+        self._entries[info.address] = info
+        return True
+
+    def _remove(self, address: str):
+        if address in self.seeds or address not in self._entries:
+            return
+        info = self._entries.pop(address)
+        self._bucketed.get(self._bucket_of(info), set()).discard(address)
+        self.changed = True
+
+    def learn(self, address: str, source=None) -> bool:
+        """
+        Remember an address heard from `source`. Gossip never refreshes a known entry, so
+        re-announcing an address cannot make it look recently good.
+        """
+        if address in self._entries:
+            return False
+        added = self._place(AddressInfo(address, source=source))
+        self.changed = self.changed or added
+        return added
+
+    def attempted(self, address: str):
+        info = self._entries.get(address)
+        if info is not None:
+            info.attempts += 1
+
+    def succeeded(self, address: str):
+        info = self._entries.get(address)
+        # A first success moves the address from its source's buckets into the tried ones.
+        promote = info is None or (not info.tried and address not in self.seeds)
+        if info is None:
+            info = AddressInfo(address)
+        elif promote:
+            self._remove(address)
+        now = time.time()
+        info.last_seen = info.last_success = now
+        info.successes += 1
+        info.failures = 0
+        info.next_dial = 0.0
+        if promote:
+            self._place(info)
+        self.changed = True
+
+    def failed(self, address: str) -> int:
+        """
+        Record a failed dial and back off exponentially. Returns the consecutive failure count.
+        """
+        info = self._entries.get(address)
+        if info is None:
+            return 0
+        info.failures += 1
+        info.next_dial = time.time() + min(30, 2 ** min(info.failures, 5))
+        if info.failures >= self.max_failures and address not in self.seeds:
+            self._remove(address)
+        self.changed = True
+        return info.failures
+
+    def candidates(self, exclude=()):
+        """
+        Addresses that may be dialed now: recently good ones first, spread over as many networks
+        as possible before a second address from the same network is picked.
+        """
+        now = time.time()
+        ready = sorted(
+            (info for address, info in self._entries.items() if info.next_dial <= now and address not in exclude),
+            key=lambda info: (not info.tried, info.failures, -info.last_success, random.random()),
+        )
+        first, rest, groups = [], [], set()
+        for info in ready:
+            group = address_group(info.address)
+            (rest if group in groups else first).append(info.address)
+            groups.add(group)
+        return first + rest
+
+    def sample(self, count: int):
+        """
+        Addresses to share with a peer, preferring ones we have connected to.
+        """
+        tried = [address for address, info in self._entries.items() if info.tried]
+        untried = [address for address, info in self._entries.items() if not info.tried]
+        picked = random.sample(tried, min(count, len(tried)))
+        return picked + random.sample(untried, min(count - len(picked), len(untried)))
+
+    def __contains__(self, address) -> bool:
+        return address in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_json(self):
+        return {
+            "secret": self.secret,
+            "addresses": [info.to_json() for address, info in self._entries.items() if address not in self.seeds],
+        }
+
+    def save(self, path: str):
+        """
+        Write the book atomically so a crash never leaves a truncated file behind.
+        """
+        text = json.dumps(self.to_json())
+        self.changed = False
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as book_file:
+            book_file.write(text)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path: str, seeds=()):
+        """
+        Book stored at `path`, or an empty one if the file is missing or unreadable.
+        """
+        try:
+            with open(path) as book_file:
+                book_json = json.load(book_file)
+            book = AddressBook(seeds, secret=book_json.get("secret"))
+            for info_json in book_json.get("addresses", []):
+                info = AddressInfo.from_json(info_json)
+                if info.address not in book:
+                    book._place(info)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return AddressBook(seeds)
+        return book
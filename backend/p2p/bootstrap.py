@@ -0,0 +1,133 @@
+import gzip
+import json
+import time
+
+from backend.blockchain.block import Block
+from backend.p2p.codec import parse_message, splice_payload
+from backend.config import CHECKPOINTS, BOOTSTRAP_ADOPT_BLOCKS
+
+
+# A bootstrap file is UTF-8 text (gzip-compressed when its name ends in .gz): one header line,
+# then one `{"height": h, "block": {...}}` line per block from genesis, the same lines
+# /export?kind=blocks streams.
+BOOTSTRAP_FORMAT = "pyth-bootstrap"
+BOOTSTRAP_VERSION = 1
+
+
+class BootstrapError(Exception):
+    pass
+
+
+def open_bootstrap(path: str, mode: str = "r", compressed=None):
+    if compressed if compressed is not None else path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def bootstrap_header(height: int, tip_hash: str) -> str:
+    return json.dumps({"format": BOOTSTRAP_FORMAT, "version": BOOTSTRAP_VERSION, "height": height, "tip": tip_hash}) + "\n"
+
+
+def write_bootstrap(blockchain, out, chain=None) -> int:
+    """
+    Write `chain` (the blockchain's current chain by default) as a bootstrap file to `out`,
+    reusing each block's stored JSON text. Returns the number of blocks written.
+    """
+    chain = blockchain.chain if chain is None else chain
+    out.write(bootstrap_header(len(chain) - 1, chain[-1].hash))
+    for height, block in enumerate(chain):
+        out.write(splice_payload({"height": height}, "block", blockchain.encoded_block(block, cache=False)) + "\n")
+    return len(chain)
+
+
+def read_bootstrap(lines):
+    """
+    Header of a bootstrap file, then (height, block, block JSON text) for each block line.
+    """
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError):
+        raise BootstrapError("Missing bootstrap header")
+    if not isinstance(header, dict) or header.get("format") != BOOTSTRAP_FORMAT:
+        raise BootstrapError("Not a bootstrap file")
+    if header.get("version") != BOOTSTRAP_VERSION:
+        raise BootstrapError(f"Unsupported bootstrap version {header.get('version')}")
+    yield header
+
+    expected = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            message, raw = parse_message(line)
+            block = Block.from_json(message["block"])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise BootstrapError(f"Malformed block line at height {expected}: {exc}")
+        if message.get("height") != expected:
+            raise BootstrapError(f"Expected height {expected}, found {message.get('height')}")
+        yield expected, block, raw
+        expected += 1
+
+
+def import_bootstrap(blockchain, path: str, checkpoints=None, adopt_every: int = BOOTSTRAP_ADOPT_BLOCKS,
+                     progress=None):
+    """
+    Stream-validate the blocks of a bootstrap file on top of the local chain and adopt them.
+
+    Blocks the local chain already has are skipped; the rest go through ChainValidator one
+    at a time, so no history is rescanned. Each must match any checkpoint at its height, and
+    blocks at or below the highest checkpoint skip signature checks. Those blocks become the
+    node's chain only once a checkpoint confirms them, later ones every `adopt_every` blocks.
+    A file that stops short of its last checkpoint leaves the unconfirmed tail out; an invalid
+    block keeps the valid blocks before it.
+    `progress(height)` is called after each adoption.
+    """
+    checkpoints = CHECKPOINTS if checkpoints is None else checkpoints
+    last_checkpoint = max(checkpoints, default=-1)
+    started = time.time()
+    stats = {"imported": 0, "skipped": 0, "unverified_signatures": 0, "height": None, "seconds": 0.0}
+    validator = None
+    pending = []
+
+    def adopt():
+        if validator.work > blockchain.total_work():
+            blockchain.adopt(validator)
+            for block, raw in pending:
+                blockchain.remember_encoding(block, raw)
+            stats["imported"] += len(pending)
+        pending.clear()
+        if progress:
+            progress(validator.height)
+
+    try:
+        with open_bootstrap(path) as bootstrap_file:
+            blocks = read_bootstrap(bootstrap_file)
+            next(blocks)
+            for height, block, raw in blocks:
+                expected_hash = checkpoints.get(height)
+                if expected_hash is not None and block.hash != expected_hash:
+                    raise BootstrapError(f"Block {block.hash[:12]} at height {height} does not match the checkpoint")
+                if validator is None:
+                    local = blockchain.chain
+                    if height < len(local) and local[height].hash == block.hash:
+                        stats["skipped"] += 1
+                        continue
+                    if height == 0:
+                        raise BootstrapError("The bootstrap file has a different genesis block")
+                    validator = blockchain.validator(height)
+                try:
+                    validator.add_block(block, verify_signatures=height > last_checkpoint)
+                except Exception as exc:
+                    raise BootstrapError(f"Invalid block at height {height}: {exc}")
+                pending.append((block, raw))
+                if height <= last_checkpoint:
+                    stats["unverified_signatures"] += 1
+                if expected_hash is not None or (height > last_checkpoint and len(pending) >= adopt_every):
+                    adopt()
+    finally:
+        if validator is not None and validator.height > last_checkpoint and pending:
+            adopt()
+    stats["height"] = len(blockchain.chain) - 1
+    stats["seconds"] = round(time.time() - started, 3)
+    return stats
@@ -0,0 +1,131 @@
+import time
+
+from backend.config import P2P_MESSAGE_BUDGETS, P2P_BUDGET_STRIKES
+
+
+# Cost of handling one message: a fixed part plus a part per block, item or transaction it
+# makes us serve or validate. One unit is roughly serving one stored block.
+MESSAGE_COSTS = {
+    "HELLO": (20, 0),
+    "PEERS": (5, 0),
+    "PING": (1, 0),
+    "PONG": (1, 0),
+    "TIP": (1, 0),
+    "INV": (1, 0.1),
+    "GET_DATA": (1, 1),
+    "GET_HEADERS": (20, 0),
+    "GET_BLOCK_TXN": (2, 0.1),
+    "REQUEST_CHAIN": (1, 1),
+    "TRANSACTION": (10, 0),
+    "MEMPOOL_SKETCH": (20, 0),
+    "MEMPOOL_TXS": (1, 10),
+    "BLOCK": (20, 0),
+    "CMPCT_BLOCK": (20, 0),
+}
+
+
+def _count(value) -> int:
+    return len(value) if isinstance(value, (list, str)) else 0
+
+
+def message_cost(msg_type, message: dict, chain_length: int) -> float:
+    """
+    Cost units of a message. A REQUEST_CHAIN is charged per block it asks us to stream, using
+    the same clamping the segment stream applies, so asking for the whole chain costs the
+    whole chain.
+    """
+    if not isinstance(msg_type, str) or msg_type not in MESSAGE_COSTS or not isinstance(message, dict):
+        return 0
+    base, per_item = MESSAGE_COSTS[msg_type]
+    if msg_type == "REQUEST_CHAIN":
+        start, end = message.get("start", 0), message.get("end")
+        if not isinstance(start, int) or start < 0 or start > chain_length:
+            start = 0
+        end = chain_length if not isinstance(end, int) else max(start, min(end, chain_length))
+        items = end - start
+    elif msg_type in ("INV", "GET_DATA"):
+        items = _count(message.get("items"))
+    elif msg_type == "GET_BLOCK_TXN":
+        items = _count(message.get("indexes"))
+    elif msg_type == "MEMPOOL_TXS":
+        items = _count(message.get("transactions"))
+    else:
+        items = 0
+    return base + per_item * items
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`.
+    """
+    def __init__(self, rate: float, burst: float, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now=None):
+        now = time.monotonic() if now is None else now
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def take(self, cost: float, now=None) -> bool:
+        self._refill(now)
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+
+    def level(self, now=None) -> float:
+        """
+        Fraction of the burst currently available.
+        """
+        self._refill(now)
+        return self.tokens / self.burst if self.burst else 1.0
+
+
+class MessageBudget:
+    """
+    One peer's token buckets, one per metered message type. Messages over budget are dropped
+    and each drop uses up a strike; strikes refill slowly, so only a sustained flood runs
+    them out and gets the peer disconnected.
+    """
+    def __init__(self, budgets=None, strikes=P2P_BUDGET_STRIKES):
+        self.budgets = P2P_MESSAGE_BUDGETS if budgets is None else budgets
+        self.buckets = {}
+        self.strikes = TokenBucket(*strikes)
+        self.charged = 0.0
+        self.dropped = {}
+
+    def admit(self, msg_type, cost: float, now=None) -> bool:
+        """
+        Charge a message to its type's bucket. Returns False if it should be dropped.
+        """
+        if cost <= 0 or msg_type not in self.budgets:
+            return True
+        bucket = self.buckets.get(msg_type)
+        if bucket is None:
+            bucket = self.buckets[msg_type] = TokenBucket(*self.budgets[msg_type], now=now)
+        if bucket.take(cost, now):
+            self.charged += cost
+            return True
+        self.dropped[msg_type] = self.dropped.get(msg_type, 0) + 1
+        self.strikes.take(1, now)
+        return False
+
+    def pressure(self, now=None) -> float:
+        """
+        0 for a well-behaved peer, rising to 1 as its strikes run out.
+        """
+        return 1.0 - self.strikes.level(now)
+
+    def exhausted(self, now=None) -> bool:
+        return self.strikes.level(now) * self.strikes.burst < 1
+
+    def to_json(self):
+        return {
+            "charged": round(self.charged, 1),
+            "dropped": dict(self.dropped),
+            "pressure": round(self.pressure(), 3),
+        }
@@ -0,0 +1,167 @@
+import json
+import zlib
+
+from backend.config import P2P_COMPRESSION_LEVEL, P2P_MAX_MESSAGE_BYTES
+
+
+# Binary frames start with one codec byte; text frames are always plain JSON.
+CODEC_ZLIB = 1
+CODECS = {"zlib": CODEC_ZLIB}
+SUPPORTED_COMPRESSION = tuple(CODECS)
+
+
+# Members whose JSON text is kept verbatim when they come last in a message.
+PAYLOAD_KEYS = ("blocks", "block", "transactions", "transaction")
+_decoder = json.JSONDecoder()
+
+
+def parse_message(text: str):
+    """
+    Parse a message. When its last member is a known payload, the payload is decoded in place
+    and its exact source text is returned too (a list of texts for an array), so validated
+    objects can be relayed without encoding them again. Otherwise the raw payload is None.
+    """
+    for key in PAYLOAD_KEYS:
+        marker = f', "{key}": '
+        index = text.find(marker)
+        if index < 0:
+            continue
+        try:
+            envelope = json.loads(text[:index] + "}")
+            value, raw = _decode_payload(text, index + len(marker))
+        except ValueError:
+            break
+        if not isinstance(envelope, dict) or key in envelope:
+            break
+        envelope[key] = value
+        return envelope, raw
+    return json.loads(text), None
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position] in " \t\n\r":
+        position += 1
+    return position
+
+
+def _decode_payload(text: str, position: int):
+    if text.startswith("[", position):
+        values, raws = [], []
+        position = _skip_whitespace(text, position + 1)
+        if text.startswith("]", position):
+            end = position + 1
+        else:
+            while True:
+                value, end = _decoder.raw_decode(text, position)
+                values.append(value)
+                raws.append(text[position:end])
+                position = _skip_whitespace(text, end)
+                if text.startswith(",", position):
+                    position = _skip_whitespace(text, position + 1)
+                    continue
+                if text.startswith("]", position):
+                    end = position + 1
+                    break
+                raise ValueError("Malformed payload array")
+        result = (values, raws)
+    else:
+        value, end = _decoder.raw_decode(text, position)
+        result = (value, text[position:end])
+    if text[end:].strip() != "}":
+        raise ValueError("The payload must be the last member of the message")
+    return result
+
+
+def splice_payload(envelope: dict, key: str, raw: str) -> str:
+    """
+    Message text with an already-encoded payload appended as its last member.
+    """
+    return json.dumps(envelope)[:-1] + f', "{key}": ' + raw + "}"
+
+
+def negotiate_compression(offered):
+    """
+    First codec we support from the list a peer offered in its HELLO, or None.
+    """
+    if not isinstance(offered, list):
+        return None
+    for name in offered:
+        if name in CODECS:
+            return name
+    return None
+
+
+def encode_frame(text: str, compression: str) -> bytes:
+    return bytes([CODECS[compression]]) + zlib.compress(text.encode("utf-8"), P2P_COMPRESSION_LEVEL)
+
+
+def decode_frame(frame, max_bytes: int = P2P_MAX_MESSAGE_BYTES) -> str:
+    """
+    Text of a received frame. Compressed frames are inflated up to `max_bytes`.
+    """
+    if isinstance(frame, str):
+        return frame
+    if not frame or frame[0] != CODEC_ZLIB:
+        raise ValueError("Unknown frame codec")
+    inflater = zlib.decompressobj()
+    try:
+        data = inflater.decompress(frame[1:], max_bytes)
+    except zlib.error as exc:
+        raise ValueError(f"Corrupt compressed frame: {exc}")
+    if inflater.unconsumed_tail:
+        raise ValueError("Compressed frame exceeds the message size limit")
+    return data.decode("utf-8")
+
+
+class MessageTraffic:
+    """
+    Bytes and codec CPU time for one message type, in one direction.
+    """
+    def __init__(self):
+        self.messages = 0
+        self.compressed = 0
+        self.payload_bytes = 0
+        self.wire_bytes = 0
+        self.codec_seconds = 0.0
+
+    def record(self, payload_bytes: int, wire_bytes: int, codec_seconds: float, compressed: bool):
+        self.messages += 1
+        self.compressed += int(compressed)
+        self.payload_bytes += payload_bytes
+        self.wire_bytes += wire_bytes
+        self.codec_seconds += codec_seconds
+
+    def to_json(self):
+        return {
+            "messages": self.messages,
+            "compressed": self.compressed,
+            "payload_bytes": self.payload_bytes,
+            "wire_bytes": self.wire_bytes,
+            "ratio": round(self.wire_bytes / self.payload_bytes, 3) if self.payload_bytes else 1.0,
+            "codec_ms": round(1000 * self.codec_seconds, 3),
+        }
+
+
+class TrafficStats:
+    def __init__(self):
+        self.sent = {}
+        self.received = {}
+
+    def record_sent(self, msg_type, payload_bytes, wire_bytes, codec_seconds, compressed):
+        self._traffic(self.sent, msg_type).record(payload_bytes, wire_bytes, codec_seconds, compressed)
+
+    def record_received(self, msg_type, payload_bytes, wire_bytes, codec_seconds, compressed):
+        self._traffic(self.received, msg_type).record(payload_bytes, wire_bytes, codec_seconds, compressed)
+
+    @staticmethod
+    def _traffic(table, msg_type):
+        key = msg_type if isinstance(msg_type, str) else "UNKNOWN"
+        if key not in table:
+            table[key] = MessageTraffic()
+        return table[key]
+
+    def to_json(self):
+        return {
+            "sent": {msg_type: traffic.to_json() for msg_type, traffic in sorted(self.sent.items())},
+            "received": {msg_type: traffic.to_json() for msg_type, traffic in sorted(self.received.items())},
+        }
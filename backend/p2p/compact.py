@@ -0,0 +1,85 @@
+from backend.blockchain.block import Block
+from backend.config import MINING_REWARD_INPUT
+from backend.util.crypto_hash import crypto_hash
+
+
+def compact_block_fields(block: Block) -> dict:
+    """
+    Describe a block as its header plus the ids of its transactions. Transactions a peer
+    cannot have in its mempool (the mining reward, anything without an id) are prefilled.
+    """
+    short_ids = []
+    prefilled = []
+    for index, tx_json in enumerate(block.data):
+        if isinstance(tx_json, dict) and tx_json.get("id") and tx_json.get("input") != MINING_REWARD_INPUT:
+            short_ids.append(tx_json["id"])
+        else:
+            prefilled.append({"index": index, "tx": tx_json})
+    return {
+        "header": block.header(),
+        "tx_count": len(block.data),
+        "short_ids": short_ids,
+        "prefilled": prefilled,
+    }
+
+
+class PartialBlock:
+    """
+    A compact block being rebuilt from the local mempool, tracking which slots are still missing.
+    """
+    def __init__(self, header: Block, tx_count: int, short_ids, prefilled):
+        if not isinstance(tx_count, int) or tx_count < 0:
+            raise Exception("Invalid compact block transaction count")
+        if not isinstance(header.hash, str):
+            raise Exception("Invalid compact block hash")
+        if not isinstance(short_ids, list) or not all(isinstance(short_id, str) for short_id in short_ids):
+            raise Exception("Compact block short ids must be strings")
+        if not isinstance(prefilled, list) or not all(isinstance(item, dict) for item in prefilled):
+            raise Exception("Invalid prefilled transactions")
+        if len(short_ids) + len(prefilled) != tx_count:
+            raise Exception("Compact block ids do not add up to its transaction count")
+        self.header = header
+        self.slots = [None] * tx_count
+        self.short_ids = {}
+        for item in prefilled:
+            index = item.get("index")
+            if not isinstance(index, int) or not 0 <= index < tx_count or self.slots[index] is not None:
+                raise Exception("Invalid prefilled transaction index")
+            self.slots[index] = item.get("tx")
+        open_slots = [index for index, slot in enumerate(self.slots) if slot is None]
+        for index, short_id in zip(open_slots, short_ids):
+            self.short_ids[index] = short_id
+
+    @property
+    def hash(self) -> str:
+        return self.header.hash
+
+    def fill_from_pool(self, transaction_map) -> list:
+        """
+        Fill every slot whose transaction is in the mempool; return the indexes still missing.
+        """
+        for index, short_id in self.short_ids.items():
+            if self.slots[index] is None:
+                transaction = transaction_map.get(short_id)
+                if transaction is not None:
+                    self.slots[index] = transaction.to_json()
+        return self.missing()
+
+    def missing(self) -> list:
+        return [index for index in self.short_ids if self.slots[index] is None]
+
+    def add_transactions(self, indexes, transactions):
+        for index, tx_json in zip(indexes, transactions):
+            if index in self.short_ids and isinstance(tx_json, dict) and tx_json.get("id") == self.short_ids[index]:
+                self.slots[index] = tx_json
+
+    def to_block(self):
+        """
+        The rebuilt block, or None when a mempool transaction differs from the one that was
+        mined (same id, different content) and the hash does not reproduce.
+        """
+        header = self.header
+        block = Block(header.timestamp, header.last_hash, header.hash, list(self.slots), header.difficulty, header.nonce)
+        if crypto_hash(block.timestamp, block.last_hash, block.data, block.nonce, block.difficulty) != block.hash:
+            return None
+        return block
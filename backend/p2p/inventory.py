@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+from backend.config import (
+    P2P_SEEN_CACHE_SIZE,
+    P2P_PEER_KNOWN_INVENTORY,
+    P2P_GETDATA_TIMEOUT_SECONDS,
+)
+
+
+INVENTORY_TYPES = ("tx", "block")
+
+
+class SeenCache:
+    """
+    Bounded set of hashes; the oldest entries are evicted first.
+    """
+    def __init__(self, capacity: int = P2P_SEEN_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def add(self, key) -> bool:
+        """
+        Remember `key`. Returns False if it was already present.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return False
+        self._entries[key] = None
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return True
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PeerInventory:
+    """
+    What one peer is known to have, plus relay accounting. `bytes_saved` counts the full
+    payload bytes we would have pushed to this peer minus what announcing and serving cost.
+    """
+    def __init__(self, capacity: int = P2P_PEER_KNOWN_INVENTORY):
+        self.known = SeenCache(capacity)
+        self.bytes_saved = 0
+        self.announced = 0
+        self.served = 0
+        self.duplicates = 0
+
+    def to_json(self):
+        return {
+            "bytes_saved": self.bytes_saved,
+            "announced": self.announced,
+            "served": self.served,
+            "duplicates": self.duplicates,
+        }
+
+
+class InflightRequests:
+    """
+    Objects requested with GET_DATA and not yet received, so each one is asked from a single
+    peer at a time until the request times out.
+    """
+    def __init__(self, timeout: float = P2P_GETDATA_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._requests = {}
+
+    def claim(self, key, peer) -> bool:
+        now = time.time()
+        entry = self._requests.get(key)
+        if entry and now - entry[1] < self.timeout:
+            return False
+        self._requests[key] = (peer, now)
+        return True
+
+    def done(self, key):
+        self._requests.pop(key, None)
+
+    def expire(self):
+        now = time.time()
+        for key in [key for key, (_, since) in self._requests.items() if now - since >= self.timeout]:
+            del self._requests[key]
+
+    def __len__(self) -> int:
+        return len(self._requests)
@@ -1,5 +1,6 @@
 import asyncio
 import json
+from collections import OrderedDict
 import random
 import threading
 from typing import Optional, Set
@@ -13,6 +14,42 @@ from backend.blockchain.block import Block
 from backend.blockchain.blockchain import Blockchain
 from backend.wallet.transaction import Transaction
 from backend.wallet.transaction_pool import TransactionPool
+from backend.p2p.sync import HeaderSync, BlockDownload, SegmentStream
+from backend.p2p.inventory import INVENTORY_TYPES, SeenCache, PeerInventory, InflightRequests
+from backend.p2p.compact import PartialBlock, compact_block_fields
+from backend.p2p.validation import ValidationWorker
+from backend.p2p.reconcile import MempoolSketch
+from backend.p2p.orphans import OrphanPool
+from backend.p2p.peers import ConnectionManager
+from backend.p2p.address_book import AddressBook
+from backend.p2p.budget import message_cost
+from backend.p2p.codec import (
+    SUPPORTED_COMPRESSION,
+    TrafficStats,
+    decode_frame,
+    encode_frame,
+    negotiate_compression,
+    parse_message,
+    splice_payload,
+)
+from backend.p2p.outbound import OutboundQueue, PRIORITY_BLOCK, message_priority
+from backend.config import (
+    P2P_MAX_HEADERS_PER_MESSAGE,
+    P2P_SYNC_TIMEOUT_SECONDS,
+    P2P_SEGMENT_CHUNK_BLOCKS,
+    P2P_SEGMENT_CHUNK_BYTES,
+    P2P_MAX_MESSAGE_BYTES,
+    P2P_MAX_INV_ITEMS,
+    P2P_MAX_PENDING_COMPACT_BLOCKS,
+    P2P_GETDATA_TIMEOUT_SECONDS,
+    P2P_OUTBOUND_MAX_LAG_SECONDS,
+    P2P_SEGMENT_WINDOW,
+    P2P_COMPRESSION_MIN_BYTES,
+    P2P_MEMPOOL_SYNC_BATCH,
+    P2P_ORPHAN_MAX_DEPTH,
+    P2P_MAX_PEERS_SHARED,
+    P2P_PING_INTERVAL_SECONDS,
+)
 from backend.util.log import log_debug, log_error, log_info, log_success, log_warn
 
 
@@ -24,11 +61,27 @@ MESSAGE_TYPES = {
     "BLOCK": "BLOCK",
     "TRANSACTION": "TRANSACTION",
     "PING": "PING",
+    "PONG": "PONG",
+    "TIP": "TIP",
+    "GET_HEADERS": "GET_HEADERS",
+    "HEADERS": "HEADERS",
+    "SEGMENT_ACK": "SEGMENT_ACK",
+    "INV": "INV",
+    "GET_DATA": "GET_DATA",
+    "CMPCT_BLOCK": "CMPCT_BLOCK",
+    "GET_BLOCK_TXN": "GET_BLOCK_TXN",
+    "BLOCK_TXN": "BLOCK_TXN",
+    "MEMPOOL_SKETCH": "MEMPOOL_SKETCH",
+    "MEMPOOL_TXS": "MEMPOOL_TXS",
 }
 
+# Messages whose bytes count towards a peer's useful throughput score.
+DATA_MESSAGE_TYPES = {"BLOCK", "CMPCT_BLOCK", "BLOCK_TXN", "CHAIN_SEGMENT", "HEADERS", "TRANSACTION", "MEMPOOL_TXS"}
+
 
 class P2PNode:
-    def __init__(self, host: str, port: int, blockchain: Blockchain, transaction_pool: TransactionPool, seeds=None, sync_interval=10):
+    def __init__(self, host: str, port: int, blockchain: Blockchain, transaction_pool: TransactionPool, seeds=None, sync_interval=10,
+                 address_book_path: Optional[str] = None):
         self.host = host
         self.port = port
         self.self_address = f"{self.host}:{self.port}"
@@ -37,38 +90,83 @@ class P2PNode:
         self.seeds = [s for s in (seeds or []) if self._is_valid_peer_address(s) and not self._is_self_address(s)]
         self.sync_interval = sync_interval
         self.connecting: Set[str] = set()
-        self.failed_attempts = {}
-        self.last_full_sync_request = 0.0
+        # With a path the address book survives restarts, so bootstrap does not depend on the seeds.
+        self.address_book_path = address_book_path
+        self.connections = ConnectionManager(
+            self.seeds, addresses=AddressBook.load(address_book_path, self.seeds) if address_book_path else None
+        )
+        self.last_sync_request = 0.0
+        self.header_sync: Optional[HeaderSync] = None
+        self.block_download: Optional[BlockDownload] = None
+        self.peer_heights = {}
+        self.download_stats = {}
+        self.seen = SeenCache()
+        self.peer_inventory = {}
+        self.inflight = InflightRequests()
+        self.pending_compact = {}
+        self.orphans = OrphanPool()
+        self.outbound = {}
+        self.peer_compression = {}
+        self.traffic = TrafficStats()
+        # Received messages dropped for exceeding a peer's budget, per message type.
+        self.throttled = {}
+        self._frame_cache = OrderedDict()
+        self.compact_stats = {
+            "received": 0,
+            "reconstructed": 0,
+            "fetched_missing": 0,
+            "txs_requested": 0,
+            "fallbacks": 0,
+            "bytes_received": 0,
+        }
+        # Peers we already sent our mempool sketch to on this connection.
+        self.mempool_sketched = set()
+        self.mempool_sync_stats = {
+            "sketches_sent": 0,
+            "sketches_received": 0,
+            "sketch_bytes": 0,
+            "txs_sent": 0,
+            "txs_received": 0,
+            "txs_accepted": 0,
+        }
+        self._announced_tip = None
+        self.segment_streams = {}
         self.synced = False
         self._synced_callbacks = []
         self._sync_change_callbacks = []
+        self._change_callbacks = []
 
         self.loop = asyncio.new_event_loop()
+        self.validation = ValidationWorker(self.loop, lock=blockchain.lock)
         self.server = None
         self.peers: Set[WebSocketServerProtocol] = set()
-        self.peer_addresses: Set[str] = set()
-        for seed in (seeds or []):
-            if self._is_valid_peer_address(seed) and not self._is_self_address(seed):
-                self.peer_addresses.add(seed)
 
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
 
     def start(self):
         if not self.thread.is_alive():
             log_info(f"[P2P] Starting node at ws://{self.self_address} seeds={self.seeds}")
+            self.validation.start()
             self.thread.start()
 
     def _run_loop(self):
         asyncio.set_event_loop(self.loop)
-        server_coro = websockets.serve(self._handle_connection, self.host, self.port)
+        server_coro = websockets.serve(self._handle_connection, self.host, self.port, max_size=P2P_MAX_MESSAGE_BYTES)
         self.server = self.loop.run_until_complete(server_coro)
         log_success(f"[P2P] Listening on ws://{self.self_address}")
         self.loop.create_task(self._connect_seeds())
-        self.loop.create_task(self._periodic_sync())
+        self.loop.create_task(self._periodic_tip_announce())
+        self.loop.create_task(self._download_watchdog())
+        self.loop.create_task(self._maintain_connections())
         self.loop.run_forever()
 
     async def _handle_connection(self, websocket: WebSocketServerProtocol, _path):
-        self._register_peer(websocket)
+        if self.connections.inbound_count() >= self.connections.max_inbound:
+            worst = self.connections.worst_inbound()
+            if worst is not None:
+                log_info(f"[P2P] Inbound slots full; evicting lowest-scored peer {self._peer_label(worst)}")
+                self.loop.create_task(worst.close())
+        self._register_peer(websocket, inbound=True)
         await self._send_hello(websocket)
 
         try:
@@ -79,7 +177,7 @@ class P2PNode:
         finally:
             self._unregister_peer(websocket)
 
-    def _register_peer(self, websocket: WebSocketServerProtocol):
+    def _register_peer(self, websocket: WebSocketServerProtocol, inbound: bool, address: Optional[str] = None):
         """
         Track a newly connected peer; if we already have a connection to the same address,
         drop the duplicate to avoid churn.
@@ -94,6 +192,10 @@ class P2PNode:
                     self.loop.create_task(websocket.close())
                     return
         self.peers.add(websocket)
+        self.connections.add(websocket, inbound, address)
+        queue = OutboundQueue()
+        self.outbound[websocket] = queue
+        self.loop.create_task(self._peer_writer(websocket, queue))
         if peer_address:
             log_success(f"[P2P] Connected peer socket {peer_address}")
 
@@ -105,12 +207,37 @@ class P2PNode:
                 peer_address = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
             if peer_address:
                 log_warn(f"[P2P] Peer disconnected {peer_address}")
+        self.connections.remove(websocket)
+        self.peer_heights.pop(websocket, None)
+        self.peer_inventory.pop(websocket, None)
+        queue = self.outbound.pop(websocket, None)
+        if queue:
+            queue.close()
+        self.peer_compression.pop(websocket, None)
+        self.mempool_sketched.discard(websocket)
+        if self.header_sync and self.header_sync.peer is websocket:
+            self.header_sync = None
+        download = self.block_download
+        if download and websocket in download.active:
+            download.release(websocket)
+            self.loop.create_task(self._schedule_downloads())
+        stream = self.segment_streams.pop(websocket, None)
+        if stream:
+            stream.cancel()
         if not self.peers and self.seeds:
             self._set_synced(False)
 
     async def _connect_seeds(self):
-        for seed in self.seeds:
-            await self._ensure_outbound_connection(seed)
+        log_info(f"[P2P] Bootstrapping from {len(self.connections.addresses)} known addresses")
+        await self._fill_outbound()
+
+    async def _fill_outbound(self):
+        """
+        Dial known addresses in parallel until the outbound target is met.
+        """
+        candidates = self.connections.dial_candidates(self.connecting)
+        if candidates:
+            await asyncio.gather(*(self._ensure_outbound_connection(address) for address in candidates))
 
     async def _ensure_outbound_connection(self, peer_address: str):
         if peer_address == self.self_address or self._is_self_address(peer_address) or not self._is_valid_peer_address(peer_address):
@@ -118,36 +245,24 @@ class P2PNode:
 
         if peer_address in self.connecting:
             return
-        # no quarantine logic
-
-        for peer in list(self.peers):
-            if peer.remote_address:
-                existing_address = f"{peer.remote_address[0]}:{peer.remote_address[1]}"
-                if existing_address == peer_address:
-                    return
-
-        failure_count = self.failed_attempts.get(peer_address, 0)
-        if failure_count >= 6:
-            log_warn(f"[P2P] Giving up on {peer_address} after {failure_count} failures")
+        # Already connected either way round (inbound peers are known by their HELLO address).
+        if peer_address in self.connections.connected_addresses():
             return
 
         uri = f"ws://{peer_address}"
         try:
             log_info(f"[P2P] Dialing peer {peer_address}")
             self.connecting.add(peer_address)
-            websocket = await websockets.connect(uri)
-            self._register_peer(websocket)
+            self.connections.addresses.attempted(peer_address)
+            websocket = await websockets.connect(uri, max_size=P2P_MAX_MESSAGE_BYTES)
+            self.connections.addresses.succeeded(peer_address)
+            self._register_peer(websocket, inbound=False, address=peer_address)
             await self._send_hello(websocket)
             self.loop.create_task(self._listen_outbound(websocket))
             log_debug(f"[P2P] Outbound connection established {peer_address}")
-            self.failed_attempts[peer_address] = 0
         except Exception as exc:
-            failure_count += 1
-            self.failed_attempts[peer_address] = failure_count
-            delay = min(30, 2 ** min(failure_count, 5))
-            log_warn(f"[P2P] Failed to connect {peer_address} ({exc}); retrying in {delay}s (attempt {failure_count})")
-            await asyncio.sleep(delay)
-            self.loop.create_task(self._ensure_outbound_connection(peer_address))
+            failure_count = self.connections.addresses.failed(peer_address)
+            log_warn(f"[P2P] Failed to connect {peer_address} ({exc}); backing off (attempt {failure_count})")
         finally:
             if peer_address in self.connecting:
                 self.connecting.remove(peer_address)
@@ -164,89 +279,186 @@ class P2PNode:
                 peer_address = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
             self._unregister_peer(websocket)
             if peer_address:
-                log_warn(f"[P2P] Lost outbound peer {peer_address}, scheduling reconnect")
-                self.loop.create_task(self._ensure_outbound_connection(peer_address))
+                log_warn(f"[P2P] Lost outbound peer {peer_address}, refilling outbound slots")
+                self.loop.create_task(self._fill_outbound())
 
-    async def _handle_message(self, websocket: WebSocketServerProtocol, raw_message: str):
+    @staticmethod
+    def _peer_label(websocket: WebSocketServerProtocol) -> str:
+        if websocket.remote_address:
+            return f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+        return "unknown"
+
+    async def _handle_message(self, websocket: WebSocketServerProtocol, raw_message):
+        # Frames still buffered from a peer we already dropped are not worth decoding.
+        if websocket not in self.peers:
+            return
+        wire_bytes = len(raw_message)
+        started = time.perf_counter()
         try:
-            message = json.loads(raw_message)
+            text = decode_frame(raw_message)
+            codec_seconds = time.perf_counter() - started
+            message, raw_payload = parse_message(text)
         except ValueError:
             return
+        if not isinstance(message, dict):
+            return
 
         msg_type = message.get("type")
+        self.traffic.record_received(msg_type, len(text), wire_bytes, codec_seconds, not isinstance(raw_message, str))
+        if not self.connections.admit(websocket, msg_type, message_cost(msg_type, message, len(self.blockchain.chain))):
+            self._throttle_peer(websocket, msg_type)
+            return
+        if msg_type in DATA_MESSAGE_TYPES:
+            score = self.connections.get(websocket)
+            if score is not None:
+                score.useful_bytes += wire_bytes
 
         if msg_type == MESSAGE_TYPES["HELLO"]:
+            compression = negotiate_compression(message.get("compression"))
+            if compression:
+                self.peer_compression[websocket] = compression
             peer_addr = message.get("address")
             if peer_addr and self._is_valid_peer_address(peer_addr) and not self._is_self_address(peer_addr):
-                self.peer_addresses.add(peer_addr)
+                self.connections.addresses.learn(peer_addr, source=self._peer_label(websocket))
+                score = self.connections.get(websocket)
+                if score is not None and score.address is None:
+                    score.address = peer_addr
+                if self._drop_duplicate_connection(websocket, peer_addr):
+                    return
                 log_debug(f"[P2P] HELLO from {peer_addr} height={message.get('height')}")
 
-            remote_height = message.get("height", 0)
-            remote_work = message.get("work", 0)
-            remote_last_hash = message.get("last_hash")
-            local_height = len(self.blockchain.chain) - 1
-            local_work = self.blockchain.total_work()
-            if (remote_height > local_height) or (remote_height == local_height and remote_work > local_work):
-                log_info(f"[P2P] Remote chain ahead (h={remote_height}, work={remote_work}), local (h={local_height}, work={local_work}); requesting full sync")
-                await self._request_chain(websocket, start=0)
-            elif remote_height == local_height and remote_last_hash == self.blockchain.chain[-1].hash:
-                self._set_synced(True)
+            await self._handle_remote_tip(
+                websocket,
+                message.get("height", 0),
+                message.get("work", 0),
+                message.get("last_hash"),
+            )
 
             await self._send_peers(websocket)
+            # A node still catching up asks for the mempool once its chain is synced instead.
+            if self.synced:
+                await self._send_mempool_sketch(websocket)
 
         elif msg_type == MESSAGE_TYPES["PEERS"]:
-            peers = message.get("peers", [])
-            for peer in peers:
-                if peer != self.self_address and self._is_valid_peer_address(peer) and not self._is_self_address(peer):
-                    self.peer_addresses.add(peer)
-                    self.loop.create_task(self._ensure_outbound_connection(peer))
-            log_debug(f"[P2P] Received peers: {peers}")
+            peers = message.get("peers") or []
+            for peer in peers[:P2P_MAX_PEERS_SHARED]:
+                if isinstance(peer, str) and self._is_valid_peer_address(peer) and not self._is_self_address(peer):
+                    self.connections.addresses.learn(peer, source=self._peer_label(websocket))
+            # Addresses are only remembered; dialing happens while outbound slots are free.
+            self.loop.create_task(self._fill_outbound())
+            log_debug(f"[P2P] Received peers: {peers[:P2P_MAX_PEERS_SHARED]}")
+
+        elif msg_type == MESSAGE_TYPES["TIP"]:
+            await self._handle_remote_tip(
+                websocket,
+                message.get("height", 0),
+                message.get("work", 0),
+                message.get("hash"),
+            )
+
+        elif msg_type == MESSAGE_TYPES["GET_HEADERS"]:
+            await self._send_headers(websocket, message.get("locator") or [])
+
+        elif msg_type == MESSAGE_TYPES["HEADERS"]:
+            await self._handle_headers(websocket, message.get("start"), message.get("headers") or [])
 
         elif msg_type == MESSAGE_TYPES["REQUEST_CHAIN"]:
             start = message.get("start", 0)
-            log_info(f"[P2P] Peer requested chain from height {start}")
-            await self._send_chain_segment(websocket, start)
+            end = message.get("end")
+            log_info(f"[P2P] Peer requested chain from height {start}" + (f" to {end}" if end is not None else ""))
+            self._start_segment_stream(websocket, start, end, acked=bool(message.get("ack")))
+
+        elif msg_type == MESSAGE_TYPES["SEGMENT_ACK"]:
+            stream = self.segment_streams.get(websocket)
+            if stream:
+                stream.ack(message.get("next", 0))
 
         elif msg_type == MESSAGE_TYPES["CHAIN_SEGMENT"]:
             start = message.get("start", 0)
             blocks_json = message.get("blocks", [])
-            self._try_replace_chain(start, blocks_json)
-            if start == len(self.blockchain.chain) and not blocks_json:
+            blocks_raw = raw_payload if isinstance(raw_payload, list) else None
+            download = self.block_download
+            if download is not None:
+                if websocket in download.active:
+                    await self._handle_download_segment(
+                        websocket, download, start, blocks_json, blocks_raw, message.get("more", False), wire_bytes
+                    )
+                # Late chunks from a released range are dropped while the download runs.
+                return
+            try:
+                replaced = await self.validation.run("segment", self._replace_from_segment, start, blocks_json, blocks_raw)
+            except Exception as exc:
+                self._record_invalid(None, reason=str(exc))
+                log_warn(f"[P2P] Failed to replace chain from {start}: {exc}")
+                return
+            if replaced is not None or (start == len(self.blockchain.chain) and not blocks_json):
                 self._set_synced(True)
 
+        elif msg_type == MESSAGE_TYPES["INV"]:
+            await self._handle_inv(websocket, message.get("items") or [])
+
+        elif msg_type == MESSAGE_TYPES["GET_DATA"]:
+            await self._handle_get_data(websocket, message.get("items") or [])
+
         elif msg_type == MESSAGE_TYPES["BLOCK"]:
             block_json = message.get("block")
             if not block_json:
                 return
             block = Block.from_json(block_json)
-            potential_chain = self.blockchain.chain[:]
-            potential_chain.append(block)
+            if isinstance(message.get("height"), int):
+                self.peer_heights[websocket] = max(self.peer_heights.get(websocket, 0), message["height"])
+            self.pending_compact.pop(block.hash, None)
+            await self._receive_block(websocket, block, raw_payload if isinstance(raw_payload, str) else None)
 
-            try:
-                self.blockchain.replace_chain(potential_chain)
-                self.transaction_pool.clear_blockchain_transactions(self.blockchain)
-                log_success(f"[P2P] Added new block height={len(self.blockchain.chain)-1} hash={block.hash[:8]}...")
-                self._set_synced(True)
-            except Exception as exc:
-                self._record_invalid(websocket, reason=str(exc))
-                self._set_synced(False)
-                await self._request_full_sync_any(websocket)
+        elif msg_type == MESSAGE_TYPES["CMPCT_BLOCK"]:
+            await self._handle_compact_block(websocket, message, wire_bytes)
+
+        elif msg_type == MESSAGE_TYPES["GET_BLOCK_TXN"]:
+            await self._send_block_transactions(websocket, message.get("hash"), message.get("indexes") or [])
+
+        elif msg_type == MESSAGE_TYPES["BLOCK_TXN"]:
+            await self._handle_block_transactions(websocket, message, wire_bytes)
 
         elif msg_type == MESSAGE_TYPES["TRANSACTION"]:
             tx_json = message.get("transaction")
             if not tx_json:
                 return
             transaction = Transaction.from_json(tx_json)
+            self._peer_inventory_of(websocket).known.add(transaction.id)
+            self.inflight.done(transaction.id)
+            if not self.seen.add(transaction.id):
+                self._peer_inventory_of(websocket).duplicates += 1
+                return
             try:
-                self.transaction_pool.set_transaction(transaction)
+                await self.validation.run(
+                    "transaction",
+                    self.transaction_pool.set_transaction,
+                    transaction,
+                    raw_payload if isinstance(raw_payload, str) else None,
+                )
                 log_info(f"[P2P] Received transaction {transaction.id[:8]}... from peer")
             except Exception as exc:
                 log_warn(f"[P2P] Rejected incoming transaction: {exc}")
-                log_warn(f"[P2P] Rejected incoming transaction: {exc}")
-                pass
+                return
+            self._notify_change()
+            await self._relay_transaction(transaction, exclude=websocket)
+
+        elif msg_type == MESSAGE_TYPES["MEMPOOL_SKETCH"]:
+            await self._handle_mempool_sketch(websocket, message.get("sketch"))
+
+        elif msg_type == MESSAGE_TYPES["MEMPOOL_TXS"]:
+            transactions_json = message.get("transactions") or []
+            await self._handle_mempool_transactions(
+                websocket, transactions_json, raw_payload if isinstance(raw_payload, list) else None
+            )
 
         elif msg_type == MESSAGE_TYPES["PING"]:
-            await self._safe_send(websocket, {"type": "PONG"})
+            await self._safe_send(websocket, {"type": MESSAGE_TYPES["PONG"], "nonce": message.get("nonce")})
+
+        elif msg_type == MESSAGE_TYPES["PONG"]:
+            score = self.connections.get(websocket)
+            if score is not None:
+                score.pong_received(message.get("nonce"))
 
     async def _send_hello(self, websocket: WebSocketServerProtocol):
         await self._safe_send(websocket, {
@@ -255,35 +467,469 @@ class P2PNode:
             "height": len(self.blockchain.chain) - 1,
             "last_hash": self.blockchain.chain[-1].hash,
             "work": self.blockchain.total_work(),
+            "compression": list(SUPPORTED_COMPRESSION),
         })
 
     async def _send_peers(self, websocket: WebSocketServerProtocol):
         await self._safe_send(websocket, {
             "type": MESSAGE_TYPES["PEERS"],
-            "peers": list(self.peer_addresses),
+            "peers": self.connections.addresses.sample(P2P_MAX_PEERS_SHARED),
         })
 
-    async def _request_chain(self, websocket: WebSocketServerProtocol, start: int = 0):
-        await self._safe_send(websocket, {
+    async def _request_chain(self, websocket: WebSocketServerProtocol, start: int = 0, end: Optional[int] = None, ack: bool = False):
+        message = {
             "type": MESSAGE_TYPES["REQUEST_CHAIN"],
             "start": start,
-        })
+        }
+        if end is not None:
+            message["end"] = end
+        if ack:
+            message["ack"] = True
+        await self._safe_send(websocket, message)
 
-    async def _send_chain_segment(self, websocket: WebSocketServerProtocol, start: int = 0):
-        if start < 0 or start > len(self.blockchain.chain):
+    def _start_segment_stream(self, websocket: WebSocketServerProtocol, start: int = 0, end: Optional[int] = None, acked: bool = False):
+        """
+        Serve a REQUEST_CHAIN as a background stream so acks keep flowing through the reader.
+        A new request from the same peer replaces its previous stream.
+        """
+        chain = self.blockchain.chain
+        if not isinstance(start, int) or start < 0 or start > len(chain):
             start = 0
+        end = len(chain) if end is None else max(start, min(int(end), len(chain)))
+
+        previous = self.segment_streams.get(websocket)
+        if previous:
+            previous.cancel()
+        stream = SegmentStream(start, end, acked)
+        self.segment_streams[websocket] = stream
+        self.loop.create_task(self._stream_chain_segment(websocket, stream, chain))
+
+    async def _stream_chain_segment(self, websocket: WebSocketServerProtocol, stream: SegmentStream, chain):
+        """
+        Send chain[start:end] as CHAIN_SEGMENT chunks bounded in blocks and bytes. Each chunk
+        carries its start offset and a `more` flag, so a receiver can resume from any height.
+        """
+        pending = None
+        try:
+            while True:
+                if not await stream.wait_for_window():
+                    if not stream.cancelled:
+                        log_warn(f"[P2P] Chain segment stream stalled at height {stream.next_height}; dropping it")
+                    return
+
+                queue = self.outbound.get(websocket)
+                if queue is None:
+                    return
+                # Keep the chain out of the send queue until earlier chunks are on the wire.
+                await queue.wait_for_room(PRIORITY_BLOCK, P2P_SEGMENT_WINDOW)
+
+                chunk_start = stream.next_height
+                encoded = []
+                chunk_bytes = 0
+                height = chunk_start
+                while height < stream.end and len(encoded) < P2P_SEGMENT_CHUNK_BLOCKS:
+                    block_text = pending or self.blockchain.encoded_block(chain[height], cache=False)
+                    pending = None
+                    if encoded and chunk_bytes + len(block_text) > P2P_SEGMENT_CHUNK_BYTES:
+                        pending = block_text
+                        break
+                    encoded.append(block_text)
+                    chunk_bytes += len(block_text)
+                    height += 1
+
+                more = height < stream.end
+                envelope = json.dumps({
+                    "type": MESSAGE_TYPES["CHAIN_SEGMENT"],
+                    "start": chunk_start,
+                    "end": stream.end,
+                    "more": more,
+                })
+                await self._safe_send_text(websocket, envelope[:-1] + ', "blocks": [' + ", ".join(encoded) + "]}", MESSAGE_TYPES["CHAIN_SEGMENT"])
+                stream.chunk_sent(height)
+                if not more:
+                    break
+            log_debug(f"[P2P] Streamed chain segment {stream.start}..{stream.end} ({stream.end - stream.start} blocks)")
+        finally:
+            if self.segment_streams.get(websocket) is stream:
+                del self.segment_streams[websocket]
+
+    async def _handle_remote_tip(self, websocket: WebSocketServerProtocol, remote_height: int, remote_work: int, remote_hash: Optional[str]):
+        if isinstance(remote_height, int):
+            self.peer_heights[websocket] = remote_height
+        local_height = len(self.blockchain.chain) - 1
+        local_work = self.blockchain.total_work()
+        if (remote_height > local_height) or (remote_height == local_height and remote_work > local_work):
+            log_info(f"[P2P] Remote chain ahead (h={remote_height}, work={remote_work}), local (h={local_height}, work={local_work}); starting headers sync")
+            await self._start_header_sync(websocket)
+        elif remote_height == local_height and remote_hash == self.blockchain.chain[-1].hash:
+            self._set_synced(True)
+
+    async def _start_header_sync(self, websocket: WebSocketServerProtocol):
+        """
+        Begin a headers-first sync with a peer unless one is already making progress.
+        """
+        sync = self.header_sync
+        if (sync and not sync.is_stale()) or self.block_download is not None:
+            return
+        self.header_sync = HeaderSync(websocket)
+        await self._send_get_headers(websocket, self.blockchain.locator())
+
+    async def _send_get_headers(self, websocket: WebSocketServerProtocol, locator):
+        await self._safe_send(websocket, {
+            "type": MESSAGE_TYPES["GET_HEADERS"],
+            "locator": locator,
+        })
 
+    async def _send_headers(self, websocket: WebSocketServerProtocol, locator):
+        """
+        Answer a locator with the headers that follow the most recent block we share.
+        """
+        fork = self.blockchain.find_fork(locator)
+        start = (fork if fork is not None else 0) + 1
+        headers = [block.header() for block in self.blockchain.chain[start:start + P2P_MAX_HEADERS_PER_MESSAGE]]
         await self._safe_send(websocket, {
-            "type": MESSAGE_TYPES["CHAIN_SEGMENT"],
+            "type": MESSAGE_TYPES["HEADERS"],
             "start": start,
-            "blocks": list(map(lambda block: block.to_json(), self.blockchain.chain[start:])),
+            "headers": headers,
         })
-        log_debug(f"[P2P] Sent chain segment from {start} ({len(self.blockchain.chain[start:])} blocks)")
+        log_debug(f"[P2P] Sent {len(headers)} headers from height {start}")
 
-    def _try_replace_chain(self, start: int, blocks_json):
-        if start > len(self.blockchain.chain):
+    async def _handle_headers(self, websocket: WebSocketServerProtocol, start, headers_json):
+        sync = self.header_sync
+        if not sync or sync.peer is not websocket:
+            return
+        sync.touch()
+
+        if not headers_json:
+            await self._begin_body_download(sync)
+            return
+
+        try:
+            headers = [Block.from_header(header_json) for header_json in headers_json]
+            if sync.headers:
+                if start != sync.end:
+                    raise Exception("Headers do not continue the pending sync")
+                parent = sync.headers[-1]
+            else:
+                chain = self.blockchain.chain
+                if not isinstance(start, int) or start < 1 or start > len(chain):
+                    raise Exception("Headers start outside the local chain")
+                parent = chain[start - 1]
+                sync.start = start
+            for header in headers:
+                Block.is_valid_header(parent, header)
+                parent = header
+        except Exception as exc:
+            self.header_sync = None
+            self._penalize_peer(websocket, reason=f"Invalid headers: {exc}")
+            return
+
+        sync.headers.extend(headers)
+        if len(headers) >= P2P_MAX_HEADERS_PER_MESSAGE:
+            await self._send_get_headers(websocket, [sync.headers[-1].hash] + self.blockchain.locator())
+        else:
+            await self._begin_body_download(sync)
+
+    async def _begin_body_download(self, sync: HeaderSync):
+        """
+        Once the header chain is complete, fetch the bodies we do not have if it carries more work.
+        """
+        self.header_sync = None
+        chain = self.blockchain.chain
+        if not sync.headers:
             return
 
+        # A sparse locator can place the fork below blocks we already share; skip those.
+        shared = 0
+        while (
+            shared < len(sync.headers)
+            and sync.start + shared < len(chain)
+            and chain[sync.start + shared].hash == sync.headers[shared].hash
+        ):
+            shared += 1
+
+        candidate_length = sync.end
+        candidate_work = Blockchain.compute_work(chain[:sync.start]) + Blockchain.compute_work(sync.headers)
+        local_work = self.blockchain.total_work()
+        if candidate_length < len(chain) or (candidate_length == len(chain) and candidate_work <= local_work):
+            log_debug("[P2P] Peer headers carry no more work; nothing to download")
+            return
+
+        self.peer_heights[sync.peer] = max(self.peer_heights.get(sync.peer, 0), candidate_length - 1)
+        # Rebuilding balances below a fork can mean replaying the chain; keep it off the loop.
+        validator = await self.validation.run("validator", self.blockchain.validator, sync.start + shared)
+        if self.block_download is not None:
+            return
+        download = BlockDownload(
+            sync.start,
+            sync.headers,
+            validator,
+            sync.start + shared,
+            source=sync.peer,
+            stats=self.download_stats,
+        )
+        self.block_download = download
+        log_info(f"[P2P] Headers synced to height {candidate_length - 1}; fetching {download.end - download.next_height} blocks")
+        await self._schedule_downloads()
+
+    def _download_candidates(self, download: BlockDownload):
+        """
+        Connected peers that can serve the next pending range, fastest first. The header source
+        is always eligible; other peers must have announced a tip at least that high.
+        """
+        if not download.pending:
+            return []
+        needed = download.pending[0].end - 1
+        candidates = [
+            peer for peer in self.peers
+            if peer is download.source or self.peer_heights.get(peer, -1) >= needed
+        ]
+        rates = {
+            peer: self.download_stats[self._peer_label(peer)].blocks_per_second()
+            if self._peer_label(peer) in self.download_stats else 0.0
+            for peer in candidates
+        }
+        # Stable sort: peers with equal download rates stay in score order.
+        return sorted(self.connections.ranked(candidates), key=lambda peer: rates[peer], reverse=True)
+
+    async def _schedule_downloads(self):
+        """
+        Hand pending ranges to idle peers until every peer is busy or the window is full.
+        """
+        download = self.block_download
+        if download is None:
+            return
+        if download.done:
+            self._finish_download(download)
+            return
+        for peer in self._download_candidates(download):
+            download_range = download.assign(peer, self._peer_label(peer))
+            if download_range is None:
+                continue
+            log_debug(f"[P2P] Requesting blocks {download_range.start}..{download_range.end} from {download_range.label}")
+            await self._request_chain(peer, start=download_range.start, end=download_range.end, ack=True)
+
+    async def _handle_download_segment(self, websocket: WebSocketServerProtocol, download: BlockDownload, start, blocks_json, blocks_raw, more: bool, size_bytes: int):
+        """
+        Buffer one streamed chunk of a peer's range, ack it, and connect whatever is now
+        contiguous with the validated prefix.
+        """
+        download_range = download.active[websocket]
+        if start != download_range.next:
+            return
+        try:
+            if not blocks_json:
+                raise Exception(f"Peer returned no blocks from height {start}")
+            download.receive(
+                websocket, start, [Block.from_json(block_json) for block_json in blocks_json], size_bytes, blocks_raw
+            )
+        except Exception as exc:
+            self._drop_download_peer(websocket, download, str(exc))
+            await self._schedule_downloads()
+            return
+
+        await self._safe_send(websocket, {"type": MESSAGE_TYPES["SEGMENT_ACK"], "next": start + len(blocks_json)})
+        if not more and websocket in download.active:
+            # The peer ran out before the end of its range; let another peer finish it.
+            self._drop_download_peer(websocket, download, f"stream ended at height {download_range.next}")
+
+        ready = list(download.ready_blocks())
+        if ready:
+            download.validating += 1
+            try:
+                connected, error = await self.validation.run(
+                    "blocks",
+                    self._connect_blocks,
+                    download.validator,
+                    [block for _, block, _, _ in ready],
+                    [encoded for _, _, encoded, _ in ready],
+                )
+            finally:
+                download.validating -= 1
+            if self.block_download is not download:
+                return
+            if error is not None:
+                # Headers carry no commitment to block data, so blame the peer that served the body.
+                height, _, _, supplier = ready[connected]
+                self.block_download = None
+                self._penalize_peer(supplier or download.source, reason=f"Block at height {height}: {error}")
+                return
+        await self._schedule_downloads()
+
+    def _drop_download_peer(self, websocket: WebSocketServerProtocol, download: BlockDownload, reason: str):
+        if websocket is download.source:
+            self.block_download = None
+            self._penalize_peer(websocket, reason=reason)
+            return
+        log_warn(f"[P2P] Dropping {self._peer_label(websocket)} from block download: {reason}")
+        download.release(websocket, failed=True)
+
+    async def _download_watchdog(self):
+        """
+        Reassign ranges whose peer went quiet, and give up on a download that stopped moving.
+        """
+        while True:
+            await asyncio.sleep(1)
+            download = self.block_download
+            if download is None:
+                continue
+            for peer in download.stalled_peers():
+                log_warn(f"[P2P] {self._peer_label(peer)} stalled during block download; reassigning its range")
+                download.release(peer, stalled=True)
+            if time.time() - download.last_progress > P2P_SYNC_TIMEOUT_SECONDS:
+                log_warn(f"[P2P] Block download stuck at height {download.next_height}; restarting sync")
+                self.block_download = None
+                self.last_sync_request = 0.0
+                await self._request_sync_any()
+                continue
+            await self._schedule_downloads()
+
+    def _connect_blocks(self, validator, blocks, encodings):
+        """
+        Validation-thread job: extend a download's validator, then switch to it as soon as it
+        beats the local chain. Returns how many blocks were valid and the first error, if any.
+        """
+        for index, block in enumerate(blocks):
+            try:
+                validator.add_block(block)
+            except Exception as exc:
+                return index, str(exc)
+            if encodings[index] is not None:
+                self.blockchain.remember_encoding(block, encodings[index])
+        self._connect_validated(validator)
+        return len(blocks), None
+
+    def _connect_block(self, block: Block, encoded: Optional[str] = None) -> bool:
+        """
+        Validation-thread job: append a relayed block. Returns False if it no longer extends
+        the tip because an earlier job moved it.
+        """
+        if block.last_hash != self.blockchain.chain[-1].hash:
+            return False
+        self.blockchain.replace_chain(self.blockchain.chain + [block])
+        if encoded is not None:
+            self.blockchain.remember_encoding(block, encoded)
+        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+        self._notify_change()
+        return True
+
+    def _connect_validated(self, validator) -> bool:
+        """
+        Switch to the validated chain as soon as it beats the local one.
+        """
+        try:
+            self.blockchain.adopt(validator)
+        except Exception:
+            return False
+        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+        self._notify_change()
+        log_success(f"[P2P] Connected blocks up to height {validator.height} hash={validator.tip.hash[:8]}...")
+        return True
+
+    def _finish_download(self, download: BlockDownload):
+        if self.block_download is download:
+            self.block_download = None
+        for label, peer_stats in sorted(download.stats.items()):
+            log_debug(
+                f"[P2P] Download throughput {label}: {peer_stats.blocks} blocks, "
+                f"{peer_stats.blocks_per_second():.1f} blocks/s, {peer_stats.stalls} stalls"
+            )
+        if self.blockchain.chain[-1].hash != download.validator.tip.hash:
+            log_warn("[P2P] Synced chain did not end up with more work than ours")
+            return
+        log_success(f"[P2P] Headers-first sync complete at height {download.validator.height}")
+        self._set_synced(True)
+        self.loop.create_task(self._announce_tip(exclude=download.source))
+        self.loop.create_task(self._connect_orphans(self.blockchain.chain[-1].hash))
+        # Peers may have moved on while we were downloading.
+        height = len(self.blockchain.chain) - 1
+        ahead = [peer for peer in self.peers if self.peer_heights.get(peer, -1) > height]
+        if ahead:
+            self.loop.create_task(self._start_header_sync(self.connections.ranked(ahead)[0]))
+
+    def threadsafe_stats(self, timeout: float = 5) -> dict:
+        """
+        stats() for callers on other threads, collected on the event loop that owns the peer,
+        download and relay state it walks.
+        """
+        async def _collect():
+            return self.stats()
+
+        return asyncio.run_coroutine_threadsafe(_collect(), self.loop).result(timeout)
+
+    def stats(self) -> dict:
+        """
+        Sync state and cumulative per-peer block download throughput. Call it on the event loop.
+        """
+        download = self.block_download
+        return {
+            "height": len(self.blockchain.chain) - 1,
+            "synced": self.synced,
+            "peers": len(self.peers),
+            "download": None if download is None else {
+                "next_height": download.next_height,
+                "end_height": download.end,
+                "pending_ranges": len(download.pending),
+                "active_ranges": {
+                    download_range.label: [download_range.next, download_range.end]
+                    for download_range in download.active.values()
+                },
+                "buffered_blocks": len(download.buffer),
+            },
+            "peer_throughput": {
+                label: peer_stats.to_json() for label, peer_stats in self.download_stats.items()
+            },
+            "compact_blocks": {
+                **self.compact_stats,
+                "pending": len(self.pending_compact),
+                "bytes_per_block": (
+                    round(self.compact_stats["bytes_received"] / self.compact_stats["received"])
+                    if self.compact_stats["received"] else 0
+                ),
+            },
+            "outbound": {
+                self._peer_label(peer): queue.to_json() for peer, queue in self.outbound.items()
+            },
+            "connections": self.connections.to_json(self._peer_label),
+            "validation": self.validation.to_json(),
+            "mempool_sync": self.mempool_sync_stats,
+            "orphans": self.orphans.to_json(),
+            "traffic": self.traffic.to_json(),
+            "throttled": self.throttled,
+            "relay": {
+                "seen_hashes": len(self.seen),
+                "inflight_requests": len(self.inflight),
+                "peers": {
+                    self._peer_label(peer): inventory.to_json()
+                    for peer, inventory in self.peer_inventory.items()
+                },
+            },
+        }
+
+    async def _announce_tip(self, exclude: Optional[WebSocketServerProtocol] = None):
+        """
+        Tell peers about our tip when it changed since the last announcement.
+        """
+        tip = self.blockchain.chain[-1]
+        if tip.hash == self._announced_tip:
+            return
+        self._announced_tip = tip.hash
+        await self._broadcast({
+            "type": MESSAGE_TYPES["TIP"],
+            "height": len(self.blockchain.chain) - 1,
+            "hash": tip.hash,
+            "work": self.blockchain.total_work(),
+        }, exclude=exclude)
+
+    def _replace_from_segment(self, start: int, blocks_json, blocks_raw=None):
+        """
+        Validation-thread job for an unsolicited CHAIN_SEGMENT: replace the chain from `start`
+        if the result carries more work. Returns True when replaced, False when the segment
+        ends on our own tip, None when it is ignored; raises if the segment is invalid.
+        """
+        if start > len(self.blockchain.chain):
+            return None
+
         potential_chain = self.blockchain.chain[:start] + list(
             map(lambda block_json: Block.from_json(block_json), blocks_json)
         )
@@ -295,70 +941,598 @@ class P2PNode:
 
         # Only attempt replacement if the incoming chain is actually better.
         if len(potential_chain) < len(self.blockchain.chain):
-            return
+            return None
         if len(potential_chain) == len(self.blockchain.chain) and incoming_work <= local_work:
             if incoming_tip_hash and incoming_tip_hash == local_tip_hash:
-                self._set_synced(True)
-            return
+                return False
+            return None
 
-        try:
-            self.blockchain.replace_chain(potential_chain)
-            self.transaction_pool.clear_blockchain_transactions(self.blockchain)
-            log_success(f"[P2P] Replaced chain from height {start}; new height {len(self.blockchain.chain)-1}")
-            self._set_synced(True)
-        except Exception as exc:
-            self._record_invalid(None, reason=str(exc))
-            self._set_synced(False)
-            log_warn(f"[P2P] Failed to replace chain from {start}: {exc}")
-            self.loop.create_task(self._request_full_sync_any())
+        self.blockchain.replace_chain(potential_chain)
+        if blocks_raw is not None:
+            for block, encoded in zip(potential_chain[start:], blocks_raw):
+                self.blockchain.remember_encoding(block, encoded)
+        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+        self._notify_change()
+        log_success(f"[P2P] Replaced chain from height {start}; new height {len(self.blockchain.chain)-1}")
+        return True
 
     async def _safe_send(self, websocket: WebSocketServerProtocol, message: dict):
-        try:
-            await websocket.send(json.dumps(message))
-        except Exception:
-            self._unregister_peer(websocket)
-            log_error("[P2P] Failed to send message to peer; dropping connection")
+        await self._safe_send_text(websocket, json.dumps(message), message.get("type"))
+
+    async def _safe_send_text(self, websocket: WebSocketServerProtocol, text: str, msg_type: str):
+        """
+        Queue a message for the peer's writer task; never waits on the socket itself.
+        """
+        queue = self.outbound.get(websocket)
+        if queue is None:
+            return
+        queue.push(self._encode_for_peer(websocket, text, msg_type), message_priority(msg_type))
+        if queue.overflowed or queue.lag() > P2P_OUTBOUND_MAX_LAG_SECONDS:
+            self._disconnect_slow_peer(websocket, queue)
+
+    def _encode_for_peer(self, websocket: WebSocketServerProtocol, text: str, msg_type: str):
+        """
+        Compress large messages for peers that negotiated it. A broadcast hands the same text to
+        every peer, so recent frames are cached and compressed once.
+        """
+        compression = self.peer_compression.get(websocket)
+        if compression is None or len(text) < P2P_COMPRESSION_MIN_BYTES:
+            self.traffic.record_sent(msg_type, len(text), len(text), 0.0, False)
+            return text
+        key = (compression, text)
+        frame = self._frame_cache.get(key)
+        codec_seconds = 0.0
+        if frame is None:
+            started = time.perf_counter()
+            frame = encode_frame(text, compression)
+            codec_seconds = time.perf_counter() - started
+            self._frame_cache[key] = frame
+            if len(self._frame_cache) > 16:
+                self._frame_cache.popitem(last=False)
+        self.traffic.record_sent(msg_type, len(text), len(frame), codec_seconds, True)
+        return frame
+
+    async def _peer_writer(self, websocket: WebSocketServerProtocol, queue: OutboundQueue):
+        """
+        Drain one peer's outbound queue, so a slow socket only ever delays its own messages.
+        """
+        while True:
+            text = await queue.get()
+            if text is None:
+                return
+            try:
+                await websocket.send(text)
+            except Exception:
+                self._unregister_peer(websocket)
+                log_error("[P2P] Failed to send message to peer; dropping connection")
+                return
+            queue.sent += 1
+
+    def _disconnect_slow_peer(self, websocket: WebSocketServerProtocol, queue: OutboundQueue):
+        log_warn(
+            f"[P2P] Disconnecting {self._peer_label(websocket)}: outbound queue behind "
+            f"({queue.size} queued, {queue.dropped} dropped, lag {queue.lag():.1f}s)"
+        )
+        self._unregister_peer(websocket)
+        self.loop.create_task(websocket.close())
 
     async def _broadcast(self, message: dict, exclude: Optional[WebSocketServerProtocol] = None):
-        peers_snapshot = list(self.peers)
-        for peer in peers_snapshot:
+        text = json.dumps(message)
+        for peer in list(self.peers):
             if peer == exclude:
                 continue
-            await self._safe_send(peer, message)
+            await self._safe_send_text(peer, text, message["type"])
 
     def broadcast_block(self, block: Block):
-        coro = self._broadcast({"type": MESSAGE_TYPES["BLOCK"], "block": block.to_json()})
-        asyncio.run_coroutine_threadsafe(coro, self.loop)
+        asyncio.run_coroutine_threadsafe(self._relay_block(block), self.loop)
 
     def broadcast_transaction(self, transaction: Transaction):
-        coro = self._broadcast({"type": MESSAGE_TYPES["TRANSACTION"], "transaction": transaction.to_json()})
-        asyncio.run_coroutine_threadsafe(coro, self.loop)
+        asyncio.run_coroutine_threadsafe(self._relay_transaction(transaction), self.loop)
+
+    async def _receive_block(self, websocket: WebSocketServerProtocol, block: Block, encoded: Optional[str] = None):
+        """
+        Connect a block relayed by a peer if it extends our tip, then relay it onward.
+        """
+        self._peer_inventory_of(websocket).known.add(block.hash)
+        self.inflight.done(block.hash)
+        if not self.seen.add(block.hash) or self.blockchain.height_of(block.hash) is not None:
+            self._peer_inventory_of(websocket).duplicates += 1
+            return
+        if block.last_hash != self.blockchain.chain[-1].hash:
+            if self.blockchain.height_of(block.last_hash) is None:
+                await self._hold_orphan(websocket, block, encoded)
+                return
+            # Parent on our chain below the tip: a competing branch, compared via headers-first sync.
+            log_info(f"[P2P] Block {block.hash[:8]}... does not extend our tip; starting headers sync")
+            await self._start_header_sync(websocket)
+            return
+
+        try:
+            connected = await self.validation.run("block", self._connect_block, block, encoded)
+        except Exception as exc:
+            # One peer's bad block says nothing about our chain or the rest of our mempool.
+            self._penalize_peer(websocket, reason=f"Invalid block {block.hash[:8]}...: {exc}")
+            self.validation.submit("purge", self._drop_rejected_transaction, block, str(exc))
+            return
+        if not connected:
+            await self._start_header_sync(websocket)
+            return
+        log_success(f"[P2P] Added new block height={len(self.blockchain.chain)-1} hash={block.hash[:8]}...")
+        self._set_synced(True)
+        self.loop.create_task(self._relay_block(block, exclude=websocket))
+        await self._connect_orphans(block.hash)
+
+    async def _hold_orphan(self, websocket: WebSocketServerProtocol, block: Block, encoded: Optional[str]):
+        """
+        Keep a block whose parent we lack and fetch only the missing ancestor from the peer that
+        sent it. Far behind, a headers-first sync is cheaper than walking back block by block.
+        """
+        self.orphans.add(block, encoded, websocket)
+        missing, depth = self.orphans.missing_ancestor(block.hash)
+        behind = self.peer_heights.get(websocket, 0) - (len(self.blockchain.chain) - 1)
+        if depth > P2P_ORPHAN_MAX_DEPTH or behind > P2P_ORPHAN_MAX_DEPTH or self.blockchain.height_of(missing) is not None:
+            log_info(f"[P2P] Orphan block {block.hash[:8]}... is not close to our tip; starting headers sync")
+            await self._start_header_sync(websocket)
+            return
+        if not self.inflight.claim(missing, websocket):
+            return
+        log_info(f"[P2P] Holding orphan block {block.hash[:8]}...; fetching parent {missing[:8]}...")
+        self.orphans.parents_requested += 1
+        await self._safe_send(websocket, {
+            "type": MESSAGE_TYPES["GET_DATA"],
+            "items": [{"type": "block", "hash": missing}],
+        })
+
+    async def _connect_orphans(self, parent_hash: str):
+        """
+        Connect held orphans that now extend the tip, descending through their children.
+        """
+        parents = [parent_hash]
+        while parents:
+            for block, encoded, peer in self.orphans.pop_children(parents.pop()):
+                if self.blockchain.height_of(block.hash) is not None:
+                    continue
+                try:
+                    connected = await self.validation.run("block", self._connect_block, block, encoded)
+                except Exception as exc:
+                    dropped = self.orphans.discard_descendants(block.hash)
+                    log_warn(f"[P2P] Dropped invalid orphan block {block.hash[:8]}... and {dropped} descendants: {exc}")
+                    continue
+                if not connected:
+                    # A sibling took the tip first; this one is now on a side branch.
+                    continue
+                self.orphans.connected += 1
+                log_success(f"[P2P] Connected orphan block height={len(self.blockchain.chain)-1} hash={block.hash[:8]}...")
+                self.loop.create_task(self._relay_block(block, exclude=peer))
+                parents.append(block.hash)
+
+    async def _handle_compact_block(self, websocket: WebSocketServerProtocol, message: dict, size_bytes: int):
+        """
+        Rebuild an announced block from the mempool, asking the sender only for the
+        transactions we do not have.
+        """
+        try:
+            header = Block.from_header(message.get("header") or {})
+            partial = PartialBlock(header, message.get("tx_count"), message.get("short_ids") or [], message.get("prefilled") or [])
+        except Exception as exc:
+            self._penalize_peer(websocket, reason=f"Invalid compact block: {exc}")
+            return
+
+        inventory = self._peer_inventory_of(websocket)
+        inventory.known.add(partial.hash)
+        if isinstance(message.get("height"), int):
+            self.peer_heights[websocket] = max(self.peer_heights.get(websocket, 0), message["height"])
+        if partial.hash in self.seen or partial.hash in self.pending_compact or self.blockchain.height_of(partial.hash) is not None:
+            inventory.duplicates += 1
+            return
+        if header.last_hash != self.blockchain.chain[-1].hash:
+            if self.blockchain.height_of(header.last_hash) is None:
+                # Likely an orphan: take the full block, which is held while its parent is fetched.
+                if self.inflight.claim(partial.hash, websocket):
+                    await self._safe_send(websocket, {
+                        "type": MESSAGE_TYPES["GET_DATA"],
+                        "items": [{"type": "block", "hash": partial.hash}],
+                    })
+                return
+            log_info(f"[P2P] Compact block {partial.hash[:8]}... does not extend our tip; starting headers sync")
+            await self._start_header_sync(websocket)
+            return
+
+        self.compact_stats["received"] += 1
+        self.compact_stats["bytes_received"] += size_bytes
+        missing = partial.fill_from_pool(self.transaction_pool.transaction_map)
+        if not missing:
+            await self._complete_compact_block(websocket, partial)
+            return
+
+        while len(self.pending_compact) >= P2P_MAX_PENDING_COMPACT_BLOCKS:
+            self.pending_compact.pop(next(iter(self.pending_compact)))
+        self.pending_compact[partial.hash] = (websocket, partial, time.time())
+        self.compact_stats["fetched_missing"] += 1
+        self.compact_stats["txs_requested"] += len(missing)
+        await self._safe_send(websocket, {
+            "type": MESSAGE_TYPES["GET_BLOCK_TXN"],
+            "hash": partial.hash,
+            "indexes": missing,
+        })
+
+    async def _handle_block_transactions(self, websocket: WebSocketServerProtocol, message: dict, size_bytes: int):
+        pending = self.pending_compact.get(message.get("hash"))
+        if not pending or pending[0] is not websocket:
+            return
+        del self.pending_compact[message.get("hash")]
+        partial = pending[1]
+        self.compact_stats["bytes_received"] += size_bytes
+        partial.add_transactions(message.get("indexes") or [], message.get("txs") or [])
+        await self._complete_compact_block(websocket, partial)
+
+    async def _complete_compact_block(self, websocket: WebSocketServerProtocol, partial: PartialBlock):
+        block = None if partial.missing() else partial.to_block()
+        if block is None:
+            # Still incomplete, or a mempool transaction shares an id with a different mined one.
+            log_debug(f"[P2P] Could not rebuild compact block {partial.hash[:8]}...; fetching it in full")
+            self.compact_stats["fallbacks"] += 1
+            self.inflight.claim(partial.hash, websocket)
+            await self._safe_send(websocket, {
+                "type": MESSAGE_TYPES["GET_DATA"],
+                "items": [{"type": "block", "hash": partial.hash}],
+            })
+            return
+        self.compact_stats["reconstructed"] += 1
+        await self._receive_block(websocket, block)
+
+    async def _send_block_transactions(self, websocket: WebSocketServerProtocol, block_hash, indexes):
+        height = self.blockchain.height_of(block_hash) if isinstance(block_hash, str) else None
+        if height is None:
+            return
+        data = self.blockchain.chain[height].data
+        indexes = [index for index in indexes[:len(data)] if isinstance(index, int) and 0 <= index < len(data)]
+        text = json.dumps({
+            "type": MESSAGE_TYPES["BLOCK_TXN"],
+            "hash": block_hash,
+            "indexes": indexes,
+            "txs": [data[index] for index in indexes],
+        })
+        inventory = self._peer_inventory_of(websocket)
+        inventory.served += 1
+        inventory.bytes_saved -= len(text)
+        await self._safe_send_text(websocket, text, MESSAGE_TYPES["BLOCK_TXN"])
+
+    def _expire_pending_compact(self):
+        now = time.time()
+        for block_hash in [
+            block_hash for block_hash, (_, _, since) in self.pending_compact.items()
+            if now - since > P2P_GETDATA_TIMEOUT_SECONDS
+        ]:
+            del self.pending_compact[block_hash]
+
+    def _peer_inventory_of(self, websocket: WebSocketServerProtocol) -> PeerInventory:
+        inventory = self.peer_inventory.get(websocket)
+        if inventory is None:
+            inventory = self.peer_inventory[websocket] = PeerInventory()
+        return inventory
+
+    def _block_text(self, block: Block) -> str:
+        """
+        BLOCK message carrying the block's stored payload text as its last member.
+        """
+        return splice_payload(
+            {"type": MESSAGE_TYPES["BLOCK"], "height": self.blockchain.height_of(block.hash)},
+            "block",
+            self.blockchain.encoded_block(block),
+        )
+
+    def _transaction_text(self, transaction: Transaction) -> str:
+        return splice_payload(
+            {"type": MESSAGE_TYPES["TRANSACTION"]},
+            "transaction",
+            self.transaction_pool.encoded(transaction),
+        )
+
+    async def _relay_block(self, block: Block, exclude: Optional[WebSocketServerProtocol] = None):
+        """
+        Push a new block as a compact block; the relayed block replaces the TIP announcement.
+        """
+        self.seen.add(block.hash)
+        if block.hash == self.blockchain.chain[-1].hash:
+            self._announced_tip = block.hash
+        compact_text = json.dumps({
+            "type": MESSAGE_TYPES["CMPCT_BLOCK"],
+            "height": self.blockchain.height_of(block.hash),
+            **compact_block_fields(block),
+        })
+        await self._announce_inventory(
+            block.hash, compact_text, lambda: self._block_text(block), MESSAGE_TYPES["CMPCT_BLOCK"], exclude=exclude
+        )
+
+    async def _relay_transaction(self, transaction: Transaction, exclude: Optional[WebSocketServerProtocol] = None):
+        self.seen.add(transaction.id)
+        inv_text = json.dumps({"type": MESSAGE_TYPES["INV"], "items": [{"type": "tx", "hash": transaction.id}]})
+        await self._announce_inventory(
+            transaction.id,
+            inv_text,
+            lambda: self._transaction_text(transaction),
+            MESSAGE_TYPES["INV"],
+            exclude=exclude,
+        )
+
+    async def _announce_inventory(self, item_hash: str, announcement: str, build_payload, msg_type: str, exclude: Optional[WebSocketServerProtocol] = None):
+        """
+        Send an announcement for one object to every peer not already known to have it. The full
+        payload text is only looked up to account for the bytes the announcement saved.
+        """
+        payload_size = None
+        # Best-scored peers first, so they get new objects before the rest.
+        for peer in self.connections.ranked(list(self.peers)):
+            if peer is exclude:
+                continue
+            inventory = self._peer_inventory_of(peer)
+            if payload_size is None:
+                payload_size = len(build_payload())
+            if item_hash in inventory.known:
+                inventory.bytes_saved += payload_size
+                continue
+            inventory.known.add(item_hash)
+            inventory.announced += 1
+            inventory.bytes_saved += payload_size - len(announcement)
+            await self._safe_send_text(peer, announcement, msg_type)
+
+    async def _handle_inv(self, websocket: WebSocketServerProtocol, items):
+        """
+        Request only the announced objects we have neither seen nor already asked someone for.
+        """
+        inventory = self._peer_inventory_of(websocket)
+        wanted = []
+        for item in items[:P2P_MAX_INV_ITEMS]:
+            if not isinstance(item, dict):
+                continue
+            kind, item_hash = item.get("type"), item.get("hash")
+            if kind not in INVENTORY_TYPES or not isinstance(item_hash, str):
+                continue
+            inventory.known.add(item_hash)
+            if self._has_inventory(kind, item_hash):
+                inventory.duplicates += 1
+                continue
+            if self.inflight.claim(item_hash, websocket):
+                wanted.append({"type": kind, "hash": item_hash})
+        if wanted:
+            await self._safe_send(websocket, {"type": MESSAGE_TYPES["GET_DATA"], "items": wanted})
+
+    def _has_inventory(self, kind: str, item_hash: str) -> bool:
+        if item_hash in self.seen:
+            return True
+        if kind == "tx":
+            return item_hash in self.transaction_pool.transaction_map
+        return self.blockchain.height_of(item_hash) is not None
+
+    async def _handle_get_data(self, websocket: WebSocketServerProtocol, items):
+        inventory = self._peer_inventory_of(websocket)
+        for item in items[:P2P_MAX_INV_ITEMS]:
+            if not isinstance(item, dict):
+                continue
+            kind, item_hash = item.get("type"), item.get("hash")
+            if kind == "tx":
+                transaction = self.transaction_pool.transaction_map.get(item_hash)
+                if transaction is None:
+                    continue
+                msg_type, text = MESSAGE_TYPES["TRANSACTION"], self._transaction_text(transaction)
+            elif kind == "block":
+                height = self.blockchain.height_of(item_hash)
+                if height is None:
+                    continue
+                msg_type, text = MESSAGE_TYPES["BLOCK"], self._block_text(self.blockchain.chain[height])
+            else:
+                continue
+            inventory.served += 1
+            inventory.bytes_saved -= len(text)
+            await self._safe_send_text(websocket, text, msg_type)
+
+    async def _send_mempool_sketch(self, websocket: WebSocketServerProtocol):
+        """
+        Reconcile mempools with a peer: send a sketch of what we hold so it answers with only
+        the transactions we are missing. Done once per connection.
+        """
+        if websocket in self.mempool_sketched or websocket not in self.peers:
+            return
+        self.mempool_sketched.add(websocket)
+        sketch = await self.validation.run("sketch", self._mempool_sketch)
+        text = json.dumps({"type": MESSAGE_TYPES["MEMPOOL_SKETCH"], "sketch": sketch.to_json()})
+        self.mempool_sync_stats["sketches_sent"] += 1
+        self.mempool_sync_stats["sketch_bytes"] += len(text)
+        await self._safe_send_text(websocket, text, MESSAGE_TYPES["MEMPOOL_SKETCH"])
+
+    async def _send_mempool_sketches(self):
+        for peer in list(self.peers):
+            await self._send_mempool_sketch(peer)
+
+    async def _handle_mempool_sketch(self, websocket: WebSocketServerProtocol, sketch_json):
+        try:
+            sketch = MempoolSketch.from_json(sketch_json)
+        except ValueError as exc:
+            log_warn(f"[P2P] Ignoring mempool sketch from {self._peer_label(websocket)}: {exc}")
+            return
+        self.mempool_sync_stats["sketches_received"] += 1
+        # Held transactions are only probably known to the peer (Bloom false positives), so
+        # they are not marked in its inventory.
+        missing, held = await self.validation.run("sketch", self._split_mempool, sketch)
+        inventory = self._peer_inventory_of(websocket)
+        # Highest fee rate first, so the peer's block template recovers fastest.
+        for start in range(0, len(missing), P2P_MEMPOOL_SYNC_BATCH):
+            batch = missing[start:start + P2P_MEMPOOL_SYNC_BATCH]
+            text = splice_payload(
+                {"type": MESSAGE_TYPES["MEMPOOL_TXS"]},
+                "transactions",
+                "[" + ", ".join(self.transaction_pool.encoded(transaction) for transaction in batch) + "]",
+            )
+            for transaction in batch:
+                inventory.known.add(transaction.id)
+            self.mempool_sync_stats["txs_sent"] += len(batch)
+            await self._safe_send_text(websocket, text, MESSAGE_TYPES["MEMPOOL_TXS"])
+        log_debug(f"[P2P] Mempool sketch from {self._peer_label(websocket)}: {len(held)} shared, {len(missing)} sent")
+
+    def _mempool_sketch(self) -> MempoolSketch:
+        """
+        Validation-thread job: Bloom filter over our mempool, highest fee rate first when capped.
+        """
+        return MempoolSketch.from_txids(
+            transaction.id for transaction in self.transaction_pool.prioritized_transactions()
+        )
+
+    def _split_mempool(self, sketch: MempoolSketch):
+        """
+        Validation-thread job: our mempool split into what a peer's sketch lacks and covers.
+        """
+        return sketch.split(self.transaction_pool.prioritized_transactions())
+
+    async def _handle_mempool_transactions(self, websocket: WebSocketServerProtocol, transactions_json, raws):
+        inventory = self._peer_inventory_of(websocket)
+        if raws is not None and len(raws) != len(transactions_json):
+            raws = None
+        transactions, encodings = [], []
+        for index, tx_json in enumerate(transactions_json[:P2P_MEMPOOL_SYNC_BATCH]):
+            if not isinstance(tx_json, dict):
+                continue
+            transaction = Transaction.from_json(tx_json)
+            inventory.known.add(transaction.id)
+            self.inflight.done(transaction.id)
+            if not self.seen.add(transaction.id):
+                continue
+            transactions.append(transaction)
+            encodings.append(raws[index] if raws is not None else None)
+        self.mempool_sync_stats["txs_received"] += len(transactions_json)
+        if not transactions:
+            return
+        accepted = await self.validation.run("mempool", self._accept_transactions, transactions, encodings)
+        self.mempool_sync_stats["txs_accepted"] += accepted
+        if accepted:
+            log_info(f"[P2P] Added {accepted} mempool transactions from {self._peer_label(websocket)}")
+
+    def _accept_transactions(self, transactions, encodings) -> int:
+        """
+        Validation-thread job: add reconciled mempool transactions, skipping any already confirmed
+        or no longer valid against our chain. Returns how many were added.
+        """
+        confirmed = self.blockchain.snapshot().transactions
+        accepted = 0
+        for transaction, encoded in zip(transactions, encodings):
+            if transaction.id in confirmed or transaction.id in self.transaction_pool.transaction_map:
+                continue
+            try:
+                self.transaction_pool.set_transaction(transaction, encoded)
+            except Exception as exc:
+                log_debug(f"[P2P] Skipped reconciled transaction {transaction.id[:8]}...: {exc}")
+                continue
+            accepted += 1
+        if accepted:
+            self._notify_change()
+        return accepted
 
-    async def _periodic_sync(self):
+    async def _periodic_tip_announce(self):
+        """
+        Replace chain polling: announce our tip when it moves and restart stalled syncs.
+        """
         while True:
             await asyncio.sleep(self.sync_interval)
-            peer = self._random_peer()
-            if peer:
-                log_debug("[P2P] Sync timer triggered; requesting chain from random peer")
-                # Ask only for blocks we don't have yet; fall back to full sync elsewhere when needed.
-                await self._request_chain(peer, start=len(self.blockchain.chain))
-
-    def _random_peer(self) -> Optional[WebSocketServerProtocol]:
-        if not self.peers:
+            sync = self.header_sync
+            if sync and sync.is_stale():
+                log_warn("[P2P] Headers sync stalled; retrying with another peer")
+                self.header_sync = None
+                await self._request_sync_any()
+            self.inflight.expire()
+            self._expire_pending_compact()
+            self.orphans.expire()
+            await self._announce_tip()
+
+    async def _maintain_connections(self):
+        """
+        Ping every peer for RTT scoring, refill free outbound slots and save the address book.
+        """
+        while True:
+            await asyncio.sleep(P2P_PING_INTERVAL_SECONDS)
+            for peer in list(self.peers):
+                score = self.connections.get(peer)
+                if score is None:
+                    continue
+                nonce = f"{random.getrandbits(64):016x}"
+                score.ping_sent(nonce)
+                await self._safe_send(peer, {"type": MESSAGE_TYPES["PING"], "nonce": nonce})
+            await self._fill_outbound()
+            if self.address_book_path and self.connections.addresses.changed:
+                try:
+                    self.connections.addresses.save(self.address_book_path)
+                except OSError as exc:
+                    log_warn(f"[P2P] Could not save address book: {exc}")
+
+    def _drop_duplicate_connection(self, websocket: WebSocketServerProtocol, address: str) -> bool:
+        """
+        Two nodes that dial each other end up with two sockets. Both sides keep the one dialed
+        by the lower address (or the older one if the same side dialed twice). Returns True if
+        `websocket` itself was closed.
+        """
+        other = self.connections.peer_with_address(address, exclude=websocket)
+        if other is None:
+            return False
+        dialer = address if self.connections.get(websocket).inbound else self.self_address
+        other_dialer = address if self.connections.get(other).inbound else self.self_address
+        if dialer == other_dialer or other_dialer == min(address, self.self_address):
+            drop = websocket
+        else:
+            drop = other
+        log_debug(f"[P2P] Closing duplicate connection with {address}")
+        self.loop.create_task(drop.close())
+        return drop is websocket
+
+    def _best_peer(self, exclude: Optional[WebSocketServerProtocol] = None) -> Optional[WebSocketServerProtocol]:
+        """
+        Best-scored peer among those with the highest known tip.
+        """
+        candidates = [peer for peer in self.peers if peer is not exclude]
+        if not candidates:
             return None
-        return random.choice(tuple(self.peers))
+        top = max(self.peer_heights.get(peer, -1) for peer in candidates)
+        return self.connections.ranked([peer for peer in candidates if self.peer_heights.get(peer, -1) == top])[0]
+
+    def _throttle_peer(self, websocket: WebSocketServerProtocol, msg_type):
+        """
+        Drop a message over the peer's budget. The peer's score sinks while it keeps flooding, so
+        it loses sync, relay and inbound-slot priority, and it is disconnected once its strikes run out.
+        """
+        self.throttled[msg_type] = self.throttled.get(msg_type, 0) + 1
+        if self.connections.over_budget(websocket):
+            log_warn(f"[P2P] Disconnecting {self._peer_label(websocket)}: kept exceeding its {msg_type} budget")
+            self._unregister_peer(websocket)
+            self.loop.create_task(websocket.close())
+        else:
+            log_debug(f"[P2P] Dropped {msg_type} from {self._peer_label(websocket)}: over budget")
+
+    def _penalize_peer(self, websocket: WebSocketServerProtocol, reason: str):
+        """
+        Charge invalid headers, a bad block or a malformed compact block to the peer that sent
+        them and restart sync. Unlike _record_invalid, our synced flag and mempool are left
+        alone: any peer can make up such data, so its failure says nothing about our own state.
+        """
+        log_warn(f"[P2P] Invalid data from {self._peer_label(websocket)} reason={reason}")
+        if self.connections.record_invalid(websocket):
+            log_warn(f"[P2P] Disconnecting {self._peer_label(websocket)} after repeated invalid data")
+            self.loop.create_task(websocket.close())
+        # The offender may still have the best tip; sync from anyone else.
+        self.loop.create_task(self._request_sync_any(exclude=websocket))
 
     def _record_invalid(self, websocket: Optional[WebSocketServerProtocol], reason: str = ""):
         # no quarantine; optionally log
         if websocket and websocket.remote_address:
             peer_address = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
             log_warn(f"[P2P] Invalid data from {peer_address} reason={reason}")
+            if self.connections.record_invalid(websocket):
+                log_warn(f"[P2P] Disconnecting {peer_address} after repeated invalid data")
+                self.loop.create_task(websocket.close())
         else:
             log_warn(f"[P2P] Invalid data reason={reason}")
         self._set_synced(False)
-        self.loop.create_task(self._request_full_sync_any(websocket))
-        self._maybe_drop_bad_transaction(reason)
-        self._purge_mempool(reason)
+        self.loop.create_task(self._request_sync_any(websocket))
+        # Mempool changes run on the validation worker with every other chain and mempool write.
+        self.validation.submit("purge", self._maybe_drop_bad_transaction, reason)
+        self.validation.submit("purge", self._purge_mempool, reason)
 
     def on_synced(self, callback):
         """
@@ -372,6 +1546,17 @@ class P2PNode:
         """
         self._sync_change_callbacks.append(callback)
 
+    def on_change(self, callback):
+        """
+        Register a callback invoked after blocks or transactions from peers change the chain or
+        the mempool. It may run on the validation thread, so it should only hand off work.
+        """
+        self._change_callbacks.append(callback)
+
+    def _notify_change(self):
+        for cb in list(self._change_callbacks):
+            self._invoke_callback(cb)
+
     def _set_synced(self, value: bool):
         prev = self.synced
         self.synced = value
@@ -382,6 +1567,7 @@ class P2PNode:
             self._invoke_callback(cb, value)
 
         if value:
+            self.loop.create_task(self._send_mempool_sketches())
             for cb in list(self._synced_callbacks):
                 self._invoke_callback(cb)
 
@@ -390,41 +1576,67 @@ class P2PNode:
         try:
             callback(*args)
         except Exception as exc:
-            log_warn(f"[P2P] Sync callback failed: {exc}")
+            log_warn(f"[P2P] Callback failed: {exc}")
 
-    async def _request_full_sync_any(self, websocket: Optional[WebSocketServerProtocol] = None):
+    async def _request_sync_any(
+        self,
+        websocket: Optional[WebSocketServerProtocol] = None,
+        exclude: Optional[WebSocketServerProtocol] = None,
+    ):
         """
-        Trigger a full chain sync request, rate-limited to avoid floods.
+        Trigger a headers-first sync, rate-limited to avoid floods: with `websocket` when it is
+        still connected, otherwise with the best peer other than `exclude`.
         """
         now = time.time()
-        if now - self.last_full_sync_request < 5:
+        if now - self.last_sync_request < 5:
             return
-        self.last_full_sync_request = now
+        self.last_sync_request = now
 
-        target = websocket if websocket and websocket in self.peers else self._random_peer()
+        target = websocket if websocket and websocket in self.peers else self._best_peer(exclude)
         if target:
-            await self._request_chain(target, start=0)
+            await self._start_header_sync(target)
 
-    def _maybe_drop_bad_transaction(self, reason: str):
+    @staticmethod
+    def _bad_transaction_id(reason: str) -> Optional[str]:
+        match = re.search(r"Transaction:?\s+([0-9a-fA-F]{8,})", reason or "")
+        return match.group(1) if match else None
+
+    def _drop_rejected_transaction(self, block: Block, reason: str):
         """
-        If an invalid-chain reason references a specific transaction id, drop it from the mempool
-        to avoid re-mining known-bad transactions.
+        Validation-thread job: drop the transaction a relayed block was rejected for, but only
+        when our mempool holds exactly the same transaction; the rest of the mempool is kept.
         """
-        if not reason:
+        txid = self._bad_transaction_id(reason)
+        transaction = self.transaction_pool.transaction_map.get(txid) if txid else None
+        if transaction is None:
             return
-        match = re.search(r"Transaction\s+([0-9a-fA-F]{8,})", reason)
-        if match:
-            txid = match.group(1)
+        # Compared as JSON: the block's dicts were parsed, ours may hold tuples (signatures).
+        ours = json.loads(self.transaction_pool.encoded(transaction))
+        if any(tx_json.get("id") == txid and tx_json == ours for tx_json in block.data):
+            self.transaction_pool.transaction_map.pop(txid, None)
+            self._notify_change()
+            log_warn(f"[P2P] Dropped transaction {txid} rejected in block {block.hash[:8]}...")
+
+    def _maybe_drop_bad_transaction(self, reason: str):
+        """
+        Validation-thread job: if an invalid-chain reason references a specific transaction id,
+        drop it from the mempool to avoid re-mining known-bad transactions.
+        """
+        txid = self._bad_transaction_id(reason)
+        if txid:
             if txid in self.transaction_pool.transaction_map:
                 self.transaction_pool.transaction_map.pop(txid, None)
+                self._notify_change()
                 log_warn(f"[P2P] Dropped bad transaction {txid} from mempool due to validation error")
 
     def _purge_mempool(self, reason: str = ""):
         """
-        Drop all pending transactions when we fail to sync/validate, to avoid re-mining junk that keeps chains diverging.
+        Validation-thread job: drop all pending transactions when we fail to sync/validate,
+        to avoid re-mining junk that keeps chains diverging.
         """
         if hasattr(self, "transaction_pool") and getattr(self.transaction_pool, "transaction_map", None) is not None:
             self.transaction_pool.transaction_map.clear()
+            self._notify_change()
             if reason:
                 log_warn(f"[P2P] Cleared mempool after sync/validation failure: {reason}")
             else:
@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+
+from backend.config import P2P_MAX_ORPHAN_BLOCKS, P2P_ORPHAN_EXPIRY_SECONDS
+
+
+class OrphanPool:
+    """
+    Bounded pool of relayed blocks whose parent we do not have yet, indexed by parent hash so
+    they connect as soon as the parent does. The oldest orphan is evicted when full.
+    """
+    def __init__(self, capacity: int = P2P_MAX_ORPHAN_BLOCKS, expiry: float = P2P_ORPHAN_EXPIRY_SECONDS):
+        self.capacity = capacity
+        self.expiry = expiry
+        # block hash -> (block, encoded text or None, peer, received at)
+        self._blocks = OrderedDict()
+        self._children = {}
+        self.added = 0
+        self.connected = 0
+        self.evicted = 0
+        self.parents_requested = 0
+
+    def add(self, block, encoded, peer) -> bool:
+        """
+        Hold an orphan. Returns False if it is already held.
+        """
+        if block.hash in self._blocks:
+            return False
+        self._blocks[block.hash] = (block, encoded, peer, time.time())
+        self._children.setdefault(block.last_hash, set()).add(block.hash)
+        self.added += 1
+        while len(self._blocks) > self.capacity:
+            self._remove(next(iter(self._blocks)))
+            self.evicted += 1
+        return True
+
+    def missing_ancestor(self, block_hash: str):
+        """
+        Walk up from a held orphan to the first ancestor we do not hold. Returns its hash and
+        how many orphans sit on top of it along the longest held branch through this one.
+        """
+        depth = self._descendant_depth(block_hash)
+        while block_hash in self._blocks:
+            block_hash = self._blocks[block_hash][0].last_hash
+            depth += 1
+        return block_hash, depth
+
+    def _descendant_depth(self, block_hash: str) -> int:
+        # Parents of a relayed tip are fetched one by one, so a new orphan is usually the bottom of its branch.
+        depth = 0
+        level = [block_hash]
+        while True:
+            level = [child for parent in level for child in self._children.get(parent, ())]
+            if not level:
+                return depth
+            depth += 1
+
+    def pop_children(self, parent_hash: str):
+        """
+        Remove and return the orphans built directly on `parent_hash` as (block, encoded, peer).
+        """
+        children = []
+        for block_hash in list(self._children.get(parent_hash, ())):
+            block, encoded, peer, _ = self._blocks[block_hash]
+            self._remove(block_hash)
+            children.append((block, encoded, peer))
+        return children
+
+    def discard_descendants(self, block_hash: str) -> int:
+        """
+        Drop every orphan built on `block_hash`, e.g. after it turned out invalid.
+        """
+        dropped = 0
+        parents = [block_hash]
+        while parents:
+            for block, _, _ in self.pop_children(parents.pop()):
+                parents.append(block.hash)
+                dropped += 1
+        return dropped
+
+    def expire(self):
+        now = time.time()
+        for block_hash in [
+            block_hash for block_hash, (_, _, _, since) in self._blocks.items() if now - since > self.expiry
+        ]:
+            self._remove(block_hash)
+            self.evicted += 1
+
+    def _remove(self, block_hash: str):
+        block = self._blocks.pop(block_hash)[0]
+        siblings = self._children.get(block.last_hash)
+        if siblings is not None:
+            siblings.discard(block_hash)
+            if not siblings:
+                del self._children[block.last_hash]
+
+    def __contains__(self, block_hash) -> bool:
+        return block_hash in self._blocks
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def to_json(self):
+        return {
+            "held": len(self._blocks),
+            "added": self.added,
+            "connected": self.connected,
+            "evicted": self.evicted,
+            "parents_requested": self.parents_requested,
+        }
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import deque
+
+from backend.config import P2P_OUTBOUND_QUEUE_DEPTH
+
+
+PRIORITY_CONTROL = 0
+PRIORITY_BLOCK = 1
+PRIORITY_TRANSACTION = 2
+
+MESSAGE_PRIORITIES = {
+    "BLOCK": PRIORITY_BLOCK,
+    "CMPCT_BLOCK": PRIORITY_BLOCK,
+    "BLOCK_TXN": PRIORITY_BLOCK,
+    "CHAIN_SEGMENT": PRIORITY_BLOCK,
+    "TRANSACTION": PRIORITY_TRANSACTION,
+    "INV": PRIORITY_TRANSACTION,
+    "MEMPOOL_SKETCH": PRIORITY_TRANSACTION,
+    "MEMPOOL_TXS": PRIORITY_TRANSACTION,
+}
+
+
+def message_priority(msg_type) -> int:
+    """
+    Handshake, sync requests and acks go first, then blocks, then transaction gossip.
+    """
+    return MESSAGE_PRIORITIES.get(msg_type, PRIORITY_CONTROL)
+
+
+class OutboundQueue:
+    """
+    Bounded per-peer send queue drained by one writer task, highest priority first.
+    When full, the newest message of the lowest priority level at or below the incoming
+    one is dropped; control messages are never dropped, the queue reports overflow instead.
+    """
+    def __init__(self, depth: int = P2P_OUTBOUND_QUEUE_DEPTH):
+        self.depth = depth
+        self.levels = [deque(), deque(), deque()]
+        self.size = 0
+        self.sent = 0
+        self.dropped = 0
+        self.overflowed = False
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+
+    def push(self, text: str, priority: int = PRIORITY_CONTROL) -> bool:
+        """
+        Queue a message. Returns False if it (or a lower-priority message) had to be dropped.
+        """
+        if self.closed:
+            return False
+        accepted = True
+        if self.size >= self.depth:
+            victim = next(
+                (level for level in range(len(self.levels) - 1, priority - 1, -1) if self.levels[level]),
+                None,
+            )
+            if victim is None or victim == PRIORITY_CONTROL:
+                if priority == PRIORITY_CONTROL:
+                    self.overflowed = True
+                self.dropped += 1
+                return False
+            self.levels[victim].pop()
+            self.size -= 1
+            self.dropped += 1
+            accepted = False
+        self.levels[priority].append((text, time.time()))
+        self.size += 1
+        self._ready.set()
+        self._drained.clear()
+        return accepted
+
+    async def get(self):
+        """
+        Next message to write, or None once the queue is closed.
+        """
+        while not self.closed:
+            for level in self.levels:
+                if level:
+                    text, _ = level.popleft()
+                    self.size -= 1
+                    if not self.size:
+                        self._drained.set()
+                    return text
+            self._ready.clear()
+            await self._ready.wait()
+        return None
+
+    def queued(self, priority: int) -> int:
+        return len(self.levels[priority])
+
+    async def wait_for_room(self, priority: int, limit: int):
+        """
+        Wait until fewer than `limit` messages of this priority are waiting to be written.
+        """
+        while not self.closed and self.queued(priority) >= limit:
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+
+    def lag(self) -> float:
+        """
+        Age in seconds of the oldest message still waiting.
+        """
+        oldest = [level[0][1] for level in self.levels if level]
+        return time.time() - min(oldest) if oldest else 0.0
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self._drained.set()
+
+    def to_json(self):
+        return {
+            "queued": self.size,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag_seconds": round(self.lag(), 3),
+        }
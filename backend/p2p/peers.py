@@ -0,0 +1,171 @@
+import math
+import time
+
+from backend.config import (
+    P2P_TARGET_OUTBOUND,
+    P2P_MAX_INBOUND,
+    P2P_PEER_MAX_INVALID_EVENTS,
+)
+from backend.p2p.address_book import AddressBook
+from backend.p2p.budget import MessageBudget
+
+
+# Score weights: up to 100 points for throughput, minus up to 100 for latency, 100 per invalid message
+# and up to 100 while the peer keeps exceeding its message budgets.
+LATENCY_PENALTY_PER_SECOND = 50
+MAX_LATENCY_PENALTY = 100
+UNKNOWN_RTT_SECONDS = 1.0
+THROUGHPUT_POINTS_PER_DOUBLING = 5
+MAX_THROUGHPUT_POINTS = 100
+INVALID_PENALTY = 100
+MAX_BUDGET_PENALTY = 100
+RTT_SMOOTHING = 0.3
+
+
+class PeerScore:
+    """
+    Quality of one connected peer, from PING/PONG round trips, useful bytes delivered, invalid
+    data and how hard it pushes against its message budgets.
+    """
+    def __init__(self, inbound: bool, address=None):
+        self.inbound = inbound
+        self.address = address
+        self.connected_at = time.time()
+        self.rtt = None
+        self.ping = None
+        self.useful_bytes = 0
+        self.invalid = 0
+        self.budget = MessageBudget()
+
+    def ping_sent(self, nonce: str):
+        self.ping = (nonce, time.time())
+
+    def pong_received(self, nonce) -> bool:
+        """
+        Fold a round trip into the smoothed RTT. Peers that echo no nonce match the last ping.
+        """
+        if self.ping is None or (nonce is not None and nonce != self.ping[0]):
+            return False
+        sample = time.time() - self.ping[1]
+        self.rtt = sample if self.rtt is None else (1 - RTT_SMOOTHING) * self.rtt + RTT_SMOOTHING * sample
+        self.ping = None
+        return True
+
+    def throughput(self) -> float:
+        """
+        Useful payload bytes per second since the connection opened.
+        """
+        return self.useful_bytes / max(1.0, time.time() - self.connected_at)
+
+    def score(self) -> float:
+        rtt = self.rtt if self.rtt is not None else UNKNOWN_RTT_SECONDS
+        latency_penalty = min(MAX_LATENCY_PENALTY, rtt * LATENCY_PENALTY_PER_SECOND)
+        throughput_points = min(
+            MAX_THROUGHPUT_POINTS, math.log2(1 + self.throughput() / 1024) * THROUGHPUT_POINTS_PER_DOUBLING
+        )
+        budget_penalty = self.budget.pressure() * MAX_BUDGET_PENALTY
+        return throughput_points - latency_penalty - self.invalid * INVALID_PENALTY - budget_penalty
+
+    def to_json(self):
+        return {
+            "inbound": self.inbound,
+            "address": self.address,
+            "rtt_ms": None if self.rtt is None else round(self.rtt * 1000, 1),
+            "bytes_per_second": round(self.throughput(), 1),
+            "invalid": self.invalid,
+            "score": round(self.score(), 1),
+            "budget": self.budget.to_json(),
+        }
+
+
+class ConnectionManager:
+    """
+    Keeps the node at `target_outbound` outbound and at most `max_inbound` inbound connections,
+    scores connected peers, and ranks them for sync and relay.
+    """
+    def __init__(self, seeds=(), target_outbound: int = P2P_TARGET_OUTBOUND, max_inbound: int = P2P_MAX_INBOUND,
+                 addresses=None):
+        self.target_outbound = target_outbound
+        self.max_inbound = max_inbound
+        self.addresses = addresses if addresses is not None else AddressBook(seeds)
+        self.peers = {}
+
+    def add(self, peer, inbound: bool, address=None) -> PeerScore:
+        score = PeerScore(inbound, address)
+        self.peers[peer] = score
+        return score
+
+    def remove(self, peer):
+        self.peers.pop(peer, None)
+
+    def get(self, peer):
+        return self.peers.get(peer)
+
+    def outbound_count(self) -> int:
+        return sum(1 for score in self.peers.values() if not score.inbound)
+
+    def inbound_count(self) -> int:
+        return sum(1 for score in self.peers.values() if score.inbound)
+
+    def connected_addresses(self):
+        return {score.address for score in self.peers.values() if score.address}
+
+    def peer_with_address(self, address: str, exclude=None):
+        for peer, score in self.peers.items():
+            if peer is not exclude and score.address == address:
+                return peer
+        return None
+
+    def dial_candidates(self, connecting=()):
+        """
+        Addresses to dial to get back to the outbound target.
+        """
+        wanted = self.target_outbound - self.outbound_count() - len(connecting)
+        if wanted <= 0:
+            return []
+        exclude = self.connected_addresses() | set(connecting)
+        return self.addresses.candidates(exclude)[:wanted]
+
+    def record_invalid(self, peer) -> bool:
+        """
+        Count an invalid message. Returns True once the peer should be disconnected.
+        """
+        score = self.peers.get(peer)
+        if score is None:
+            return False
+        score.invalid += 1
+        return score.invalid >= P2P_PEER_MAX_INVALID_EVENTS
+
+    def admit(self, peer, msg_type, cost: float) -> bool:
+        """
+        Charge a received message to the peer's budget. Returns False if it should be dropped.
+        """
+        score = self.peers.get(peer)
+        return score is None or score.budget.admit(msg_type, cost)
+
+    def over_budget(self, peer) -> bool:
+        """
+        True once the peer kept exceeding its budgets long enough to be disconnected.
+        """
+        score = self.peers.get(peer)
+        return score is not None and score.budget.exhausted()
+
+    def ranked(self, peers):
+        """
+        `peers` ordered best score first.
+        """
+        return sorted(peers, key=lambda peer: self.peers[peer].score() if peer in self.peers else 0.0, reverse=True)
+
+    def worst_inbound(self):
+        inbound = [peer for peer, score in self.peers.items() if score.inbound]
+        return self.ranked(inbound)[-1] if inbound else None
+
+    def to_json(self, label):
+        return {
+            "outbound": self.outbound_count(),
+            "inbound": self.inbound_count(),
+            "target_outbound": self.target_outbound,
+            "max_inbound": self.max_inbound,
+            "known_addresses": len(self.addresses),
+            "peers": {label(peer): score.to_json() for peer, score in self.peers.items()},
+        }
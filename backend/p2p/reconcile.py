@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import os
+from itertools import islice
+
+from backend.config import P2P_MEMPOOL_SYNC_MAX_TXS, P2P_MEMPOOL_SKETCH_BITS_PER_TX, P2P_MEMPOOL_SKETCH_HASHES
+
+SKETCH_MIN_BITS = 64
+SKETCH_MAX_HASHES = 16
+SALT_BYTES = 8
+
+
+class MempoolSketch:
+    """
+    Bloom filter over the ids of a mempool, sent so a peer answers with only the transactions
+    the filter does not cover. A false positive (about 1% at the default sizing) only means one
+    transaction is not pushed on this connection; it still arrives by gossip or in a block.
+    Every sketch gets a fresh salt, so the same transaction is not missed twice in a row.
+    """
+    def __init__(self, bits: int, hashes: int, salt: bytes, filter_bytes: bytearray, count: int = 0):
+        self.bits = bits
+        self.hashes = hashes
+        self.salt = salt
+        self.filter = filter_bytes
+        self.count = count
+
+    @classmethod
+    def from_txids(cls, txids, limit: int = P2P_MEMPOOL_SYNC_MAX_TXS,
+                   bits_per_tx: int = P2P_MEMPOOL_SKETCH_BITS_PER_TX, hashes: int = P2P_MEMPOOL_SKETCH_HASHES):
+        txids = list(islice(txids, limit))
+        bits = max(SKETCH_MIN_BITS, len(txids) * bits_per_tx)
+        bits += -bits % 8
+        sketch = cls(bits, hashes, os.urandom(SALT_BYTES), bytearray(bits // 8), len(txids))
+        for txid in txids:
+            for position in sketch._positions(txid):
+                sketch.filter[position >> 3] |= 1 << (position & 7)
+        return sketch
+
+    def _positions(self, txid: str):
+        # Double hashing: k positions from two 64-bit halves of one keyed digest.
+        digest = hashlib.blake2b(txid.encode(), digest_size=16, key=self.salt).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    def __contains__(self, txid: str) -> bool:
+        return all(self.filter[position >> 3] & (1 << (position & 7)) for position in self._positions(txid))
+
+    def to_json(self):
+        return {
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "salt": self.salt.hex(),
+            "count": self.count,
+            "filter": base64.b64encode(bytes(self.filter)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_json(cls, sketch_json):
+        """
+        Raises ValueError for a malformed sketch.
+        """
+        if not isinstance(sketch_json, dict):
+            raise ValueError("Sketch must be an object")
+        bits, hashes, count = sketch_json.get("bits"), sketch_json.get("hashes"), sketch_json.get("count", 0)
+        salt, encoded = sketch_json.get("salt"), sketch_json.get("filter")
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in (bits, hashes, count)):
+            raise ValueError("Malformed mempool sketch")
+        if not isinstance(salt, str) or not isinstance(encoded, str):
+            raise ValueError("Malformed mempool sketch")
+        if bits < SKETCH_MIN_BITS or bits % 8 or not 1 <= hashes <= SKETCH_MAX_HASHES or count < 0:
+            raise ValueError("Malformed mempool sketch")
+        if bits > max(SKETCH_MIN_BITS, P2P_MEMPOOL_SYNC_MAX_TXS * P2P_MEMPOOL_SKETCH_BITS_PER_TX):
+            raise ValueError("Mempool sketch is too large")
+        try:
+            salt_bytes = bytes.fromhex(salt)
+            filter_bytes = bytearray(base64.b64decode(encoded, validate=True))
+        except ValueError:
+            raise ValueError("Malformed mempool sketch")
+        if len(salt_bytes) != SALT_BYTES or len(filter_bytes) != bits // 8:
+            raise ValueError("Malformed mempool sketch")
+        return cls(bits, hashes, salt_bytes, filter_bytes, count)
+
+    def split(self, transactions):
+        """
+        Partition our transactions into (missing, held): those the filter does not cover and
+        those the peer most likely already has.
+        """
+        missing, held = [], []
+        for transaction in transactions:
+            if transaction.id in self:
+                held.append(transaction)
+            else:
+                missing.append(transaction)
+        return missing, held
+
+    def __len__(self) -> int:
+        return self.count
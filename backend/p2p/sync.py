@@ -0,0 +1,262 @@
+import asyncio
+import time
+from collections import deque
+
+from backend.config import (
+    P2P_SYNC_TIMEOUT_SECONDS,
+    P2P_SEGMENT_WINDOW,
+    P2P_DOWNLOAD_RANGE_BLOCKS,
+    P2P_DOWNLOAD_WINDOW_BLOCKS,
+    P2P_DOWNLOAD_STALL_SECONDS,
+)
+
+
+class HeaderSync:
+    """
+    State of the header phase of a headers-first sync: the header chain downloaded
+    from one peer past the fork point.
+    """
+    def __init__(self, peer):
+        self.peer = peer
+        self.start = None
+        self.headers = []
+        self.last_activity = time.time()
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def is_stale(self) -> bool:
+        return time.time() - self.last_activity > P2P_SYNC_TIMEOUT_SECONDS
+
+    @property
+    def end(self) -> int:
+        """
+        Height one past the last downloaded header.
+        """
+        return self.start + len(self.headers)
+
+
+class PeerThroughput:
+    """
+    Cumulative body-download statistics for one peer.
+    """
+    def __init__(self):
+        self.blocks = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.ranges = 0
+        self.stalls = 0
+        self.failures = 0
+
+    def blocks_per_second(self) -> float:
+        return self.blocks / self.seconds if self.seconds > 0 else 0.0
+
+    def to_json(self):
+        return {
+            "blocks": self.blocks,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "blocks_per_second": round(self.blocks_per_second(), 2),
+            "bytes_per_second": round(self.bytes / self.seconds, 1) if self.seconds > 0 else 0.0,
+            "ranges": self.ranges,
+            "stalls": self.stalls,
+            "failures": self.failures,
+        }
+
+
+class DownloadRange:
+    """
+    A contiguous height range [start, end) assigned to at most one peer at a time.
+    """
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.next = start
+        self.peer = None
+        self.label = None
+        self.last_activity = time.time()
+
+
+class BlockDownload:
+    """
+    Body download for a header chain, split into height ranges fetched from several peers
+    at once. Blocks land in a buffer and are handed out strictly in height order; ranges
+    are only scheduled within a window past the connect point so the buffer stays bounded.
+    """
+    def __init__(self, headers_start: int, headers, validator, next_height: int, source, stats=None,
+                 range_blocks: int = P2P_DOWNLOAD_RANGE_BLOCKS, window_blocks: int = P2P_DOWNLOAD_WINDOW_BLOCKS,
+                 stall_seconds: float = P2P_DOWNLOAD_STALL_SECONDS):
+        self.headers_start = headers_start
+        self.headers = headers
+        self.validator = validator
+        self.source = source
+        self.next_height = next_height
+        self.end = headers_start + len(headers)
+        self.window_blocks = window_blocks
+        self.stall_seconds = stall_seconds
+        self.pending = deque(
+            DownloadRange(start, min(self.end, start + range_blocks))
+            for start in range(next_height, self.end, range_blocks)
+        )
+        self.active = {}
+        self.buffer = {}
+        self.encodings = {}
+        self.suppliers = {}
+        self.excluded = set()
+        self.stalled = {}
+        self.stats = stats if stats is not None else {}
+        # Connected-in-order batches still running on the validation worker.
+        self.validating = 0
+        self.last_progress = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.next_height >= self.end and not self.validating
+
+    def expected_hash(self, height: int):
+        index = height - self.headers_start
+        if 0 <= index < len(self.headers):
+            return self.headers[index].hash
+        return None
+
+    def assign(self, peer, label: str):
+        """
+        Hand the next schedulable range to an idle peer, or None.
+        """
+        if peer in self.active or peer in self.excluded or not self.pending:
+            return None
+        # A peer that just stalled sits out one stall period so others pick up its range.
+        if time.time() - self.stalled.get(peer, 0) < self.stall_seconds:
+            return None
+        download_range = self.pending[0]
+        if download_range.next >= self.next_height + self.window_blocks:
+            return None
+        self.pending.popleft()
+        download_range.peer = peer
+        download_range.label = label
+        download_range.last_activity = time.time()
+        self.active[peer] = download_range
+        return download_range
+
+    def receive(self, peer, start: int, blocks, size_bytes: int, encodings=None) -> DownloadRange:
+        """
+        Buffer a chunk for the peer's range after checking it against the headers, along with
+        the JSON text of each block when known. Raises if the chunk does not continue the
+        range or does not match.
+        """
+        download_range = self.active.get(peer)
+        if download_range is None or start != download_range.next:
+            raise Exception(f"Unexpected chain segment from height {start}")
+        if download_range.next + len(blocks) > download_range.end:
+            raise Exception("Chain segment runs past the assigned range")
+        for offset, block in enumerate(blocks):
+            height = start + offset
+            if block.hash != self.expected_hash(height):
+                raise Exception(f"Block at height {height} does not match its header")
+
+        now = time.time()
+        peer_stats = self._stats_for(download_range.label)
+        peer_stats.blocks += len(blocks)
+        peer_stats.bytes += size_bytes
+        peer_stats.seconds += now - download_range.last_activity
+        download_range.last_activity = now
+
+        for offset, block in enumerate(blocks):
+            self.buffer[start + offset] = block
+            self.suppliers[start + offset] = peer
+            if encodings is not None:
+                self.encodings[start + offset] = encodings[offset]
+        download_range.next += len(blocks)
+        if download_range.next >= download_range.end:
+            peer_stats.ranges += 1
+            del self.active[peer]
+        return download_range
+
+    def ready_blocks(self):
+        """
+        Pop buffered blocks that continue the connect point, in height order, as
+        (height, block, encoded text or None, supplier).
+        """
+        while self.next_height in self.buffer:
+            height = self.next_height
+            block = self.buffer.pop(height)
+            encoded = self.encodings.pop(height, None)
+            supplier = self.suppliers.pop(height, None)
+            self.next_height += 1
+            self.last_progress = time.time()
+            yield height, block, encoded, supplier
+
+    def release(self, peer, stalled: bool = False, failed: bool = False):
+        """
+        Return the unfinished part of a peer's range to the front of the queue.
+        """
+        download_range = self.active.pop(peer, None)
+        if download_range is None:
+            return
+        peer_stats = self._stats_for(download_range.label)
+        if stalled:
+            peer_stats.stalls += 1
+            self.stalled[peer] = time.time()
+        if failed:
+            peer_stats.failures += 1
+            self.excluded.add(peer)
+        if download_range.next < download_range.end:
+            remainder = DownloadRange(download_range.next, download_range.end)
+            self.pending.appendleft(remainder)
+
+    def stalled_peers(self):
+        now = time.time()
+        return [
+            peer for peer, download_range in self.active.items()
+            if now - download_range.last_activity > self.stall_seconds
+        ]
+
+    def _stats_for(self, label: str) -> PeerThroughput:
+        if label not in self.stats:
+            self.stats[label] = PeerThroughput()
+        return self.stats[label]
+
+
+class SegmentStream:
+    """
+    Outbound chunked CHAIN_SEGMENT transfer. When the requester acknowledges chunks, at most
+    `window` chunks are in flight and the sender waits for SEGMENT_ACK before sending more.
+    """
+    def __init__(self, start: int, end: int, acked: bool, window: int = P2P_SEGMENT_WINDOW):
+        self.start = start
+        self.end = end
+        self.acked = acked
+        self.window = window
+        self.next_height = start
+        self.in_flight = deque()
+        self.cancelled = False
+        self._progress = asyncio.Event()
+
+    def chunk_sent(self, end_height: int):
+        self.next_height = end_height
+        self.in_flight.append(end_height)
+
+    def ack(self, next_height: int):
+        """
+        The receiver has processed every block below `next_height`.
+        """
+        while self.in_flight and self.in_flight[0] <= next_height:
+            self.in_flight.popleft()
+        self._progress.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._progress.set()
+
+    async def wait_for_window(self) -> bool:
+        """
+        Block while the window is full. Returns False if the stream was cancelled or the
+        receiver stopped acknowledging.
+        """
+        while self.acked and len(self.in_flight) >= self.window and not self.cancelled:
+            self._progress.clear()
+            try:
+                await asyncio.wait_for(self._progress.wait(), P2P_SYNC_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                return False
+        return not self.cancelled
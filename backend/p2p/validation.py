@@ -0,0 +1,106 @@
+import asyncio
+import queue
+import threading
+import time
+
+from backend.util.log import log_warn
+
+
+class ValidationStats:
+    """
+    Latency of one kind of validation job: time waiting in the queue plus time running.
+    """
+    def __init__(self):
+        self.jobs = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_latency = 0.0
+
+    def record(self, waited: float, ran: float, failed: bool):
+        self.jobs += 1
+        self.failures += int(failed)
+        self.wait_seconds += waited
+        self.run_seconds += ran
+        self.max_latency = max(self.max_latency, waited + ran)
+
+    def to_json(self):
+        jobs = max(1, self.jobs)
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "avg_wait_ms": round(1000 * self.wait_seconds / jobs, 3),
+            "avg_run_ms": round(1000 * self.run_seconds / jobs, 3),
+            "max_latency_ms": round(1000 * self.max_latency, 3),
+        }
+
+
+class ValidationWorker:
+    """
+    Run block, chain and transaction validation on a dedicated thread fed by a FIFO queue.
+    Jobs run one at a time in submission order while holding `lock` (the blockchain's), so
+    every chain and mempool change made on behalf of peers is serialized with the miner and
+    the API while the event loop only does I/O and dispatch.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, name: str = "p2p-validation", lock=None):
+        self.loop = loop
+        self.lock = lock if lock is not None else threading.RLock()
+        self.jobs = queue.Queue()
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+
+    def run(self, kind: str, fn, *args) -> asyncio.Future:
+        """
+        Queue `fn(*args)` from the event loop; the returned future resolves on the loop.
+        """
+        future = self.loop.create_future()
+        self.jobs.put((kind, fn, args, future, time.perf_counter()))
+        return future
+
+    def submit(self, kind: str, fn, *args):
+        """
+        Queue `fn(*args)` without a result for the caller; a failure is logged here instead.
+        """
+        self.jobs.put((kind, fn, args, None, time.perf_counter()))
+
+    def depth(self) -> int:
+        return self.jobs.qsize()
+
+    def _run(self):
+        while True:
+            kind, fn, args, future, queued_at = self.jobs.get()
+            started = time.perf_counter()
+            result = error = None
+            try:
+                with self.lock:
+                    result = fn(*args)
+            except Exception as exc:
+                error = exc
+            finished = time.perf_counter()
+            with self._lock:
+                if kind not in self.stats:
+                    self.stats[kind] = ValidationStats()
+                self.stats[kind].record(started - queued_at, finished - started, error is not None)
+            if future is not None:
+                self.loop.call_soon_threadsafe(self._resolve, future, result, error)
+            elif error is not None:
+                log_warn(f"[P2P] Validation job {kind} failed: {error}")
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result, error):
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def to_json(self):
+        with self._lock:
+            jobs = {kind: stats.to_json() for kind, stats in self.stats.items()}
+        return {"queue_depth": self.depth(), "jobs": jobs}
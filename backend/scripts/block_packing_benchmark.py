@@ -0,0 +1,57 @@
+import random
+import time
+
+from backend.blockchain.block import Block
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.config import MAX_BLOCK_BYTES, BLOCK_RESERVED_BYTES, SECONDS
+
+MEMPOOL_SIZES = [1_000, 10_000, 50_000, 100_000]
+
+
+def synthetic_transaction(index):
+    """
+    Build an unsigned transaction with a random output fan-out and fee; packing never
+    checks signatures so this is enough to exercise the template builder.
+    """
+    outputs = {
+        f"{random.getrandbits(160):040x}": random.randint(1, 10_000)
+        for _ in range(random.choice([1, 1, 1, 2, 3, 50, 200]))
+    }
+    tx = Transaction(
+        id=f"{index:08x}",
+        output=outputs,
+        input={
+            "timestamp": time.time_ns(),
+            "amount": sum(outputs.values()),
+            "address": f"{random.getrandbits(160):040x}",
+            "public_key": "00" * 65,
+            "signature": [random.getrandbits(256), random.getrandbits(256)],
+            "fee": random.randint(10_000, 2_000_000),
+        },
+    )
+    return tx
+
+
+for size in MEMPOOL_SIZES:
+    transaction_pool = TransactionPool()
+    for i in range(size):
+        tx = synthetic_transaction(i)
+        transaction_pool.transaction_map[tx.id] = tx
+
+    start_time = time.time_ns()
+    selected = transaction_pool.block_template()
+    elapsed = (time.time_ns() - start_time) / SECONDS
+
+    # Miners rebuild templates continuously; later builds reuse cached tx sizes.
+    start_time = time.time_ns()
+    transaction_pool.block_template()
+    warm_elapsed = (time.time_ns() - start_time) / SECONDS
+
+    data = [tx.to_json() for tx in selected]
+    fees = sum(tx.input["fee"] for tx in selected)
+
+    print(f'Mempool size: {size}')
+    print(f'Packing time: {elapsed:.3f}s (warm: {warm_elapsed:.3f}s)')
+    print(f'Selected txs: {len(selected)} fees: {fees}')
+    print(f'Block bytes: {Block.data_size(data)} / {MAX_BLOCK_BYTES - BLOCK_RESERVED_BYTES}\n')
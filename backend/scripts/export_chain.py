@@ -0,0 +1,138 @@
+"""
+Export a running node's chain as newline-delimited JSON for indexers.
+
+Streams GET /export into a file (or stdout) in constant memory: one block per line, or with
+--kind transactions one flattened transaction per line. With --resume an existing output
+file is continued after its last complete line (after checking that its last block is still
+on the node's chain), and --follow keeps appending new blocks as they arrive.
+
+    python -m backend.scripts.export_chain --url http://localhost:5000 --kind transactions -o txs.ndjson --resume --follow
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+
+class ReorgError(Exception):
+    pass
+
+
+def line_position(line: dict, kind: str):
+    """
+    (height, index within the block, block hash) of an exported line.
+    """
+    if kind == "blocks":
+        return line["height"], None, line["block"]["hash"]
+    return line["height"], line["index"], line["block_hash"]
+
+
+def last_position(path: str, kind: str):
+    """
+    Position of the last complete line of an export file, or None if it has none. A partial
+    line left by an interrupted run is truncated away.
+    """
+    try:
+        export_file = open(path, "rb+")
+    except FileNotFoundError:
+        return None
+    with export_file:
+        end = export_file.seek(0, os.SEEK_END)
+        tail = b""
+        offset = end
+        # read backwards until the tail holds a complete line before any partial one
+        while offset > 0 and tail.count(b"\n") < 2:
+            step = min(64 * 1024, offset)
+            offset -= step
+            export_file.seek(offset)
+            tail = export_file.read(step) + tail
+        complete_end = tail.rfind(b"\n") + 1
+        if offset + complete_end < end:
+            export_file.truncate(offset + complete_end)
+        lines = tail[:complete_end].splitlines()
+        if not lines:
+            return None
+        return line_position(json.loads(lines[-1]), kind)
+
+
+def verify_position(session, url: str, height: int, block_hash: str):
+    response = session.get(f"{url}/blocks", params={"from": height, "limit": 1}, timeout=30)
+    response.raise_for_status()
+    blocks = response.json()["blocks"]
+    if not blocks or blocks[0]["hash"] != block_hash:
+        raise ReorgError(f"block {block_hash[:12]} at height {height} is no longer on the node's chain")
+
+
+def export(session, url: str, kind: str, start: int, end, out, after=None):
+    """
+    Append heights start..end to `out`, skipping lines at or before the `after` position.
+    Returns the position of the last line written (or `after` when nothing was written).
+    """
+    params = {"kind": kind, "from": start}
+    if end is not None:
+        params["to"] = end
+    position = after
+    with session.get(f"{url}/export", params=params, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        for raw in response.iter_lines():
+            if not raw:
+                continue
+            line_height, index, block_hash = line_position(json.loads(raw), kind)
+            if after is not None and (line_height, index or 0) <= (after[0], after[1] or 0):
+                continue
+            out.write(raw.decode() + "\n")
+            position = (line_height, index, block_hash)
+    out.flush()
+    return position
+
+
+def run(args, out):
+    session = requests.Session()
+    url = args.url.rstrip("/")
+    position = last_position(args.output, args.kind) if args.resume and args.output else None
+    start = args.start
+    if position is not None:
+        verify_position(session, url, position[0], position[2])
+        # transactions resume inside the last block, in case it was cut off mid-block
+        start = position[0] + (1 if args.kind == "blocks" else 0)
+    while True:
+        position = export(session, url, args.kind, start, args.end, out, after=position)
+        if position is not None:
+            start = position[0] + 1
+        if not args.follow or (args.end is not None and start > args.end):
+            return
+        time.sleep(args.interval)
+        if position is not None:
+            verify_position(session, url, position[0], position[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", default="http://localhost:5000", help="node API base URL")
+    parser.add_argument("--kind", choices=["blocks", "transactions"], default="blocks")
+    parser.add_argument("--from", dest="start", type=int, default=0, help="first height to export")
+    parser.add_argument("--to", dest="end", type=int, default=None, help="last height to export (default: the tip)")
+    parser.add_argument("-o", "--output", help="file to append to (default: stdout)")
+    parser.add_argument("--resume", action="store_true", help="continue after the last complete line of --output")
+    parser.add_argument("--follow", action="store_true", help="keep exporting new blocks as they arrive")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --follow")
+    args = parser.parse_args()
+
+    out = open(args.output, "a") if args.output else sys.stdout
+    try:
+        run(args, out)
+    except ReorgError as exc:
+        print(f"Stopped: {exc}; re-export from an earlier height with --from.", file=sys.stderr)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
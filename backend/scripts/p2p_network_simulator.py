@@ -0,0 +1,358 @@
+"""
+In-process P2P network simulator and propagation benchmark.
+
+Starts N P2PNode/Blockchain/TransactionPool instances on localhost ports, delays every
+received message by a simulated one-way link latency (with jitter and loss), injects
+transactions and mined blocks, and reports propagation percentiles, the sync time of a
+late-joining node, the fork rate and the bytes put on the wire.
+
+    python -m backend.scripts.p2p_network_simulator --nodes 12 --latency-ms 40 --loss 0.02
+
+Loss is modelled the way websockets see it over TCP: a lost message is retransmitted and
+arrives one retransmission timeout late, holding back the messages behind it.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+
+from backend.blockchain.block import Block
+from backend.blockchain.blockchain import Blockchain
+from backend.config import MINE_RATE, MINING_REWARD_INPUT
+from backend.economics import block_reward
+from backend.p2p.node import P2PNode
+from backend.util.crypto_hash import crypto_hash
+from backend.util.hex_to_binary import hex_to_binary
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet
+
+POLL_SECONDS = 0.002
+MIN_RETRANSMIT_SECONDS = 0.2
+
+
+class SimulatedNode(P2PNode):
+    """
+    P2PNode whose inbound messages cross a simulated link before they are handled. Each
+    connection keeps its own ordered delivery queue, so latency pipelines like a real link.
+    """
+    def __init__(self, *args, latency=0.0, jitter=0.0, loss=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self._links = {}
+
+    async def _handle_message(self, websocket, raw_message):
+        link = self._links.get(websocket)
+        if link is None:
+            queue = asyncio.Queue()
+            link = self._links[websocket] = {
+                "queue": queue,
+                "last": 0.0,
+                "task": self.loop.create_task(self._deliver(websocket, queue)),
+            }
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        if random.random() < self.loss:
+            delay += max(MIN_RETRANSMIT_SECONDS, 2 * self.latency)
+        link["last"] = max(link["last"], time.monotonic() + delay)
+        link["queue"].put_nowait((link["last"], raw_message))
+
+    async def _deliver(self, websocket, queue):
+        while True:
+            deliver_at, raw_message = await queue.get()
+            await asyncio.sleep(max(0.0, deliver_at - time.monotonic()))
+            await super()._handle_message(websocket, raw_message)
+
+    def _unregister_peer(self, websocket):
+        link = self._links.pop(websocket, None)
+        if link:
+            link["task"].cancel()
+        super()._unregister_peer(websocket)
+
+
+def mine_block(last_block, data):
+    """
+    Mine on a simulated clock one MINE_RATE after the parent, which keeps difficulty minimal.
+    """
+    timestamp = last_block.timestamp + MINE_RATE
+    difficulty = Block.adjust_difficulty(last_block, timestamp)
+    nonce = 0
+    while True:
+        hash = crypto_hash(timestamp, last_block.hash, data, difficulty, nonce)
+        if hex_to_binary(hash)[0:difficulty] == '0' * difficulty:
+            return Block(timestamp, last_block.hash, hash, data, difficulty, nonce)
+        nonce += 1
+
+
+def build_base_chain(preload_blocks, wallets):
+    """
+    Chain shared by every node at start: one block paying each sender wallet, then filler blocks.
+    """
+    blockchain = Blockchain()
+    reward = block_reward(len(blockchain.chain))
+    share = reward // len(wallets)
+    output = {wallet.address: share for wallet in wallets}
+    output[wallets[0].address] += reward - share * len(wallets)
+    funding = Transaction(input=MINING_REWARD_INPUT, output=output)
+    blockchain.chain.append(mine_block(blockchain.chain[-1], [funding.to_json()]))
+    miner = Wallet()
+    for _ in range(preload_blocks):
+        reward_tx = Transaction.reward_transaction(miner, block_reward(len(blockchain.chain)))
+        blockchain.chain.append(mine_block(blockchain.chain[-1], [reward_tx.to_json()]))
+    return blockchain.chain
+
+
+def mine_on(node, wallet):
+    """
+    Mine the node's best template on its validation thread, as the app's miner would.
+    """
+    def job():
+        chain = node.blockchain
+        accepted = node.transaction_pool.block_template()
+        fees = sum(tx.input.get("fee", 0) for tx in accepted)
+        reward = Transaction.reward_transaction(wallet, block_reward(len(chain.chain)) + fees)
+        block = mine_block(chain.chain[-1], [tx.to_json() for tx in accepted] + [reward.to_json()])
+        chain.replace_chain(chain.chain + [block])
+        node.transaction_pool.clear_blockchain_transactions(chain)
+        return block
+
+    async def submit():
+        return await node.validation.run("mine", job)
+
+    return asyncio.run_coroutine_threadsafe(submit(), node.loop).result()
+
+
+class ArrivalMonitor:
+    """
+    Polls every node for tracked objects and records when each one first shows up.
+    """
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.pending = {}
+        self.arrivals = {}
+        self.lock = threading.Lock()
+        self.stopped = False
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def track(self, kind, key, origin):
+        with self.lock:
+            now = time.monotonic()
+            self.arrivals[(kind, key)] = {origin: 0.0}
+            self.pending[(kind, key)] = (now, set(range(len(self.nodes))) - {origin})
+
+    @staticmethod
+    def _has(node, kind, key):
+        if kind == "tx":
+            return key in node.transaction_pool.transaction_map or key in node.blockchain.snapshot().transactions
+        return node.blockchain.height_of(key) is not None
+
+    def _run(self):
+        while not self.stopped:
+            with self.lock:
+                for item, (started, remaining) in list(self.pending.items()):
+                    for index in list(remaining):
+                        if self._has(self.nodes[index], *item):
+                            self.arrivals[item][index] = time.monotonic() - started
+                            remaining.discard(index)
+                    if not remaining:
+                        del self.pending[item]
+            time.sleep(POLL_SECONDS)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def delays(self, kind, keys=None):
+        """
+        Per-(object, node) propagation delays and the share of them that arrived at all.
+        """
+        with self.lock:
+            items = [item for item in self.arrivals if item[0] == kind and (keys is None or item[1] in keys)]
+            delays = [delay for item in items for node, delay in self.arrivals[item].items()]
+        expected = len(items) * (len(self.nodes) - 1)
+        arrived = len(delays) - len(items)
+        return [delay for delay in delays if delay > 0], (arrived / expected if expected else 1.0)
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def rank(p):
+        return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+    return {
+        "p50_ms": round(rank(50) * 1000, 1),
+        "p90_ms": round(rank(90) * 1000, 1),
+        "p99_ms": round(rank(99) * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+def start_nodes(args, base_chain):
+    nodes = []
+    for index in range(args.nodes):
+        blockchain = Blockchain()
+        blockchain.chain = list(base_chain)
+        seeds = [f"127.0.0.1:{args.base_port + peer}" for peer in random.sample(range(index), min(index, args.degree))]
+        node = SimulatedNode(
+            "127.0.0.1", args.base_port + index, blockchain, TransactionPool(blockchain), seeds=seeds,
+            latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, loss=args.loss,
+        )
+        node.start()
+        nodes.append(node)
+        time.sleep(0.05)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and not all(node.peers and node.synced for node in nodes):
+        time.sleep(0.05)
+    return nodes
+
+
+def wait_for_convergence(nodes, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if len({node.blockchain.chain[-1].hash for node in nodes}) == 1:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def wire_bytes(nodes):
+    totals = {}
+    for node in nodes:
+        for msg_type, traffic in node.traffic.to_json()["sent"].items():
+            totals[msg_type] = totals.get(msg_type, 0) + traffic["wire_bytes"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def run(args):
+    random.seed(args.seed)
+    senders = [Wallet() for _ in range(max(1, args.transactions))]
+    base_chain = build_base_chain(args.preload_blocks, senders)
+    nodes = start_nodes(args, base_chain)
+    for sender in senders:
+        sender.blockchain = nodes[0].blockchain
+    miners = [Wallet() for _ in nodes]
+    monitor = ArrivalMonitor(nodes)
+    started = time.monotonic()
+
+    for sender in senders[:args.transactions]:
+        origin = random.randrange(len(nodes))
+        transaction = Transaction(sender, Wallet().address, 1000)
+        with nodes[origin].blockchain.lock:
+            nodes[origin].transaction_pool.set_transaction(transaction)
+        monitor.track("tx", transaction.id, origin)
+        nodes[origin].broadcast_transaction(transaction)
+        time.sleep(1 / args.tx_rate)
+    monitor.wait(args.timeout)
+
+    mined = []
+    for _ in range(args.blocks):
+        for origin in random.sample(range(len(nodes)), min(args.miners, len(nodes))):
+            block = mine_on(nodes[origin], miners[origin])
+            monitor.track("block", block.hash, origin)
+            nodes[origin].broadcast_block(block)
+            mined.append(block.hash)
+        time.sleep(args.block_interval)
+    if args.miners > 1:
+        # Competing tips of equal work only resolve once a single block extends one of them.
+        block = mine_on(nodes[0], miners[0])
+        monitor.track("block", block.hash, 0)
+        nodes[0].broadcast_block(block)
+        mined.append(block.hash)
+    converged = wait_for_convergence(nodes, args.timeout)
+    monitor.wait(1.0)
+    monitor.stopped = True
+
+    final_chain = {block.hash for block in nodes[0].blockchain.chain}
+    main_blocks = [block_hash for block_hash in mined if block_hash in final_chain]
+    tx_delays, tx_coverage = monitor.delays("tx")
+    block_delays, block_coverage = monitor.delays("block", set(main_blocks))
+    bytes_by_type = wire_bytes(nodes)
+    elapsed = time.monotonic() - started
+
+    joiner_chain = Blockchain()
+    joiner = SimulatedNode(
+        "127.0.0.1", args.base_port + len(nodes), joiner_chain, TransactionPool(joiner_chain),
+        seeds=[f"127.0.0.1:{args.base_port + random.randrange(len(nodes))}"],
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, loss=args.loss,
+    )
+    sync_started = time.monotonic()
+    joiner.start()
+    target = nodes[0].blockchain.chain[-1].hash
+    while joiner_chain.chain[-1].hash != target and time.monotonic() - sync_started < args.timeout:
+        time.sleep(0.01)
+    synced = joiner_chain.chain[-1].hash == target
+
+    return {
+        "nodes": args.nodes,
+        "link": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "loss": args.loss, "degree": args.degree},
+        "transactions": {"count": args.transactions, "coverage": round(tx_coverage, 4), **percentiles(tx_delays)},
+        "blocks": {
+            "mined": len(mined),
+            "main_chain": len(main_blocks),
+            "fork_rate": round(1 - len(main_blocks) / len(mined), 4) if mined else 0.0,
+            "converged": converged,
+            "coverage": round(block_coverage, 4),
+            **percentiles(block_delays),
+        },
+        "sync": {
+            "height": len(nodes[0].blockchain.chain) - 1,
+            "seconds": round(time.monotonic() - sync_started, 3) if synced else None,
+        },
+        "wire_bytes": {"total": sum(bytes_by_type.values()), "by_type": bytes_by_type},
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+
+def print_report(report):
+    print(f"Nodes: {report['nodes']}  link: {report['link']}")
+    for kind in ("transactions", "blocks"):
+        print(f"{kind.capitalize()}: {json.dumps(report[kind])}")
+    sync = report["sync"]
+    print(f"Late joiner sync to height {sync['height']}: " + (f"{sync['seconds']}s" if sync["seconds"] is not None else "timed out"))
+    print(f"Wire bytes: {report['wire_bytes']['total']}")
+    for msg_type, size in report["wire_bytes"]["by_type"].items():
+        print(f"  {msg_type}: {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--degree", type=int, default=3, help="peers each node dials at startup")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="one-way link latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="share of messages delayed by a retransmission")
+    parser.add_argument("--transactions", type=int, default=100)
+    parser.add_argument("--tx-rate", type=float, default=50.0, help="transactions injected per second")
+    parser.add_argument("--blocks", type=int, default=10)
+    parser.add_argument("--miners", type=int, default=1, help="nodes mining each round; more than one causes forks")
+    parser.add_argument("--block-interval", type=float, default=1.0)
+    parser.add_argument("--preload-blocks", type=int, default=500, help="chain length the late joiner must sync")
+    parser.add_argument("--base-port", type=int, default=7900)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep node logs on stdout")
+    args = parser.parse_args()
+
+    if args.verbose:
+        report = run(args)
+    else:
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+            report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import pytest
+
+from backend.api.bulk import BulkQueryError, bulk_balances, bulk_transaction_statuses, chain_view, node_view, parse_items
+from backend.blockchain.blockchain import Blockchain
+from backend.wallet.transaction_pool import TransactionPool
+
+
+def make_chain():
+    blockchain = Blockchain()
+    blockchain.add_block([{'id': 'tx1', 'input': {}, 'output': {'alice': 7, 'bob': 3}}])
+    blockchain.add_block([{'id': 'tx2', 'input': {'address': 'alice', 'amount': 7}, 'output': {'bob': 5, 'alice': 2}}])
+    return blockchain
+
+def test_balances_are_read_at_one_tip():
+    blockchain = make_chain()
+    _, snapshot = chain_view(blockchain)
+
+    result = bulk_balances(snapshot, ['alice', 'bob', 'nobody'])
+
+    assert result['height'] == 2
+    assert result['tip'] == blockchain.chain[-1].hash
+    assert result['balances'] == {'alice': 2, 'bob': 8, 'nobody': 0}
+
+def test_transaction_statuses_match_the_single_lookup():
+    blockchain = make_chain()
+    chain, snapshot = chain_view(blockchain)
+
+    result = bulk_transaction_statuses(chain, snapshot, {'tx3': object()}, ['tx1', 'tx2', 'tx3', 'tx4'])
+    statuses = {entry['id']: entry for entry in result['transactions']}
+
+    assert [entry['id'] for entry in result['transactions']] == ['tx1', 'tx2', 'tx3', 'tx4']
+    assert statuses['tx1']['confirmations'] == 1
+    assert statuses['tx1']['block_hash'] == chain[1].hash
+    assert statuses['tx2']['confirmations'] == 0
+    assert statuses['tx3']['status'] == 'mempool'
+    assert statuses['tx4']['status'] == 'unknown'
+
+def test_view_ignores_blocks_appended_after_it_was_read():
+    blockchain = make_chain()
+    chain, snapshot = chain_view(blockchain)
+    blockchain.add_block([{'id': 'tx5', 'input': {}, 'output': {'carol': 1}}])
+
+    result = bulk_transaction_statuses(chain, snapshot, {}, ['tx1', 'tx5'])
+
+    assert result['height'] == 2
+    assert [entry['status'] for entry in result['transactions']] == ['confirmed', 'unknown']
+
+def test_node_view_is_fixed_when_it_is_taken():
+    blockchain = make_chain()
+    transaction_pool = TransactionPool(blockchain)
+    transaction_pool.transaction_map['tx3'] = object()
+    view = node_view(blockchain, transaction_pool)
+    blockchain.add_block([{'id': 'tx3', 'input': {}, 'output': {'carol': 1}}])
+    del transaction_pool.transaction_map['tx3']
+
+    assert view.height == 2
+    assert view.tip.hash == view.snapshot.tip_hash
+    assert 'tx3' in view.mempool.transactions
+    assert 'tx3' not in view.snapshot.transactions
+
+def test_parse_items_rejects_bad_bodies():
+    assert parse_items({'txids': ['a', 'b']}, 'txids') == ['a', 'b']
+    for body in (None, {}, {'txids': 'a'}, {'txids': ['a', 1]}):
+        with pytest.raises(BulkQueryError):
+            parse_items(body, 'txids')
+    with pytest.raises(BulkQueryError):
+        parse_items({'txids': ['a', 'b', 'c']}, 'txids', max_items=2)
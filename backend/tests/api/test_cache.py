@@ -0,0 +1,47 @@
+import gzip
+
+from backend.api.cache import CachedResponse, ResponseCache
+
+
+def test_cached_response_has_a_gzip_variant_with_its_own_etag():
+    entry = CachedResponse(b'{"blocks": []}' * 200, 'application/json')
+    small = CachedResponse(b'{}', 'application/json')
+    image = CachedResponse(bytes(range(256)) * 10, 'image/png')
+
+    assert gzip.decompress(entry.gzip_body) == entry.body
+    assert entry.gzip_etag != entry.etag
+    assert small.gzip_body is None
+    assert image.gzip_body is None
+
+def test_etag_depends_only_on_the_body():
+    assert CachedResponse(b'same', 'text/plain').etag == CachedResponse(b'same', 'text/plain').etag
+    assert CachedResponse(b'same', 'text/plain').etag != CachedResponse(b'other', 'text/plain').etag
+
+def test_cache_builds_each_key_once():
+    cache = ResponseCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return '{"tip": "a"}'
+
+    first = cache.get(('/tip', 'hash-a'), build)
+    second = cache.get(('/tip', 'hash-a'), build)
+    cache.get(('/tip', 'hash-b'), build)
+
+    assert first is second
+    assert len(builds) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_cache_evicts_least_recently_used_entries_by_count_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=1000)
+    cache.get('a', lambda: 'a')
+    cache.get('b', lambda: 'b')
+    cache.get('a', lambda: 'a')
+    cache.get('c', lambda: 'c')
+
+    assert len(cache) == 2
+    assert cache.get('b', lambda: 'rebuilt').body == b'rebuilt'
+
+    cache.get('big', lambda: 'x' * 995)
+    assert len(cache) == 1
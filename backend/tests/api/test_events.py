@@ -0,0 +1,92 @@
+import json
+
+from backend.api.events import EventHub, KEEPALIVE, Subscription
+from backend.blockchain.blockchain import Blockchain
+from backend.wallet.transaction_pool import TransactionMap
+
+
+class StubTransaction:
+    def __init__(self, txid, sender, recipient):
+        self.id = txid
+        self._json = {'id': txid, 'input': {'address': sender, 'fee': 1}, 'output': {recipient: 5}}
+
+    def to_json(self):
+        return self._json
+
+
+class StubPool:
+    def __init__(self):
+        self.transaction_map = TransactionMap()
+
+    @property
+    def version(self):
+        return self.transaction_map.version
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        chunk = subscription.queue.get_nowait()
+        name, data = chunk.split('\n')[:2]
+        events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def make_hub():
+    return EventHub(Blockchain(), StubPool())
+
+def test_tip_and_mempool_changes_reach_every_subscriber():
+    hub = make_hub()
+    everyone = hub.subscribe()
+    hub.transaction_pool.transaction_map['t1'] = StubTransaction('t1', 'alice', 'bob')
+    hub.blockchain.add_block([])
+
+    hub.poll()
+
+    events = dict(drain(everyone))
+    assert events['tip']['height'] == 1
+    assert not events['tip']['reorg']
+    assert [tx['id'] for tx in events['mempool']['added']] == ['t1']
+    assert 'confirmed' not in events
+
+def test_address_filter_limits_mempool_and_confirmed_events():
+    hub = make_hub()
+    bob = hub.subscribe(['BOB'])
+    carol = hub.subscribe(['carol'])
+    hub.transaction_pool.transaction_map['t1'] = StubTransaction('t1', 'alice', 'bob')
+    hub.poll()
+    del hub.transaction_pool.transaction_map['t1']
+    hub.blockchain.add_block([StubTransaction('t1', 'alice', 'bob').to_json()])
+    hub.poll()
+
+    bob_events = drain(bob)
+    assert [name for name, _ in bob_events] == ['mempool', 'tip', 'confirmed', 'mempool']
+    assert bob_events[2][1]['transactions'][0]['height'] == 1
+    assert bob_events[3][1]['removed'] == ['t1']
+    assert [name for name, _ in drain(carol)] == ['tip']
+
+def test_replaced_tip_is_reported_as_reorg():
+    hub = make_hub()
+    subscription = hub.subscribe()
+    fork = hub.blockchain.chain[:]
+    hub.blockchain.add_block([])
+    hub.poll()
+    drain(subscription)
+    hub.blockchain.chain = fork
+    hub.blockchain.add_block([{'id': 'b'}])
+    hub.blockchain.add_block([])
+
+    hub.poll()
+
+    tip = dict(drain(subscription))['tip']
+    assert tip['reorg'] and tip['fork_height'] == 0 and tip['height'] == 2
+
+def test_slow_subscriber_is_dropped_and_idle_one_gets_keepalives():
+    hub = make_hub()
+    slow = hub.subscribe()
+    slow.queue.maxsize = 1
+    hub.publish_sync(True)
+    hub.publish_sync(False)
+
+    assert slow.closed
+    assert hub.subscriber_count() == 0
+    assert Subscription().next(timeout=0.01) == KEEPALIVE
@@ -0,0 +1,50 @@
+import json
+
+from backend.api.export import chunked, export_lines
+from backend.blockchain.blockchain import Blockchain
+from backend.scripts.export_chain import last_position
+
+
+def make_chain():
+    blockchain = Blockchain()
+    blockchain.add_block([{'id': 't1', 'input': {}, 'output': {'bob': 1}}, {'id': 't2', 'input': {}, 'output': {'carol': 2}}])
+    blockchain.add_block([{'id': 't3', 'input': {'address': 'bob'}, 'output': {'carol': 1}}])
+    return blockchain
+
+def test_blocks_are_exported_one_per_line_with_their_height():
+    blockchain = make_chain()
+
+    lines = [json.loads(line) for line in export_lines(blockchain, blockchain.chain, 1, 2)]
+
+    assert [line['height'] for line in lines] == [1, 2]
+    assert lines[1]['block'] == blockchain.chain[2].to_json()
+    assert len(blockchain._encoded) == 0
+
+def test_transactions_are_flattened_with_their_position():
+    blockchain = make_chain()
+
+    lines = [json.loads(line) for line in export_lines(blockchain, blockchain.chain, 1, 2, kind='transactions')]
+
+    assert [(line['height'], line['index'], line['id']) for line in lines] == [(1, 0, 't1'), (1, 1, 't2'), (2, 0, 't3')]
+    assert lines[2]['block_hash'] == blockchain.chain[2].hash
+    assert lines[2]['output'] == {'carol': 1}
+
+def test_chunks_keep_lines_whole():
+    lines = [f'{{"n": {n}}}\n' for n in range(100)]
+
+    chunks = list(chunked(iter(lines), chunk_bytes=64))
+
+    assert len(chunks) > 1
+    assert all(chunk.endswith('\n') for chunk in chunks)
+    assert ''.join(chunks) == ''.join(lines)
+
+def test_resume_position_drops_a_partial_last_line(tmp_path):
+    blockchain = make_chain()
+    path = tmp_path / 'txs.ndjson'
+    text = ''.join(export_lines(blockchain, blockchain.chain, 0, 2, kind='transactions'))
+    path.write_text(text[:-10])
+
+    assert last_position(str(path), 'transactions') == (1, 1, blockchain.chain[1].hash)
+    assert path.read_text().endswith('\n')
+    assert len(path.read_text().splitlines()) == text.count('\n') - 1
+    assert last_position(str(tmp_path / 'missing.ndjson'), 'blocks') is None
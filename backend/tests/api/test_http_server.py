@@ -0,0 +1,93 @@
+import http.client
+import socket
+import threading
+
+import pytest
+
+from backend.api.events import Subscription
+from backend.api.http_server import AsyncHTTPServer
+
+
+def wsgi_app(environ, start_response):
+    path = environ['PATH_INFO']
+    if path == '/stream':
+        start_response('200 OK', [('Content-Type', 'application/x-ndjson')])
+        return (f'{{"n": {n}}}\n' for n in range(3))
+    body = environ['wsgi.input'].read() or f"{environ['REQUEST_METHOD']} {path}?{environ['QUERY_STRING']}".encode()
+    start_response('200 OK' if path != '/missing' else '404 NOT FOUND',
+                   [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))])
+    return [body]
+
+
+@pytest.fixture
+def subscriptions():
+    return []
+
+@pytest.fixture
+def server(subscriptions):
+    def open_stream(query):
+        subscription = Subscription(query.get('address'))
+        subscriptions.append(subscription)
+        return subscription, 'retry: 3000\n\n'
+
+    server = AsyncHTTPServer(wsgi_app, '127.0.0.1', 0, event_streams={'/events': (open_stream, Subscription.close)},
+                             max_connections=4, workers=1)
+    server.start()
+    yield server
+    server.stop()
+
+def test_requests_share_a_keep_alive_connection(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+
+    connection.request('GET', '/a?x=1')
+    first = connection.getresponse()
+    assert (first.status, first.read()) == (200, b'GET /a?x=1')
+    assert first.getheader('Connection') == 'keep-alive'
+    connection.request('POST', '/b', body=b'{"txids": []}')
+    second = connection.getresponse()
+    assert second.read() == b'{"txids": []}'
+    connection.request('GET', '/missing')
+    assert connection.getresponse().status == 404
+
+    assert server.to_json()['requests'] == 3
+    assert server.to_json()['connections'] == 1
+    connection.close()
+
+def test_streamed_responses_use_chunked_encoding(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+
+    connection.request('GET', '/stream')
+    response = connection.getresponse()
+
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    assert response.read().splitlines() == [b'{"n": 0}', b'{"n": 1}', b'{"n": 2}']
+    connection.request('GET', '/after')
+    assert connection.getresponse().read() == b'GET /after?'
+    connection.close()
+
+def test_idle_connections_hold_no_worker_and_are_capped(server):
+    idle = [socket.create_connection(('127.0.0.1', server.port)) for _ in range(3)]
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    connection.request('GET', '/busy')
+    assert connection.getresponse().read() == b'GET /busy?'
+
+    extra = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    extra.request('GET', '/rejected')
+    assert extra.getresponse().status == 503
+    for sock in idle:
+        sock.close()
+    connection.close()
+
+def test_event_streams_are_served_from_the_loop(server, subscriptions):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    connection.request('GET', '/events?address=Bob')
+    response = connection.getresponse()
+    assert response.getheader('Content-Type').startswith('text/event-stream')
+    assert response.fp.readline() == b'retry: 3000\n'
+    response.fp.readline()
+
+    threading.Thread(target=subscriptions[0].push, args=('event: tip\ndata: {}\n\n',)).start()
+    assert response.fp.readline() == b'event: tip\n'
+
+    assert subscriptions[0].addresses == frozenset({'bob'})
+    connection.close()
@@ -0,0 +1,136 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.api.webhooks import WebhookError, WebhookNotifier
+from backend.blockchain.blockchain import Blockchain
+
+
+class CallbackServer:
+    """
+    Local stand-in for a client's callback endpoint; answers with `status` and keeps each body.
+    """
+    def __init__(self, status=200):
+        self.status = status
+        self.bodies = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.bodies.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(server.status)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/hook'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def events(self):
+        return [(event['event'], event['txid']) for body in self.bodies for event in body['events']]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def callback():
+    server = CallbackServer()
+    yield server
+    server.close()
+
+def tx(txid, recipient='bob', sender=None):
+    return {'id': txid, 'input': {'address': sender} if sender else {}, 'output': {recipient: 1}}
+
+def test_threshold_crossings_are_delivered_once_in_batches(callback):
+    blockchain = Blockchain()
+    notifier = WebhookNotifier(blockchain)
+    notifier.register(callback.url, 1, txid='t1')
+    notifier.register(callback.url, 0, address='BOB')
+
+    blockchain.add_block([tx('t1', recipient='carol'), tx('t2'), tx('t3', sender='bob')])
+    notifier.poll()
+    assert sorted(callback.events()) == [('confirmed', 't2'), ('confirmed', 't3')]
+    assert len(callback.bodies) == 1
+    assert callback.bodies[0]['events'][0]['confirmations'] == 0
+
+    blockchain.add_block([])
+    notifier.poll()
+    notifier.poll()
+    assert callback.events()[2:] == [('confirmed', 't1')]
+    assert callback.bodies[1]['events'][0]['height'] == 1
+    assert len(callback.bodies) == 2
+
+def test_reorg_reverses_a_reported_confirmation(callback):
+    blockchain = Blockchain()
+    notifier = WebhookNotifier(blockchain)
+    notifier.register(callback.url, 0, txid='t1')
+    genesis = blockchain.chain[0]
+    blockchain.add_block([tx('t1')])
+    notifier.poll()
+
+    fork = Blockchain()
+    fork.add_block([tx('other')])
+    fork.add_block([])
+    assert fork.chain[0] == genesis
+    blockchain.chain = fork.chain
+    notifier.poll()
+
+    assert callback.events() == [('confirmed', 't1'), ('reversed', 't1')]
+    reversed_event = callback.bodies[1]['events'][0]
+    assert reversed_event['confirmations'] is None
+    assert reversed_event['tip_height'] == 2
+
+def test_failed_delivery_is_retried_with_backoff():
+    server = CallbackServer(status=500)
+    try:
+        blockchain = Blockchain()
+        notifier = WebhookNotifier(blockchain)
+        notifier.register(server.url, 0, txid='t1')
+        blockchain.add_block([tx('t1')])
+
+        notifier.poll(now=1000)
+        notifier.poll(now=1000.5)
+        assert len(server.bodies) == 1
+        server.status = 204
+        notifier.poll(now=1010)
+        assert len(server.bodies) == 2
+        assert notifier.to_json()['pending_events'] == 0
+        assert notifier.failed_attempts == 1 and notifier.delivered == 1
+    finally:
+        server.close()
+
+def test_registrations_and_undelivered_events_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'webhooks.json')
+    server = CallbackServer(status=503)
+    try:
+        blockchain = Blockchain()
+        notifier = WebhookNotifier(blockchain, path=path)
+        registration = notifier.register(server.url, 0, address='carol')
+        blockchain.add_block([tx('t1', recipient='carol')])
+        notifier.poll(now=0)
+    finally:
+        server.close()
+
+    restored = WebhookNotifier(blockchain, path=path)
+
+    assert restored.get(registration.id).tracked['t1']['block_hash'] == blockchain.chain[1].hash
+    assert restored.to_json()['pending_events'] == 1
+    assert restored.outboxes[server.url].attempts == 1
+
+def test_register_rejects_bad_requests():
+    notifier = WebhookNotifier(Blockchain())
+    for args in [
+        ('ftp://x/hook', 1, 't1', None),
+        ('http://x/hook', -1, 't1', None),
+        ('http://x/hook', '3', 't1', None),
+        ('http://x/hook', 1, None, None),
+        ('http://x/hook', 1, 't1', 'bob'),
+    ]:
+        with pytest.raises(WebhookError):
+            notifier.register(args[0], args[1], txid=args[2], address=args[3])
@@ -1,6 +1,6 @@
 import time
 from backend.blockchain.block import Block, GENESIS_DATA
-from backend.config import MINE_RATE, SECONDS
+from backend.config import MINE_RATE, SECONDS, MAX_BLOCK_BYTES
 from backend.util.hex_to_binary import hex_to_binary
 import pytest
 
@@ -86,4 +86,24 @@ def test_is_valid_block_bad_block_hash(last_block, block):
     block.hash = '000000000000000000bbbaaccd'
 
     with pytest.raises(Exception, match='block hash must be correct'):
-        Block.is_valid_block(last_block, block) 
\ No newline at end of file
+        Block.is_valid_block(last_block, block) 
+
+def test_is_valid_block_exceeds_max_size(last_block, block):
+    block.data = 'x' * MAX_BLOCK_BYTES
+
+    with pytest.raises(Exception, match='exceeds the maximum size'):
+        Block.is_valid_block(last_block, block)
+
+def test_header_round_trip(last_block, block):
+    header = Block.from_header(block.header())
+
+    assert header.hash == block.hash
+    assert header.data is None
+    Block.is_valid_header(last_block, header)
+
+def test_is_valid_header_bad_proof_of_work(last_block, block):
+    header = Block.from_header(block.header())
+    header.hash = 'fff'
+
+    with pytest.raises(Exception, match='proof of work requirement was not met'):
+        Block.is_valid_header(last_block, header)
@@ -1,5 +1,7 @@
+import json
+
 from backend.blockchain.blockchain import Blockchain
-from backend.blockchain.block import GENESIS_DATA
+from backend.blockchain.block import Block, GENESIS_DATA
 import pytest
 from backend.wallet.transaction import Transaction
 from backend.wallet.wallet import Wallet
@@ -17,6 +19,16 @@ def test_add_block():
 
     assert blockchain.chain[-1].data == data
 
+def test_append_block_rejects_a_block_mined_on_an_old_tip():
+    blockchain = Blockchain()
+    stale = Block.mine_block(blockchain.chain[-1], 'stale')
+    blockchain.add_block('winner')
+
+    with pytest.raises(Exception, match='tip changed while mining'):
+        blockchain.append_block(stale)
+    blockchain.append_block(Block.mine_block(blockchain.chain[-1], 'next'))
+    assert blockchain.chain[-1].data == 'next'
+
 @pytest.fixture
 def blockchain_blocks():
     blockchain = Blockchain()
@@ -153,3 +165,105 @@ def test_is_valid_transaction_chain_bad_historic_balance(blockchain_blocks):
 
     with pytest.raises(Exception, match="Invalid transaction output values"):
         Blockchain.is_valid_transaction_chain(blockchain_blocks.chain)
+
+def test_snapshot_balances_match_chain_scan(blockchain_blocks):
+    sender = blockchain_blocks.test_sender
+    miner = blockchain_blocks.test_miner
+
+    assert blockchain_blocks.balance_of(sender.address) == Wallet.calculate_balance(blockchain_blocks, sender.address)
+    assert blockchain_blocks.balance_of(miner.address) == Wallet.calculate_balance(blockchain_blocks, miner.address)
+
+def test_snapshot_extends_and_rebuilds_after_replace(blockchain_blocks):
+    blockchain = Blockchain()
+    blockchain.replace_chain(blockchain_blocks.chain[:3])
+    first = blockchain.snapshot()
+
+    blockchain.replace_chain(blockchain_blocks.chain)
+    second = blockchain.snapshot()
+
+    assert first.height == 2
+    assert second.height == len(blockchain_blocks.chain) - 1
+    assert second.tip_hash == blockchain_blocks.chain[-1].hash
+    assert blockchain.balance_of('recipient') == Wallet.calculate_balance(blockchain_blocks, 'recipient')
+
+def test_locator_starts_at_tip_and_ends_at_genesis(blockchain_blocks):
+    locator = blockchain_blocks.locator()
+
+    assert locator[0] == blockchain_blocks.chain[-1].hash
+    assert locator[-1] == blockchain_blocks.chain[0].hash
+
+def test_find_fork_returns_latest_shared_height(blockchain_blocks):
+    blockchain = Blockchain()
+    blockchain.replace_chain(blockchain_blocks.chain[:4])
+
+    assert blockchain_blocks.find_fork(blockchain.locator()) == 3
+    assert blockchain_blocks.find_fork(['unknown-hash']) is None
+
+def test_replace_chain_extends_from_shared_prefix(blockchain_blocks):
+    blockchain = Blockchain()
+    blockchain.replace_chain(blockchain_blocks.chain[:4])
+    blockchain.replace_chain(blockchain_blocks.chain)
+
+    assert blockchain.chain == blockchain_blocks.chain
+    assert blockchain.total_work() == Blockchain.compute_work(blockchain_blocks.chain)
+
+def test_validator_rejects_tampered_block(blockchain_blocks):
+    blockchain = Blockchain()
+    blockchain.replace_chain(blockchain_blocks.chain[:4])
+    validator = blockchain.validator()
+    blockchain_blocks.chain[4].hash = 'evil_hash'
+
+    with pytest.raises(Exception):
+        validator.add_block(blockchain_blocks.chain[4])
+
+def test_encoded_chain_reuses_remembered_payloads():
+    blockchain = Blockchain()
+    blockchain.add_block(['one'])
+    block = blockchain.chain[-1]
+    blockchain.remember_encoding(block, '{"original": true}')
+
+    assert blockchain.encoded_block(block) == '{"original": true}'
+    assert json.loads(blockchain.encoded_chain())[0] == blockchain.chain[0].to_json()
+    assert blockchain.encoded_chain().endswith(', {"original": true}]')
+
+def test_encoded_chain_serves_a_height_range():
+    blockchain = Blockchain()
+    for index in range(4):
+        blockchain.add_block([f'block-{index}'])
+
+    page = json.loads(blockchain.encoded_chain(2, 4))
+
+    assert [block['data'] for block in page] == [['block-1'], ['block-2']]
+    assert blockchain.encoded_chain(10) == '[]'
+
+def test_block_text_cache_is_bounded_lru():
+    blockchain = Blockchain()
+    for index in range(4):
+        blockchain.add_block([f'block-{index}'])
+    sizes = [len(blockchain.encoded_block(block, cache=False)) for block in blockchain.chain]
+    blockchain.text_cache_bytes = sizes[1] + sizes[3] + sizes[4]
+
+    for block in blockchain.chain[1:4]:
+        blockchain.encoded_block(block)
+    blockchain.encoded_block(blockchain.chain[1])
+    blockchain.encoded_block(blockchain.chain[4])
+
+    assert list(blockchain._encoded) == [blockchain.chain[height].hash for height in (3, 1, 4)]
+    assert blockchain._encoded_bytes <= blockchain.text_cache_bytes
+
+def test_uncached_passes_leave_the_block_text_cache_alone():
+    blockchain = Blockchain()
+    for index in range(3):
+        blockchain.add_block([f'block-{index}'])
+
+    assert json.loads(blockchain.encoded_chain(cache=False))[-1]['data'] == ['block-2']
+    assert len(blockchain._encoded) == 0
+
+def test_encoded_chain_reads_the_given_chain_view():
+    blockchain = Blockchain()
+    blockchain.add_block(['before'])
+    view = blockchain.chain
+    blockchain.chain = blockchain.chain[:1]
+    blockchain.add_block(['after'])
+
+    assert json.loads(blockchain.encoded_chain(1, 2, chain=view))[0]['data'] == ['before']
@@ -0,0 +1,218 @@
+"""
+Handler-level harness for P2PNode: nodes share one event loop and are wired together by
+in-memory sockets. Each socket hands its frames to the owning node's _handle_message in
+order, as a websocket connection does, and keeps the text of every frame sent through it.
+"""
+import asyncio
+import itertools
+import json
+import time
+
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.economics import block_reward
+from backend.p2p.codec import decode_frame
+from backend.p2p.node import P2PNode
+from backend.scripts.p2p_network_simulator import build_base_chain, mine_block
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet
+
+
+class FakeSocket:
+    """
+    One end of a connection as the owning node sees it. `other` is the far end, or None for a
+    peer the test scripts by hand with Network.deliver.
+    """
+    def __init__(self, owner, port):
+        self.owner = owner
+        self.remote_address = ("127.0.0.1", port)
+        self.other = None
+        self.frames = []
+        self.sent = []
+        self.closed = False
+        self.inbox = asyncio.Queue()
+        self.reader = None
+
+    async def send(self, frame):
+        if self.closed:
+            raise ConnectionError("socket closed")
+        self.frames.append(frame)
+        self.sent.append(decode_frame(frame))
+        if self.other is not None:
+            self.other.inbox.put_nowait(frame)
+
+    async def close(self):
+        for end in (self, self.other):
+            if end is not None and not end.closed:
+                end.closed = True
+                end.inbox.put_nowait(None)
+
+    async def read(self):
+        while True:
+            frame = await self.inbox.get()
+            if frame is None:
+                self.owner._unregister_peer(self)
+                return
+            await self.owner._handle_message(self, frame)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.inbox.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    def messages(self, msg_type=None):
+        """
+        Messages the owner sent through this socket, optionally of one type.
+        """
+        parsed = [json.loads(text) for text in self.sent]
+        return [message for message in parsed if msg_type is None or message.get("type") == msg_type]
+
+
+class Network:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.nodes = []
+        self.sockets = []
+        self._ports = itertools.count(21000)
+        self.senders = [Wallet() for _ in range(4)]
+        self.miner = Wallet()
+        self.base_chain = build_base_chain(3, self.senders)
+
+    def node(self, chain=None) -> P2PNode:
+        """
+        A node holding `chain` (the shared base chain by default). Its server and timers are
+        not started: messages only reach it through the links made here.
+        """
+        blockchain = Blockchain()
+        blockchain.chain = list(self.base_chain if chain is None else chain)
+        node = P2PNode("127.0.0.1", next(self._ports), blockchain, TransactionPool(blockchain))
+        node.loop = self.loop
+        node.validation.loop = self.loop
+        node.validation.start()
+        self.nodes.append(node)
+        return node
+
+    def _socket(self, owner, port) -> FakeSocket:
+        socket = FakeSocket(owner, port)
+        socket.reader = self.loop.create_task(socket.read())
+        self.sockets.append(socket)
+        return socket
+
+    def link(self, dialer, listener, settle=True):
+        """
+        Connect two nodes the way an outbound dial does; returns each node's socket to the other.
+        """
+        outbound = self._socket(dialer, next(self._ports))
+        inbound = self._socket(listener, next(self._ports))
+        outbound.other, inbound.other = inbound, outbound
+        listener._register_peer(inbound, inbound=True)
+        self.run(listener._send_hello(inbound))
+        dialer._register_peer(outbound, inbound=False, address=listener.self_address)
+        self.run(dialer._send_hello(outbound))
+        if settle:
+            self.settle()
+        return outbound, inbound
+
+    def peer(self, node, inbound=True) -> FakeSocket:
+        """
+        A scripted peer: frames reach `node` only through deliver().
+        """
+        socket = self._socket(node, next(self._ports))
+        node._register_peer(socket, inbound=inbound)
+        return socket
+
+    def accept(self, node) -> FakeSocket:
+        """
+        A scripted peer dialing in through the node's server handler, inbound slot checks included.
+        """
+        socket = FakeSocket(node, next(self._ports))
+        socket.reader = self.loop.create_task(node._handle_connection(socket, "/"))
+        self.sockets.append(socket)
+        self.settle()
+        return socket
+
+    def deliver(self, socket, message, settle=True):
+        socket.inbox.put_nowait(message if isinstance(message, (str, bytes)) else json.dumps(message))
+        if settle:
+            self.settle()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def settle(self, timeout=5.0):
+        """
+        Run the loop until no socket, send queue or validation worker has work left.
+        """
+        async def quiet():
+            for node in self.nodes:
+                await node.validation.run("barrier", lambda: None)
+            await asyncio.sleep(0.005)
+            return (
+                all(socket.inbox.empty() for socket in self.sockets)
+                and all(queue.size == 0 for node in self.nodes for queue in node.outbound.values())
+                and all(node.validation.depth() == 0 for node in self.nodes)
+            )
+
+        deadline = time.monotonic() + timeout
+        streak = 0
+        while streak < 3 and time.monotonic() < deadline:
+            streak = streak + 1 if self.run(quiet()) else 0
+
+    def wait(self, predicate, timeout=5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            self.run(asyncio.sleep(0.01))
+        return True
+
+    def extend(self, chain, count, data=None):
+        """
+        `chain` plus `count` mined blocks, each paying a reward to self.miner; the first one
+        also carries the transaction dicts in `data` and collects their fees.
+        """
+        chain = list(chain)
+        for index in range(count):
+            extra = list(data or []) if index == 0 else []
+            fees = sum(tx_json["input"].get("fee", 0) for tx_json in extra)
+            reward = Transaction.reward_transaction(self.miner, block_reward(len(chain)) + fees)
+            chain.append(mine_block(chain[-1], extra + [reward.to_json()]))
+        return chain
+
+    def transaction(self, node, sender_index=0, amount=1000) -> Transaction:
+        """
+        A payment from one of the funded senders, admitted to `node`'s mempool.
+        """
+        sender = self.senders[sender_index]
+        sender.blockchain = node.blockchain
+        transaction = Transaction(sender, Wallet().address, amount)
+        with node.blockchain.lock:
+            node.transaction_pool.set_transaction(transaction)
+        return transaction
+
+    def close(self):
+        for node in self.nodes:
+            for queue in list(node.outbound.values()):
+                queue.close()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        # Jobs still queued resolve their futures on this loop; let them land before closing it.
+        for node in self.nodes:
+            self.run(node.validation.run("barrier", lambda: None))
+        self.loop.close()
+
+
+@pytest.fixture
+def network():
+    network = Network()
+    yield network
+    network.close()
@@ -0,0 +1,67 @@
+from backend.p2p.address_book import AddressBook, address_group
+
+
+def test_address_group():
+    assert address_group('10.1.2.3:6000') == '10.1'
+    assert address_group('[2001:db8::1]:6000') == '2001:db8'
+    assert address_group('node.example:6000') == 'node.example'
+
+def test_one_source_cannot_fill_the_book():
+    book = AddressBook(buckets=64, bucket_size=4, source_buckets=2)
+    for index in range(500):
+        book.learn(f'10.{index % 250}.0.{index // 250}:6000', source='66.6.6.6:6000')
+
+    assert len(book) <= 2 * 4
+
+def test_untried_addresses_never_evict_tried_ones():
+    book = AddressBook(buckets=1, bucket_size=2, source_buckets=1)
+    book.learn('10.0.0.1:6000', source='1.1.1.1:1')
+    book.succeeded('10.0.0.1:6000')
+    for index in range(10):
+        book.learn(f'10.0.1.{index}:6000', source='1.1.1.1:1')
+
+    assert '10.0.0.1:6000' in book
+    assert len(book) == 2
+
+def test_seeds_are_kept_after_failures():
+    book = AddressBook(seeds=['seed:1'], max_failures=2)
+    book.learn('10.0.0.1:6000')
+    for _ in range(2):
+        book.failed('seed:1')
+        book.failed('10.0.0.1:6000')
+
+    assert 'seed:1' in book
+    assert '10.0.0.1:6000' not in book
+    assert book.candidates() == []
+
+def test_candidates_prefer_good_and_diverse_addresses():
+    book = AddressBook()
+    for address in ['10.0.0.1:6000', '10.0.0.2:6000', '20.0.0.1:6000']:
+        book.learn(address)
+    book.succeeded('10.0.0.1:6000')
+    book.succeeded('10.0.0.2:6000')
+
+    candidates = book.candidates()
+
+    assert candidates[0] in ('10.0.0.1:6000', '10.0.0.2:6000')
+    assert candidates[1] == '20.0.0.1:6000'
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'peers.json')
+    book = AddressBook(seeds=['seed:1'])
+    book.learn('10.0.0.1:6000')
+    book.succeeded('10.0.0.1:6000')
+    book.save(path)
+
+    loaded = AddressBook.load(path, seeds=['seed:2'])
+
+    assert loaded.secret == book.secret
+    assert '10.0.0.1:6000' in loaded
+    assert loaded.candidates()[0] == '10.0.0.1:6000'
+    assert 'seed:2' in loaded and 'seed:1' not in loaded
+
+def test_load_missing_or_corrupt_file(tmp_path):
+    path = tmp_path / 'peers.json'
+    assert len(AddressBook.load(str(path), seeds=['seed:1'])) == 1
+    path.write_text('{not json')
+    assert len(AddressBook.load(str(path))) == 0
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.p2p.sync import BlockDownload
+
+
+@pytest.fixture
+def source_chain():
+    blockchain = Blockchain()
+    for i in range(10):
+        blockchain.add_block(f'block-{i}')
+    return blockchain
+
+def make_download(chain, **kwargs):
+    local = Blockchain()
+    return BlockDownload(1, chain[1:], local.validator(1), 1, source='source', **kwargs)
+
+def test_ranges_are_split_across_peers(source_chain):
+    download = make_download(source_chain.chain, range_blocks=4)
+    first = download.assign('peer-a', 'a')
+    second = download.assign('peer-b', 'b')
+
+    assert (first.start, first.end) == (1, 5)
+    assert (second.start, second.end) == (5, 9)
+    assert download.assign('peer-a', 'a') is None
+
+def test_blocks_connect_in_order(source_chain):
+    chain = source_chain.chain
+    download = make_download(chain, range_blocks=4)
+    download.assign('peer-a', 'a')
+    download.assign('peer-b', 'b')
+
+    download.receive('peer-b', 5, chain[5:9], 100)
+    assert list(download.ready_blocks()) == []
+
+    download.receive('peer-a', 1, chain[1:5], 100)
+    heights = [height for height, _, _, _ in download.ready_blocks()]
+    assert heights == list(range(1, 9))
+    assert download.stats['b'].blocks == 4
+
+def test_block_not_matching_header_is_rejected(source_chain):
+    chain = source_chain.chain
+    download = make_download(chain, range_blocks=4)
+    download.assign('peer-a', 'a')
+
+    with pytest.raises(Exception, match='does not match its header'):
+        download.receive('peer-a', 1, [chain[2]], 10)
+
+def test_released_range_goes_to_another_peer(source_chain):
+    chain = source_chain.chain
+    download = make_download(chain, range_blocks=4)
+    download.assign('peer-a', 'a')
+    download.receive('peer-a', 1, chain[1:3], 10)
+    download.release('peer-a', stalled=True)
+
+    assert download.assign('peer-a', 'a') is None
+    resumed = download.assign('peer-b', 'b')
+    assert (resumed.start, resumed.end) == (3, 5)
+    assert download.stats['a'].stalls == 1
+
+def test_window_bounds_scheduling(source_chain):
+    download = make_download(source_chain.chain, range_blocks=2, window_blocks=4)
+
+    assert download.assign('peer-a', 'a') is not None
+    assert download.assign('peer-b', 'b') is not None
+    assert download.assign('peer-c', 'c') is None
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.economics import block_reward
+from backend.p2p.bootstrap import BootstrapError, import_bootstrap, open_bootstrap, write_bootstrap
+from backend.scripts.p2p_network_simulator import build_base_chain, mine_block
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+
+def make_chain(forged_signature=False, extra_blocks=3):
+    """
+    A funded wallet, one signed transfer (optionally with a forged signature), then filler blocks.
+    """
+    blockchain = Blockchain()
+    sender = Wallet(blockchain)
+    blockchain.chain = build_base_chain(2, [sender])
+    transfer = Transaction(sender, 'bob', 1_000)
+    if forged_signature:
+        transfer.input['signature'] = Wallet().sign(transfer.output)
+    height = len(blockchain.chain)
+    reward = Transaction.reward_transaction(Wallet(), block_reward(height) + transfer.input['fee'])
+    blockchain.chain.append(mine_block(blockchain.chain[-1], [transfer.to_json(), reward.to_json()]))
+    for _ in range(extra_blocks):
+        reward = Transaction.reward_transaction(Wallet(), block_reward(len(blockchain.chain)))
+        blockchain.chain.append(mine_block(blockchain.chain[-1], [reward.to_json()]))
+    return blockchain
+
+def hashes(chain):
+    return [block.hash for block in chain]
+
+def write_file(tmp_path, blockchain, name='chain.bootstrap.gz', chain=None):
+    path = str(tmp_path / name)
+    with open_bootstrap(path, 'w') as out:
+        write_bootstrap(blockchain, out, chain)
+    return path
+
+def test_round_trip_adopts_the_chain_and_keeps_block_text(tmp_path):
+    source = make_chain()
+    path = write_file(tmp_path, source)
+    target = Blockchain()
+
+    stats = import_bootstrap(target, path, checkpoints={}, adopt_every=2)
+
+    assert hashes(target.chain) == hashes(source.chain)
+    assert stats['imported'] == len(source.chain) - 1 and stats['skipped'] == 1
+    assert target.encoded_chain() == source.encoded_chain()
+    assert target.balance_of('bob') == 1_000
+
+def test_forged_signature_is_rejected_unless_below_a_checkpoint(tmp_path):
+    source = make_chain(forged_signature=True)
+    path = write_file(tmp_path, source)
+
+    with pytest.raises(BootstrapError, match='height 4'):
+        import_bootstrap(Blockchain(), path, checkpoints={})
+
+    target = Blockchain()
+    stats = import_bootstrap(target, path, checkpoints={4: source.chain[4].hash})
+    assert hashes(target.chain) == hashes(source.chain)
+    assert stats['unverified_signatures'] == 4
+
+def test_checkpoints_must_match_and_confirm_the_blocks_below_them(tmp_path):
+    source = make_chain()
+    path = write_file(tmp_path, source)
+
+    with pytest.raises(BootstrapError, match='checkpoint'):
+        import_bootstrap(Blockchain(), path, checkpoints={2: 'f' * 64})
+
+    # the file ends before its checkpoint: nothing below it is trusted
+    short = write_file(tmp_path, source, name='short.bootstrap', chain=source.chain[:4])
+    target = Blockchain()
+    import_bootstrap(target, short, checkpoints={5: source.chain[5].hash})
+    assert len(target.chain) == 1
+
+def test_import_continues_a_local_chain_and_keeps_blocks_before_a_bad_line(tmp_path):
+    source = make_chain(extra_blocks=4)
+    path = str(tmp_path / 'chain.bootstrap')
+    out = io.StringIO()
+    write_bootstrap(source, out)
+    lines = out.getvalue().splitlines(keepends=True)
+    with open(path, 'w') as bootstrap_file:
+        bootstrap_file.writelines(lines[:7] + ['{"height": 6, "block": {"broken": \n'])
+    target = Blockchain()
+    target.chain = source.chain[:3]
+
+    with pytest.raises(BootstrapError, match='height 6'):
+        import_bootstrap(target, path, checkpoints={}, adopt_every=100)
+
+    assert hashes(target.chain) == hashes(source.chain[:6])
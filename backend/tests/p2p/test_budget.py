@@ -0,0 +1,47 @@
+from backend.p2p.budget import MessageBudget, TokenBucket, message_cost
+from backend.p2p.peers import ConnectionManager
+
+
+def test_full_chain_request_costs_the_whole_chain():
+    full = message_cost('REQUEST_CHAIN', {'start': 0}, 5000)
+    tail = message_cost('REQUEST_CHAIN', {'start': 4990, 'end': 5000}, 5000)
+    bogus = message_cost('REQUEST_CHAIN', {'start': 'x', 'end': 10 ** 9}, 5000)
+
+    assert full > 100 * message_cost('PING', {}, 5000)
+    assert tail < full
+    assert bogus == full
+
+def test_unmetered_and_malformed_messages_cost_nothing():
+    assert message_cost('CHAIN_SEGMENT', {'blocks': []}, 10) == 0
+    assert message_cost(['not', 'a', 'type'], {}, 10) == 0
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=10, burst=20, now=0)
+
+    assert bucket.take(20, now=0)
+    assert not bucket.take(1, now=0)
+    assert bucket.take(10, now=1)
+
+def test_budget_drops_a_flood_and_runs_out_of_strikes():
+    budget = MessageBudget(budgets={'PEERS': (1, 10)}, strikes=(0, 3))
+
+    admitted = [budget.admit('PEERS', 5, now=0) for _ in range(5)]
+
+    assert admitted == [True, True, False, False, False]
+    assert budget.dropped == {'PEERS': 3}
+    assert budget.exhausted(now=0)
+    assert budget.admit('HEADERS', 5, now=0)
+
+def test_over_budget_peer_ranks_last_and_is_flagged():
+    manager = ConnectionManager()
+    manager.add('flooder', inbound=True)
+    manager.add('honest', inbound=True)
+    manager.get('flooder').budget = MessageBudget(budgets={'TRANSACTION': (0, 10)}, strikes=(0, 2))
+
+    assert manager.admit('flooder', 'TRANSACTION', 10)
+    assert not manager.admit('flooder', 'TRANSACTION', 10)
+    assert manager.ranked(['flooder', 'honest']) == ['honest', 'flooder']
+    assert not manager.over_budget('flooder')
+    assert not manager.admit('flooder', 'TRANSACTION', 10)
+    assert manager.over_budget('flooder')
+    assert not manager.over_budget('honest')
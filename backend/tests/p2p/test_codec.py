@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from backend.p2p.codec import (
+    TrafficStats,
+    decode_frame,
+    encode_frame,
+    negotiate_compression,
+    parse_message,
+    splice_payload,
+)
+
+
+def test_negotiate_compression():
+    assert negotiate_compression(['brotli', 'zlib']) == 'zlib'
+    assert negotiate_compression(['brotli']) is None
+    assert negotiate_compression(None) is None
+
+def test_frame_round_trip():
+    text = json.dumps({'type': 'CHAIN_SEGMENT', 'blocks': ['ab' * 500]})
+    frame = encode_frame(text, 'zlib')
+
+    assert isinstance(frame, bytes)
+    assert len(frame) < len(text)
+    assert decode_frame(frame) == text
+
+def test_text_frames_pass_through():
+    assert decode_frame('{"type": "PING"}') == '{"type": "PING"}'
+
+def test_oversized_frame_is_rejected():
+    frame = encode_frame('a' * 10_000, 'zlib')
+
+    with pytest.raises(ValueError, match='size limit'):
+        decode_frame(frame, max_bytes=1_000)
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        decode_frame(b'\x09payload')
+
+def test_traffic_stats_per_message_type():
+    stats = TrafficStats()
+    stats.record_sent('BLOCK', 1000, 250, 0.001, True)
+    stats.record_sent('BLOCK', 1000, 250, 0.001, True)
+
+    block = stats.to_json()['sent']['BLOCK']
+    assert block['messages'] == 2
+    assert block['ratio'] == 0.25
+
+def test_parse_message_keeps_payload_text():
+    text = splice_payload({'type': 'BLOCK', 'height': 3}, 'block', '{"hash": "ab",  "data": []}')
+    message, raw = parse_message(text)
+
+    assert message == {'type': 'BLOCK', 'height': 3, 'block': {'hash': 'ab', 'data': []}}
+    assert raw == '{"hash": "ab",  "data": []}'
+
+def test_parse_message_keeps_each_segment_block():
+    text = splice_payload({'type': 'CHAIN_SEGMENT', 'start': 1}, 'blocks', '[{"hash": "a"}, {"hash": "b"}]')
+    message, raw = parse_message(text)
+
+    assert [block['hash'] for block in message['blocks']] == ['a', 'b']
+    assert raw == ['{"hash": "a"}', '{"hash": "b"}']
+
+def test_parse_message_without_trailing_payload():
+    message, raw = parse_message(json.dumps({'block': {'hash': 'a'}, 'type': 'BLOCK'}))
+
+    assert message['block'] == {'hash': 'a'}
+    assert raw is None
@@ -0,0 +1,63 @@
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.block import Block
+from backend.economics import block_reward
+from backend.p2p.compact import PartialBlock, compact_block_fields
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+
+def mined_block_with_transactions():
+    blockchain = Blockchain()
+    senders = [Wallet(blockchain) for _ in range(2)]
+    for sender in senders:
+        blockchain.add_block([Transaction.reward_transaction(sender, block_reward(len(blockchain.chain))).to_json()])
+    transactions = [Transaction(sender, 'recipient', 100) for sender in senders]
+    reward = Transaction.reward_transaction(Wallet(blockchain), block_reward(len(blockchain.chain)))
+    blockchain.add_block([transaction.to_json() for transaction in transactions] + [reward.to_json()])
+    return blockchain.chain[-1], transactions
+
+def partial_from(block):
+    fields = compact_block_fields(block)
+    return PartialBlock(Block.from_header(fields['header']), fields['tx_count'], fields['short_ids'], fields['prefilled'])
+
+def test_compact_block_prefills_reward():
+    block, transactions = mined_block_with_transactions()
+    fields = compact_block_fields(block)
+
+    assert fields['short_ids'] == [transaction.id for transaction in transactions]
+    assert [item['index'] for item in fields['prefilled']] == [2]
+
+def test_rebuild_from_mempool():
+    block, transactions = mined_block_with_transactions()
+    partial = partial_from(block)
+    mempool = {transaction.id: Transaction.from_json(transaction.to_json()) for transaction in transactions}
+
+    assert partial.fill_from_pool(mempool) == []
+    assert partial.to_block() == block
+
+def test_missing_transactions_are_requested():
+    block, transactions = mined_block_with_transactions()
+    partial = partial_from(block)
+
+    assert partial.fill_from_pool({transactions[0].id: transactions[0]}) == [1]
+    partial.add_transactions([1], [block.data[1]])
+    assert partial.missing() == []
+    assert partial.to_block() == block
+
+def test_conflicting_mempool_transaction_fails_rebuild():
+    block, transactions = mined_block_with_transactions()
+    partial = partial_from(block)
+    altered = Transaction.from_json(transactions[0].to_json())
+    altered.output = dict(altered.output, recipient=101)
+
+    partial.fill_from_pool({transactions[0].id: altered, transactions[1].id: transactions[1]})
+    assert partial.to_block() is None
+
+def test_non_string_short_ids_are_rejected():
+    block, _ = mined_block_with_transactions()
+    fields = compact_block_fields(block)
+
+    with pytest.raises(Exception, match='short ids must be strings'):
+        PartialBlock(Block.from_header(fields['header']), fields['tx_count'], [['a'], {'b': 1}], fields['prefilled'])
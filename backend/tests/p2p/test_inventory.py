@@ -0,0 +1,33 @@
+from backend.p2p.inventory import SeenCache, InflightRequests
+
+
+def test_seen_cache_reports_duplicates():
+    cache = SeenCache(capacity=10)
+
+    assert cache.add('a')
+    assert not cache.add('a')
+    assert 'a' in cache
+
+def test_seen_cache_is_bounded():
+    cache = SeenCache(capacity=2)
+    cache.add('a')
+    cache.add('b')
+    cache.add('c')
+
+    assert len(cache) == 2
+    assert 'a' not in cache
+    assert 'c' in cache
+
+def test_inflight_request_is_claimed_once():
+    inflight = InflightRequests(timeout=60)
+
+    assert inflight.claim('tx', 'peer-a')
+    assert not inflight.claim('tx', 'peer-b')
+    inflight.done('tx')
+    assert inflight.claim('tx', 'peer-b')
+
+def test_inflight_request_expires():
+    inflight = InflightRequests(timeout=0)
+    inflight.claim('tx', 'peer-a')
+
+    assert inflight.claim('tx', 'peer-b')
@@ -0,0 +1,36 @@
+def test_gossiped_addresses_are_validated_and_learned(network):
+    node = network.node()
+    node.connections.target_outbound = 0
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'PEERS', 'peers': ['10.0.0.1:5000', '10.1.0.2:5000', node.self_address, '0.0.0.0:5000', 'garbage', 7]})
+
+    assert len(node.connections.addresses) == 2
+    assert {'10.0.0.1:5000', '10.1.0.2:5000'} <= set(node.connections.addresses.candidates())
+
+def test_learned_addresses_fill_free_outbound_slots(network, monkeypatch):
+    node = network.node()
+    node.connections.target_outbound = 1
+    dialed = []
+
+    async def dial(address):
+        dialed.append(address)
+    monkeypatch.setattr(node, '_ensure_outbound_connection', dial)
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'PEERS', 'peers': ['10.0.0.1:5000', '10.1.0.2:5000']})
+
+    assert len(dialed) == 1 and dialed[0] in ('10.0.0.1:5000', '10.1.0.2:5000')
+
+def test_hello_address_is_learned_and_shared_with_later_peers(network):
+    node = network.node()
+    node.connections.target_outbound = 0
+    first, second = network.peer(node), network.peer(node)
+    tip = network.base_chain[-1]
+    hello = {'type': 'HELLO', 'height': len(network.base_chain) - 1, 'last_hash': tip.hash, 'work': 0}
+
+    network.deliver(first, {**hello, 'address': '10.2.0.3:5000'})
+    network.deliver(second, hello)
+
+    assert node.connections.get(first).address == '10.2.0.3:5000'
+    assert second.messages('PEERS')[-1]['peers'] == ['10.2.0.3:5000']
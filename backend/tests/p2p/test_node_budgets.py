@@ -0,0 +1,26 @@
+def flood(network, peer, count):
+    for nonce in range(count):
+        network.deliver(peer, {'type': 'PING', 'nonce': nonce}, settle=False)
+    network.settle()
+
+def test_messages_over_the_burst_are_dropped(network):
+    node = network.node()
+    flooder, quiet = network.peer(node), network.peer(node)
+
+    flood(network, flooder, 30)
+    network.deliver(quiet, {'type': 'PING', 'nonce': 'q'})
+
+    assert 20 <= len(flooder.messages('PONG')) < 30
+    assert node.throttled['PING'] == 30 - len(flooder.messages('PONG'))
+    assert flooder in node.peers
+    assert node.connections.get(flooder).budget.pressure() > 0
+    assert quiet.messages('PONG') == [{'type': 'PONG', 'nonce': 'q'}]
+
+def test_sustained_flood_gets_the_peer_disconnected(network):
+    node = network.node()
+    flooder = network.peer(node)
+
+    flood(network, flooder, 200)
+
+    assert flooder.closed and flooder not in node.peers
+    assert len(flooder.messages('PONG')) < 25
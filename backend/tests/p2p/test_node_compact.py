@@ -0,0 +1,64 @@
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+
+def mine_and_relay(network, node, transactions):
+    block = network.extend(node.blockchain.chain, 1, data=[tx.to_json() for tx in transactions])[-1]
+    network.run(node.validation.run('block', node._connect_block, block, None))
+    network.run(node._relay_block(block))
+    return block
+
+def test_compact_block_is_rebuilt_from_the_mempool(network):
+    miner, receiver = network.node(), network.node()
+    to_receiver, _ = network.link(miner, receiver)
+    transaction = network.transaction(miner)
+    with receiver.blockchain.lock:
+        receiver.transaction_pool.set_transaction(transaction)
+
+    block = mine_and_relay(network, miner, [transaction])
+
+    assert network.wait(lambda: receiver.blockchain.chain[-1].hash == block.hash)
+    assert to_receiver.messages('CMPCT_BLOCK')[-1]['short_ids'] == [transaction.id]
+    assert to_receiver.messages('BLOCK') == []
+    assert receiver.compact_stats['reconstructed'] == 1
+    assert receiver.compact_stats['fetched_missing'] == 0
+
+def test_missing_transactions_are_fetched_by_index(network):
+    miner, receiver = network.node(), network.node()
+    _, to_miner = network.link(miner, receiver)
+    transaction = network.transaction(miner)
+
+    block = mine_and_relay(network, miner, [transaction])
+
+    assert network.wait(lambda: receiver.blockchain.chain[-1].hash == block.hash)
+    assert to_miner.messages('GET_BLOCK_TXN') == [{'type': 'GET_BLOCK_TXN', 'hash': block.hash, 'indexes': [0]}]
+    assert receiver.compact_stats['fetched_missing'] == 1
+    assert transaction.id not in receiver.transaction_pool.transaction_map
+
+def test_rebuild_with_a_conflicting_id_falls_back_to_the_full_block(network):
+    miner, receiver = network.node(), network.node()
+    _, to_miner = network.link(miner, receiver)
+    transaction = network.transaction(miner)
+    sender = network.senders[0]
+    sender.blockchain = receiver.blockchain
+    impostor = Transaction(sender, Wallet().address, 5, id=transaction.id)
+    with receiver.blockchain.lock:
+        receiver.transaction_pool.set_transaction(impostor)
+
+    block = mine_and_relay(network, miner, [transaction])
+
+    assert network.wait(lambda: receiver.blockchain.chain[-1].hash == block.hash)
+    assert to_miner.messages('GET_DATA')[-1]['items'] == [{'type': 'block', 'hash': block.hash}]
+    assert receiver.compact_stats['fallbacks'] == 1
+
+def test_malformed_compact_block_only_charges_its_sender(network):
+    node = network.node()
+    node.synced = True
+    transaction = network.transaction(node)
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'CMPCT_BLOCK', 'header': {'hash': 'x'}, 'short_ids': []})
+
+    assert node.synced
+    assert transaction.id in node.transaction_pool.transaction_map
+    assert node.connections.get(peer).invalid == 1
@@ -0,0 +1,50 @@
+import json
+
+from backend.p2p.codec import CODEC_ZLIB, decode_frame, encode_frame
+
+
+def hello(network, compression):
+    tip = network.base_chain[-1]
+    message = {'type': 'HELLO', 'height': len(network.base_chain) - 1, 'last_hash': tip.hash, 'work': 0}
+    if compression is not None:
+        message['compression'] = compression
+    return message
+
+def segment_frame(socket):
+    return next(frame for frame in socket.frames if json.loads(decode_frame(frame))['type'] == 'CHAIN_SEGMENT')
+
+def test_large_messages_are_compressed_for_peers_that_offer_zlib(network):
+    node = network.node()
+    peer = network.peer(node)
+
+    network.deliver(peer, hello(network, ['lz4', 'zlib']))
+    network.deliver(peer, {'type': 'REQUEST_CHAIN', 'start': 0})
+    network.deliver(peer, {'type': 'PING', 'nonce': 1})
+
+    frame = segment_frame(peer)
+    assert isinstance(frame, bytes) and frame[0] == CODEC_ZLIB
+    assert len(frame) < len(decode_frame(frame))
+    assert [block['hash'] for block in json.loads(decode_frame(frame))['blocks']] == [block.hash for block in network.base_chain]
+    assert isinstance(peer.frames[-1], str) and peer.messages('PONG') == [{'type': 'PONG', 'nonce': 1}]
+    assert node.traffic.to_json()['sent']['CHAIN_SEGMENT']['compressed'] == 1
+
+def test_peers_without_a_common_codec_get_text_frames(network):
+    node = network.node()
+    plain, unknown = network.peer(node), network.peer(node)
+
+    network.deliver(plain, hello(network, None))
+    network.deliver(unknown, hello(network, ['lz4']))
+    for peer in (plain, unknown):
+        network.deliver(peer, {'type': 'REQUEST_CHAIN', 'start': 0})
+
+    assert all(isinstance(segment_frame(peer), str) for peer in (plain, unknown))
+
+def test_compressed_frames_are_accepted(network):
+    node = network.node()
+    peer = network.peer(node)
+    block = network.extend(network.base_chain, 1)[-1]
+
+    network.deliver(peer, encode_frame(json.dumps({'type': 'BLOCK', 'block': block.to_json()}), 'zlib'))
+
+    assert node.blockchain.chain[-1].hash == block.hash
+    assert node.traffic.to_json()['received']['BLOCK']['compressed'] == 1
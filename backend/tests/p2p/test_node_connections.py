@@ -0,0 +1,25 @@
+def test_pongs_to_our_pings_set_the_peer_rtt(network, monkeypatch):
+    monkeypatch.setattr('backend.p2p.node.P2P_PING_INTERVAL_SECONDS', 0.01)
+    node = network.node()
+    peer = network.peer(node)
+    maintenance = network.loop.create_task(node._maintain_connections())
+
+    assert network.wait(lambda: peer.messages('PING'))
+    maintenance.cancel()
+    network.deliver(peer, {'type': 'PONG', 'nonce': 'not-ours'})
+    assert node.connections.get(peer).rtt is None
+
+    network.deliver(peer, {'type': 'PONG', 'nonce': peer.messages('PING')[-1]['nonce']})
+    assert node.connections.get(peer).rtt is not None
+
+def test_full_inbound_slots_evict_the_worst_scored_peer(network):
+    node = network.node()
+    node.connections.max_inbound = 2
+    good, bad = network.accept(node), network.accept(node)
+    node.connections.record_invalid(bad)
+
+    newcomer = network.accept(node)
+
+    assert bad.closed and bad not in node.peers
+    assert {good, newcomer} <= node.peers
+    assert newcomer.messages('HELLO')
@@ -0,0 +1,40 @@
+def test_ranges_are_downloaded_from_several_peers(network):
+    chain = network.extend(network.base_chain, 450)
+    first, second, behind = network.node(chain), network.node(chain), network.node()
+
+    to_first, _ = network.link(behind, first, settle=False)
+    to_second, _ = network.link(behind, second, settle=False)
+
+    assert network.wait(lambda: behind.blockchain.chain[-1].hash == chain[-1].hash)
+    ranges = sorted(
+        (request['start'], request['end'])
+        for socket in (to_first, to_second)
+        for request in socket.messages('REQUEST_CHAIN')
+    )
+    assert to_first.messages('REQUEST_CHAIN') and to_second.messages('REQUEST_CHAIN')
+    assert ranges == [(5, 205), (205, 405), (405, 455)]
+    assert set(behind.download_stats) == {'127.0.0.1:%d' % socket.remote_address[1] for socket in (to_first, to_second)}
+
+def test_body_that_does_not_match_the_headers_restarts_sync_with_another_peer(network):
+    chain = network.extend(network.base_chain, 450)
+    forged = network.extend(network.base_chain, 450)
+    honest, behind = network.node(chain), network.node()
+    liar = network.peer(behind)
+    hello = {'type': 'HELLO', 'height': len(chain) - 1, 'work': 10 ** 6, 'last_hash': chain[-1].hash}
+
+    network.deliver(liar, hello)
+    to_honest, _ = network.link(behind, honest)
+    start = len(network.base_chain)
+    network.deliver(liar, {'type': 'HEADERS', 'start': start, 'headers': [block.header() for block in chain[start:]]})
+    request = liar.messages('REQUEST_CHAIN')[0]
+    network.deliver(liar, {
+        'type': 'CHAIN_SEGMENT',
+        'start': request['start'],
+        'more': False,
+        'blocks': [block.to_json() for block in forged[request['start']:request['end']]],
+    })
+
+    assert behind.connections.get(liar).invalid == 1
+    assert len(to_honest.messages('GET_HEADERS')) == 1
+    assert network.wait(lambda: len(behind.blockchain.chain) >= request['end'])
+    assert behind.blockchain.chain[request['start']].hash == chain[request['start']].hash
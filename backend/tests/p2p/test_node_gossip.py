@@ -0,0 +1,65 @@
+def test_transactions_are_announced_and_fetched_on_request(network):
+    first, middle, last = network.node(), network.node(), network.node()
+    first_to_middle, _ = network.link(first, middle)
+    middle_to_last, _ = network.link(middle, last)
+    transaction = network.transaction(first)
+
+    network.run(first._relay_transaction(transaction))
+
+    assert network.wait(lambda: transaction.id in last.transaction_pool.transaction_map)
+    assert first_to_middle.messages('INV')[-1]['items'] == [{'type': 'tx', 'hash': transaction.id}]
+    assert [message['transaction']['id'] for message in first_to_middle.messages('TRANSACTION')] == [transaction.id]
+    assert middle_to_last.messages('INV')[-1]['items'] == [{'type': 'tx', 'hash': transaction.id}]
+
+def test_an_object_is_requested_from_one_announcer_only(network):
+    node = network.node()
+    first, second = network.peer(node), network.peer(node)
+    inv = {'type': 'INV', 'items': [{'type': 'tx', 'hash': 'abcdef12'}]}
+
+    network.deliver(first, inv)
+    network.deliver(second, inv)
+
+    assert first.messages('GET_DATA') == [{'type': 'GET_DATA', 'items': [{'type': 'tx', 'hash': 'abcdef12'}]}]
+    assert second.messages('GET_DATA') == []
+
+def test_get_data_serves_known_objects_only(network):
+    node = network.node()
+    peer = network.peer(node)
+    tip = network.base_chain[-1]
+
+    network.deliver(peer, {'type': 'GET_DATA', 'items': [{'type': 'block', 'hash': tip.hash}, {'type': 'block', 'hash': 'unknown'}]})
+
+    assert [message['block']['hash'] for message in peer.messages('BLOCK')] == [tip.hash]
+
+def test_invalid_relayed_block_only_charges_its_sender(network):
+    node = network.node()
+    node.synced = True
+    transaction = network.transaction(node)
+    peer = network.peer(node)
+    block = network.extend(network.base_chain, 1)[-1].to_json()
+    block['data'][-1]['output'] = {network.miner.address: 10 ** 12}
+
+    network.deliver(peer, {'type': 'BLOCK', 'block': block})
+
+    assert node.synced
+    assert transaction.id in node.transaction_pool.transaction_map
+    assert node.connections.get(peer).invalid == 1
+    assert len(node.blockchain.chain) == len(network.base_chain)
+
+def test_block_rejected_for_a_transaction_drops_only_our_identical_copy(network):
+    node = network.node()
+    confirmed = network.transaction(node, sender_index=0)
+    stale = network.transaction(node, sender_index=0)
+    unrelated = network.transaction(node, sender_index=1)
+    peer = network.peer(node)
+    chain = network.extend(network.base_chain, 1, data=[confirmed.to_json()])
+    network.deliver(peer, {'type': 'BLOCK', 'block': chain[-1].to_json()})
+    assert node.blockchain.chain[-1].hash == chain[-1].hash
+
+    # `stale` spent the balance `confirmed` already used, so a block carrying it is invalid.
+    invalid = network.extend(chain, 1, data=[stale.to_json()])[-1]
+    network.deliver(peer, {'type': 'BLOCK', 'block': invalid.to_json()})
+
+    assert stale.id not in node.transaction_pool.transaction_map
+    assert unrelated.id in node.transaction_pool.transaction_map
+    assert node.blockchain.chain[-1].hash == chain[-1].hash
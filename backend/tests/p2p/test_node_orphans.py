@@ -0,0 +1,33 @@
+def deliver_block(network, peer, block):
+    network.deliver(peer, {'type': 'BLOCK', 'block': block.to_json()})
+
+def requested_blocks(peer):
+    return [item['hash'] for message in peer.messages('GET_DATA') for item in message['items']]
+
+def test_orphans_fetch_their_ancestors_and_connect_once_they_arrive(network):
+    node = network.node()
+    peer = network.peer(node)
+    first, second, third = network.extend(network.base_chain, 3)[-3:]
+
+    deliver_block(network, peer, third)
+    deliver_block(network, peer, second)
+    assert requested_blocks(peer) == [second.hash, first.hash]
+    assert len(node.blockchain.chain) == len(network.base_chain)
+
+    deliver_block(network, peer, first)
+
+    assert [block.hash for block in node.blockchain.chain[-3:]] == [first.hash, second.hash, third.hash]
+    assert node.orphans.connected == 2
+    assert peer.messages('GET_HEADERS') == []
+
+def test_deep_orphan_chain_falls_back_to_headers_sync(network, monkeypatch):
+    monkeypatch.setattr('backend.p2p.node.P2P_ORPHAN_MAX_DEPTH', 1)
+    node = network.node()
+    peer = network.peer(node)
+    second, third = network.extend(network.base_chain, 3)[-2:]
+
+    deliver_block(network, peer, third)
+    deliver_block(network, peer, second)
+
+    assert requested_blocks(peer) == [second.hash]
+    assert peer.messages('GET_HEADERS')[0]['locator'][0] == network.base_chain[-1].hash
@@ -0,0 +1,62 @@
+import asyncio
+
+
+def stall(socket):
+    """
+    Hold every send on `socket` until the returned event is set.
+    """
+    gate = asyncio.Event()
+    send = socket.send
+
+    async def gated(frame):
+        await gate.wait()
+        await send(frame)
+
+    socket.send = gated
+    return gate
+
+def test_a_stalled_peer_does_not_delay_the_others(network):
+    node = network.node()
+    stalled, healthy = network.peer(node), network.peer(node)
+    stall(stalled)
+    transaction = network.transaction(node)
+
+    network.run(node._relay_transaction(transaction))
+    network.settle(timeout=0.5)
+
+    assert [message['items'][0]['hash'] for message in healthy.messages('INV')] == [transaction.id]
+    assert stalled.messages() == []
+    assert stalled in node.peers
+
+def test_blocks_overtake_queued_transaction_gossip(network):
+    node = network.node()
+    peer = network.peer(node)
+    gate = stall(peer)
+    first, second = network.transaction(node, sender_index=0), network.transaction(node, sender_index=1)
+    block = network.extend(network.base_chain, 1)[-1]
+
+    network.run(node._relay_transaction(first))
+    network.run(asyncio.sleep(0.01))
+    network.run(node._relay_transaction(second))
+    network.run(node._relay_block(block))
+    gate.set()
+    network.settle()
+
+    assert [message['type'] for message in peer.messages()] == ['INV', 'CMPCT_BLOCK', 'INV']
+    assert peer.messages('INV')[-1]['items'][0]['hash'] == second.id
+
+def test_a_peer_too_far_behind_is_disconnected(network, monkeypatch):
+    monkeypatch.setattr('backend.p2p.node.P2P_OUTBOUND_MAX_LAG_SECONDS', 0.01)
+    node = network.node()
+    slow, healthy = network.peer(node), network.peer(node)
+    stall(slow)
+
+    # The first message is stuck in the writer; the second waits in the queue past the limit.
+    for sender_index in range(3):
+        network.run(node._relay_transaction(network.transaction(node, sender_index=sender_index)))
+        network.run(asyncio.sleep(0.05))
+    network.settle(timeout=0.5)
+
+    assert slow not in node.peers
+    assert slow.closed
+    assert healthy in node.peers
@@ -0,0 +1,49 @@
+from backend.p2p.reconcile import MempoolSketch
+
+
+def share(node, transaction):
+    with node.blockchain.lock:
+        node.transaction_pool.set_transaction(transaction)
+
+def sent_ids(socket):
+    return [tx['id'] for message in socket.messages('MEMPOOL_TXS') for tx in message['transactions']]
+
+def test_linked_nodes_exchange_only_the_transactions_the_other_lacks(network):
+    first, second = network.node(), network.node()
+    first.synced = second.synced = True
+    shared = network.transaction(first, sender_index=0)
+    share(second, shared)
+    only_first = network.transaction(first, sender_index=1)
+    only_second = network.transaction(second, sender_index=2)
+
+    to_second, to_first = network.link(first, second)
+
+    assert to_second.messages('MEMPOOL_SKETCH') and to_first.messages('MEMPOOL_SKETCH')
+    assert sent_ids(to_second) == [only_first.id]
+    assert sent_ids(to_first) == [only_second.id]
+    for node in (first, second):
+        assert set(node.transaction_pool.transaction_map) == {shared.id, only_first.id, only_second.id}
+
+def test_sketch_is_answered_with_the_uncovered_transactions(network):
+    node = network.node()
+    held = network.transaction(node, sender_index=0)
+    missing = network.transaction(node, sender_index=1)
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'MEMPOOL_SKETCH', 'sketch': MempoolSketch.from_txids([held.id]).to_json()})
+
+    assert sent_ids(peer) == [missing.id]
+    assert held.id not in node.peer_inventory[peer].known
+
+def test_unsynced_node_waits_for_its_chain_before_sketching(network):
+    node = network.node()
+    network.transaction(node)
+    peer = network.peer(node)
+    tip = network.base_chain[-1]
+
+    network.deliver(peer, {'type': 'HELLO', 'height': len(network.base_chain) + 3, 'last_hash': 'ahead', 'work': 10 ** 9})
+    assert peer.messages('MEMPOOL_SKETCH') == []
+
+    network.deliver(peer, {'type': 'BLOCK', 'block': network.extend(network.base_chain, 1)[-1].to_json()})
+    assert len(peer.messages('MEMPOOL_SKETCH')) == 1
+    assert node.blockchain.chain[-2].hash == tip.hash
@@ -0,0 +1,33 @@
+import json
+
+
+def compact(value):
+    return json.dumps(value, separators=(',', ':'))
+
+def served_text(network, node, kind, item_hash):
+    asker = network.peer(node)
+    network.deliver(asker, {'type': 'GET_DATA', 'items': [{'type': kind, 'hash': item_hash}]})
+    return asker.sent[-1]
+
+def test_relayed_block_is_served_with_the_text_it_arrived_in(network):
+    node = network.node()
+    peer = network.peer(node)
+    block = network.extend(network.base_chain, 1)[-1]
+    payload = compact(block.to_json())
+
+    network.deliver(peer, '{"type": "BLOCK", "block": ' + payload + '}')
+
+    assert node.blockchain.chain[-1].hash == block.hash
+    assert served_text(network, node, 'block', block.hash).endswith('"block": ' + payload + '}')
+
+def test_relayed_transaction_is_served_with_the_text_it_arrived_in(network):
+    sender = network.node()
+    node = network.node()
+    peer = network.peer(node)
+    transaction = network.transaction(sender)
+    payload = compact(transaction.to_json())
+
+    network.deliver(peer, '{"type": "TRANSACTION", "transaction": ' + payload + '}')
+
+    assert transaction.id in node.transaction_pool.transaction_map
+    assert served_text(network, node, 'tx', transaction.id) == '{"type": "TRANSACTION", "transaction": ' + payload + '}'
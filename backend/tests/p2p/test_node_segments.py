@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture
+def one_block_chunks(monkeypatch):
+    monkeypatch.setattr('backend.p2p.node.P2P_SEGMENT_CHUNK_BLOCKS', 1)
+
+def test_acknowledged_stream_waits_for_acks_past_its_window(network, one_block_chunks):
+    node = network.node(network.extend(network.base_chain, 6))
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'REQUEST_CHAIN', 'start': 0, 'ack': True})
+    assert [chunk['start'] for chunk in peer.messages('CHAIN_SEGMENT')] == [0, 1, 2, 3]
+
+    network.deliver(peer, {'type': 'SEGMENT_ACK', 'next': 2})
+    chunks = peer.messages('CHAIN_SEGMENT')
+    assert [chunk['start'] for chunk in chunks] == [0, 1, 2, 3, 4, 5]
+    assert all(len(chunk['blocks']) == 1 and chunk['more'] for chunk in chunks)
+
+def test_chunks_are_bounded_in_bytes(network, monkeypatch):
+    monkeypatch.setattr('backend.p2p.node.P2P_SEGMENT_CHUNK_BYTES', 1)
+    chain = network.extend(network.base_chain, 2)
+    node = network.node(chain)
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'REQUEST_CHAIN', 'start': 2, 'end': 5})
+
+    chunks = peer.messages('CHAIN_SEGMENT')
+    assert [(chunk['start'], chunk['more']) for chunk in chunks] == [(2, True), (3, True), (4, False)]
+    assert [chunk['blocks'][0]['hash'] for chunk in chunks] == [block.hash for block in chain[2:5]]
+
+def test_sync_acknowledges_each_chunk(network, one_block_chunks):
+    ahead = network.node(network.extend(network.base_chain, 8))
+    behind = network.node()
+
+    to_ahead, _ = network.link(behind, ahead)
+
+    assert network.wait(lambda: behind.blockchain.chain[-1].hash == ahead.blockchain.chain[-1].hash)
+    first_missing = len(network.base_chain)
+    assert [ack['next'] for ack in to_ahead.messages('SEGMENT_ACK')] == list(range(first_missing + 1, len(ahead.blockchain.chain) + 1))
@@ -0,0 +1,45 @@
+def tip_height(network):
+    return len(network.base_chain) - 1
+
+def test_get_headers_answers_from_the_fork_point(network):
+    chain = network.extend(network.base_chain, 4)
+    node = network.node(chain)
+    peer = network.peer(node)
+
+    network.deliver(peer, {'type': 'GET_HEADERS', 'locator': [network.base_chain[-1].hash]})
+
+    headers = peer.messages('HEADERS')[-1]
+    assert headers['start'] == len(network.base_chain)
+    assert [header['hash'] for header in headers['headers']] == [block.hash for block in chain[len(network.base_chain):]]
+    assert all('data' not in header for header in headers['headers'])
+
+def test_headers_first_sync_fetches_only_missing_bodies(network):
+    ahead = network.node(network.extend(network.base_chain, 5))
+    behind = network.node()
+
+    to_ahead, _ = network.link(behind, ahead)
+
+    assert network.wait(lambda: behind.blockchain.chain[-1].hash == ahead.blockchain.chain[-1].hash)
+    assert to_ahead.messages('GET_HEADERS')[0]['locator'][0] == network.base_chain[-1].hash
+    assert [request['start'] for request in to_ahead.messages('REQUEST_CHAIN')] == [len(network.base_chain)]
+    assert behind.synced
+
+def test_invalid_headers_charge_only_the_sender(network):
+    node = network.node()
+    node.synced = True
+    transaction = network.transaction(node)
+    tip = network.base_chain[-1]
+    liar = network.peer(node)
+    honest = network.peer(node)
+
+    network.deliver(liar, {'type': 'HELLO', 'height': tip_height(network) + 50, 'work': 10 ** 9, 'last_hash': 'x'})
+    network.deliver(honest, {'type': 'HELLO', 'height': tip_height(network) + 5, 'work': 10 ** 6, 'last_hash': 'y'})
+    header = network.extend(network.base_chain, 1)[-1].header()
+    network.deliver(liar, {'type': 'HEADERS', 'start': len(network.base_chain), 'headers': [{**header, 'last_hash': 'forged'}]})
+
+    assert node.synced
+    assert transaction.id in node.transaction_pool.transaction_map
+    assert node.connections.get(liar).invalid == 1
+    assert len(liar.messages('GET_HEADERS')) == 1
+    assert len(honest.messages('GET_HEADERS')) == 1
+    assert node.blockchain.chain[-1].hash == tip.hash
@@ -0,0 +1,33 @@
+import threading
+
+
+def test_other_peers_are_served_while_a_block_waits_for_validation(network):
+    node = network.node()
+    sender, pinger = network.peer(node), network.peer(node)
+    block = network.extend(network.base_chain, 1)[-1]
+
+    # Holding the chain lock keeps the block's validation job waiting on the worker thread.
+    with node.blockchain.lock:
+        network.deliver(sender, {'type': 'BLOCK', 'block': block.to_json()}, settle=False)
+        network.deliver(pinger, {'type': 'PING', 'nonce': 7}, settle=False)
+        assert network.wait(lambda: pinger.messages('PONG'))
+        assert node.blockchain.chain[-1].hash != block.hash
+
+    assert network.wait(lambda: node.blockchain.chain[-1].hash == block.hash)
+    assert pinger.messages('PONG') == [{'type': 'PONG', 'nonce': 7}]
+
+def test_relayed_blocks_connect_on_the_validation_thread(network):
+    node = network.node()
+    peer = network.peer(node)
+    threads = []
+    connect = node._connect_block
+
+    def connect_block(block, encoded=None):
+        threads.append(threading.current_thread().name)
+        return connect(block, encoded)
+
+    node._connect_block = connect_block
+    network.deliver(peer, {'type': 'BLOCK', 'block': network.extend(network.base_chain, 1)[-1].to_json()})
+
+    assert threads == ['p2p-validation']
+    assert node.validation.to_json()['jobs']['block']['jobs'] == 1
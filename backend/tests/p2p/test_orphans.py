@@ -0,0 +1,51 @@
+from backend.p2p.orphans import OrphanPool
+
+
+class FakeBlock:
+    def __init__(self, hash, last_hash):
+        self.hash = hash
+        self.last_hash = last_hash
+
+
+def test_missing_ancestor_walks_up_held_orphans():
+    pool = OrphanPool()
+    pool.add(FakeBlock('c', 'b'), None, 'peer')
+    pool.add(FakeBlock('d', 'c'), None, 'peer')
+
+    assert pool.missing_ancestor('d') == ('b', 2)
+
+def test_missing_ancestor_counts_orphans_held_above_a_fetched_parent():
+    pool = OrphanPool()
+    pool.add(FakeBlock('d', 'c'), None, 'peer')
+    pool.add(FakeBlock('c', 'b'), None, 'peer')
+
+    assert pool.missing_ancestor('c') == ('b', 2)
+
+def test_pop_children_removes_them():
+    pool = OrphanPool()
+    pool.add(FakeBlock('c', 'b'), 'text', 'peer')
+
+    children = pool.pop_children('b')
+
+    assert [(block.hash, encoded, peer) for block, encoded, peer in children] == [('c', 'text', 'peer')]
+    assert 'c' not in pool
+    assert pool.pop_children('b') == []
+
+def test_discard_descendants():
+    pool = OrphanPool()
+    pool.add(FakeBlock('c', 'b'), None, 'peer')
+    pool.add(FakeBlock('d', 'c'), None, 'peer')
+    pool.add(FakeBlock('x', 'y'), None, 'peer')
+
+    assert pool.discard_descendants('b') == 2
+    assert len(pool) == 1
+
+def test_oldest_orphan_is_evicted():
+    pool = OrphanPool(capacity=2)
+    for name in 'abc':
+        pool.add(FakeBlock(name, 'parent-' + name), None, 'peer')
+
+    assert 'a' not in pool
+    assert len(pool) == 2
+    assert pool.evicted == 1
+    assert pool.pop_children('parent-a') == []
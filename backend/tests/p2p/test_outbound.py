@@ -0,0 +1,58 @@
+import asyncio
+
+from backend.p2p.outbound import (
+    OutboundQueue,
+    PRIORITY_CONTROL,
+    PRIORITY_BLOCK,
+    PRIORITY_TRANSACTION,
+    message_priority,
+)
+
+
+def drain(queue, count):
+    async def run():
+        return [await queue.get() for _ in range(count)]
+
+    return asyncio.run(run())
+
+def test_message_priorities():
+    assert message_priority('PING') == PRIORITY_CONTROL
+    assert message_priority('CMPCT_BLOCK') == PRIORITY_BLOCK
+    assert message_priority('INV') == PRIORITY_TRANSACTION
+
+def test_blocks_are_written_before_transactions():
+    queue = OutboundQueue()
+    queue.push('tx', PRIORITY_TRANSACTION)
+    queue.push('block', PRIORITY_BLOCK)
+    queue.push('hello', PRIORITY_CONTROL)
+
+    assert drain(queue, 3) == ['hello', 'block', 'tx']
+
+def test_full_queue_drops_transactions_for_blocks():
+    queue = OutboundQueue(depth=2)
+    queue.push('tx-1', PRIORITY_TRANSACTION)
+    queue.push('tx-2', PRIORITY_TRANSACTION)
+
+    assert not queue.push('block', PRIORITY_BLOCK)
+    assert queue.dropped == 1
+    assert drain(queue, 2) == ['block', 'tx-1']
+
+def test_full_queue_rejects_lower_priority():
+    queue = OutboundQueue(depth=1)
+    queue.push('block', PRIORITY_BLOCK)
+
+    assert not queue.push('tx', PRIORITY_TRANSACTION)
+    assert not queue.overflowed
+
+def test_control_overflow_is_reported():
+    queue = OutboundQueue(depth=1)
+    queue.push('hello', PRIORITY_CONTROL)
+
+    assert not queue.push('ping', PRIORITY_CONTROL)
+    assert queue.overflowed
+
+def test_closed_queue_stops_writer():
+    queue = OutboundQueue()
+    queue.close()
+
+    assert drain(queue, 1) == [None]
@@ -0,0 +1,42 @@
+from backend.p2p.peers import ConnectionManager, PeerScore
+
+
+def test_pong_updates_rtt_only_for_the_last_ping():
+    score = PeerScore(inbound=False)
+    score.ping_sent('abc')
+
+    assert not score.pong_received('other')
+    assert score.pong_received('abc')
+    assert score.rtt is not None
+    assert not score.pong_received('abc')
+
+def test_invalid_data_lowers_the_score():
+    good, bad = PeerScore(inbound=False), PeerScore(inbound=False)
+    bad.invalid = 1
+
+    assert bad.score() < good.score()
+
+def test_dial_candidates_fill_the_outbound_target():
+    manager = ConnectionManager(target_outbound=2)
+    for port in range(4):
+        manager.addresses.learn(f'peer:{port}')
+    manager.add('socket', inbound=False, address='peer:0')
+
+    candidates = manager.dial_candidates()
+
+    assert len(candidates) == 1
+    assert candidates[0] != 'peer:0'
+
+def test_ranked_puts_the_best_score_first():
+    manager = ConnectionManager()
+    manager.add('slow', inbound=True).rtt = 1.5
+    manager.add('fast', inbound=True).rtt = 0.01
+
+    assert manager.ranked(['slow', 'fast']) == ['fast', 'slow']
+    assert manager.worst_inbound() == 'slow'
+
+def test_repeated_invalid_data_disconnects():
+    manager = ConnectionManager()
+    manager.add('peer', inbound=True)
+
+    assert [manager.record_invalid('peer') for _ in range(3)] == [False, False, True]
@@ -0,0 +1,58 @@
+import pytest
+
+from backend.p2p.reconcile import MempoolSketch
+
+
+class FakeTransaction:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_sketch_round_trip():
+    sketch = MempoolSketch.from_txids(['a1b2c3d4', 'e5f6a7b8', 'c9d0e1f2'])
+    decoded = MempoolSketch.from_json(sketch.to_json())
+
+    assert decoded.filter == sketch.filter
+    assert len(decoded) == 3
+    assert all(txid in decoded for txid in ['a1b2c3d4', 'e5f6a7b8', 'c9d0e1f2'])
+
+def test_split_returns_only_what_the_peer_lacks():
+    sketch = MempoolSketch.from_txids(['shared-1', 'shared-2', 'theirs'])
+    ours = [FakeTransaction('shared-1'), FakeTransaction('mine'), FakeTransaction('shared-2')]
+
+    missing, held = sketch.split(ours)
+
+    assert [tx.id for tx in missing] == ['mine']
+    assert [tx.id for tx in held] == ['shared-1', 'shared-2']
+
+def test_sketch_costs_about_a_byte_per_transaction():
+    txids = [f'{i:08x}' for i in range(10_000)]
+    sketch = MempoolSketch.from_txids(txids)
+    others = [f'{i:08x}' for i in range(10_000, 20_000)]
+
+    assert len(sketch.filter) == 12_500
+    assert all(txid in sketch for txid in txids)
+    assert sum(txid in sketch for txid in others) < 300
+
+def test_sketch_is_capped():
+    assert len(MempoolSketch.from_txids(map(str, range(10)), limit=4)) == 4
+
+@pytest.mark.parametrize('change', [
+    {'bits': 63},
+    {'bits': 10 ** 9},
+    {'hashes': 0},
+    {'hashes': True},
+    {'salt': 'zz'},
+    {'salt': 'abcd'},
+    {'filter': 'not base64!'},
+    {'filter': ''},
+])
+def test_malformed_sketch_is_rejected(change):
+    sketch_json = {**MempoolSketch.from_txids(['a1b2c3d4']).to_json(), **change}
+    with pytest.raises(ValueError):
+        MempoolSketch.from_json(sketch_json)
+
+@pytest.mark.parametrize('sketch_json', [None, {'salt': 's'}, {'ids': ['a']}])
+def test_non_sketch_is_rejected(sketch_json):
+    with pytest.raises(ValueError):
+        MempoolSketch.from_json(sketch_json)
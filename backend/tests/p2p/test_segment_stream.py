@@ -0,0 +1,40 @@
+import asyncio
+
+from backend.p2p.sync import SegmentStream
+
+
+def test_unacked_stream_never_waits():
+    async def run():
+        stream = SegmentStream(0, 100, acked=False, window=1)
+        stream.chunk_sent(10)
+        stream.chunk_sent(20)
+        return await stream.wait_for_window()
+
+    assert asyncio.run(run())
+
+def test_acked_stream_waits_for_window():
+    async def run():
+        stream = SegmentStream(0, 100, acked=True, window=2)
+        stream.chunk_sent(10)
+        stream.chunk_sent(20)
+        waiter = asyncio.ensure_future(stream.wait_for_window())
+        await asyncio.sleep(0)
+        blocked = not waiter.done()
+        stream.ack(10)
+        return blocked, await waiter, list(stream.in_flight)
+
+    blocked, ready, in_flight = asyncio.run(run())
+    assert blocked
+    assert ready
+    assert in_flight == [20]
+
+def test_cancelled_stream_stops():
+    async def run():
+        stream = SegmentStream(0, 100, acked=True, window=1)
+        stream.chunk_sent(10)
+        waiter = asyncio.ensure_future(stream.wait_for_window())
+        await asyncio.sleep(0)
+        stream.cancel()
+        return await waiter
+
+    assert not asyncio.run(run())
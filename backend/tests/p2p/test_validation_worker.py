@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.p2p.validation import ValidationWorker
+
+
+def test_jobs_run_off_the_loop_in_order():
+    async def run():
+        worker = ValidationWorker(asyncio.get_running_loop())
+        worker.start()
+        order = []
+        results = await asyncio.gather(*(worker.run('block', order.append, i) for i in range(5)))
+        return worker, order, results
+
+    worker, order, results = asyncio.run(run())
+    assert order == [0, 1, 2, 3, 4]
+    assert results == [None] * 5
+    assert worker.to_json()['jobs']['block']['jobs'] == 5
+
+def test_job_errors_are_raised_on_the_loop():
+    def fail():
+        raise Exception('invalid block')
+
+    async def run():
+        worker = ValidationWorker(asyncio.get_running_loop())
+        worker.start()
+        with pytest.raises(Exception, match='invalid block'):
+            await worker.run('block', fail)
+        return worker
+
+    worker = asyncio.run(run())
+    assert worker.to_json()['jobs']['block']['failures'] == 1
+
+def test_jobs_hold_the_shared_lock():
+    lock = threading.RLock()
+
+    async def run():
+        worker = ValidationWorker(asyncio.get_running_loop(), lock=lock)
+        worker.start()
+        with lock:
+            job = worker.run('block', lambda: 'ran')
+            await asyncio.sleep(0.05)
+            assert not job.done()
+        return await job
+
+    assert asyncio.run(run()) == 'ran'
+
+def test_submitted_job_failures_are_logged(capsys):
+    def fail():
+        raise Exception('purge failed')
+
+    async def run():
+        worker = ValidationWorker(asyncio.get_running_loop())
+        worker.start()
+        worker.submit('purge', fail)
+        await worker.run('block', lambda: None)
+        return worker
+
+    worker = asyncio.run(run())
+    assert worker.to_json()['jobs']['purge']['failures'] == 1
+    assert 'Validation job purge failed: purge failed' in capsys.readouterr().out
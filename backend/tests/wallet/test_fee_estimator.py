@@ -0,0 +1,54 @@
+from backend.wallet.fee_estimator import FeeEstimator
+from backend.wallet.transaction import Transaction
+from backend.blockchain.block import Block
+
+
+def make_transaction(txid, fee):
+    return Transaction(
+        id=txid,
+        output={'recipient': 1},
+        input={'timestamp': 0, 'amount': 1 + fee, 'address': 'sender', 'fee': fee}
+    )
+
+def make_block(height, transactions):
+    return Block(height, f'hash-{height - 1}', f'hash-{height}', [tx.to_json() for tx in transactions], 1, 0)
+
+def test_estimator_learns_confirmation_delay_by_fee_rate():
+    estimator = FeeEstimator(max_target=5, min_samples=3)
+    chain = [make_block(0, [])]
+    estimator.process_chain(chain)
+
+    fast = [make_transaction(f'fast-{i}', 50_000) for i in range(5)]
+    slow = [make_transaction(f'slow-{i}', 2_000) for i in range(5)]
+    for tx in fast + slow:
+        estimator.track(tx, 0)
+
+    chain.append(make_block(1, fast))
+    estimator.process_chain(chain, {tx.id for tx in slow})
+    for height in range(2, 5):
+        chain.append(make_block(height, []))
+        estimator.process_chain(chain, {tx.id for tx in slow})
+    chain.append(make_block(5, slow))
+    estimator.process_chain(chain, set())
+
+    fast_rate = fast[0].fee_rate()
+    slow_rate = slow[0].fee_rate()
+    assert slow_rate < estimator.estimate_fee_rate(1) <= fast_rate
+    assert estimator.estimate_fee_rate(5) <= slow_rate
+
+def test_estimator_without_history_returns_none():
+    estimator = FeeEstimator()
+    estimator.process_chain([make_block(0, [])])
+
+    assert estimator.estimate_fee_rate(3) is None
+
+def test_estimator_forgets_transactions_dropped_from_mempool():
+    estimator = FeeEstimator()
+    chain = [make_block(0, [])]
+    estimator.process_chain(chain)
+    estimator.track(make_transaction('gone', 20_000), 0)
+
+    chain.append(make_block(1, []))
+    estimator.process_chain(chain, set())
+
+    assert 'gone' not in estimator.tracked
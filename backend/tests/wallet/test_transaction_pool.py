@@ -50,3 +50,69 @@ def test_clear_blockchain_transactions():
 
     assert not tx1.id in transaction_pool.transaction_map
     assert not tx2.id in transaction_pool.transaction_map
+
+
+def synthetic_transaction(txid, fee, outputs=1):
+    output = {f'recipient-{i}': 1 for i in range(outputs)}
+    return Transaction(
+        id=txid,
+        output=output,
+        input={'timestamp': 0, 'amount': sum(output.values()) + fee, 'address': f'sender-{txid}', 'fee': fee}
+    )
+
+def test_block_template_respects_byte_budget():
+    transaction_pool = TransactionPool()
+    for i in range(20):
+        tx = synthetic_transaction(f'tx-{i:02d}', fee=10_000 + i)
+        transaction_pool.transaction_map[tx.id] = tx
+
+    budget = 5 * (transaction_pool.transaction_map['tx-00'].size_bytes() + 2)
+    selected = transaction_pool.block_template(max_bytes=budget)
+
+    assert sum(tx.size_bytes() + 2 for tx in selected) <= budget
+    assert [tx.id for tx in selected] == ['tx-19', 'tx-18', 'tx-17', 'tx-16', 'tx-15']
+
+def test_block_template_prefers_fee_rate_over_raw_fee():
+    transaction_pool = TransactionPool()
+    bulky = synthetic_transaction('bulky', fee=50_000, outputs=200)
+    small = [synthetic_transaction(f'small-{i}', fee=20_000) for i in range(10)]
+    for tx in [bulky, *small]:
+        transaction_pool.transaction_map[tx.id] = tx
+
+    selected = transaction_pool.block_template(max_bytes=bulky.size_bytes())
+
+    assert bulky not in selected
+    assert len(selected) == 10
+
+def test_block_template_skips_vetoed_transactions():
+    transaction_pool = TransactionPool()
+    for i in range(3):
+        tx = synthetic_transaction(f'tx-{i}', fee=10_000)
+        transaction_pool.transaction_map[tx.id] = tx
+
+    selected = transaction_pool.block_template(accept=lambda tx: tx.id != 'tx-1')
+
+    assert sorted(tx.id for tx in selected) == ['tx-0', 'tx-2']
+
+def test_version_changes_with_mempool_contents():
+    transaction_pool = TransactionPool()
+    versions = [transaction_pool.version]
+    transaction_pool.transaction_map['txid'] = object()
+    versions.append(transaction_pool.version)
+    transaction_pool.transaction_map.pop('txid')
+    versions.append(transaction_pool.version)
+
+    assert len(set(versions)) == 3
+
+def test_snapshot_is_shared_until_the_mempool_changes():
+    transaction_pool = TransactionPool()
+    transaction_pool.transaction_map['a'] = object()
+    snapshot = transaction_pool.snapshot()
+
+    assert transaction_pool.snapshot() is snapshot
+    transaction_pool.transaction_map['b'] = object()
+    latest = transaction_pool.snapshot()
+
+    assert sorted(snapshot.transactions) == ['a']
+    assert sorted(latest.transactions) == ['a', 'b']
+    assert latest.version == transaction_pool.version
@@ -0,0 +1,148 @@
+import bisect
+from collections import deque
+
+from backend.config import (
+    FEE_ESTIMATE_MAX_TARGET,
+    FEE_ESTIMATE_HISTORY_BLOCKS,
+    FEE_ESTIMATE_SUCCESS_RATE,
+    FEE_ESTIMATE_MIN_SAMPLES,
+)
+
+
+def _fee_rate_buckets(start=1.0, stop=10_000.0, step=1.25):
+    """
+    Geometric fee-rate bucket lower bounds (per byte).
+    """
+    buckets = []
+    value = start
+    while value <= stop:
+        buckets.append(value)
+        value *= step
+    return buckets
+
+
+class FeeEstimator:
+    """
+    Track how many blocks mempool transactions wait before confirmation, grouped by fee-rate
+    bucket, and keep a precomputed table of the lowest fee rate that confirmed within N blocks.
+    """
+    def __init__(
+        self,
+        max_target=FEE_ESTIMATE_MAX_TARGET,
+        history_blocks=FEE_ESTIMATE_HISTORY_BLOCKS,
+        success_rate=FEE_ESTIMATE_SUCCESS_RATE,
+        min_samples=FEE_ESTIMATE_MIN_SAMPLES,
+    ):
+        self.max_target = max_target
+        self.history_blocks = history_blocks
+        self.success_rate = success_rate
+        self.min_samples = min_samples
+        self.buckets = _fee_rate_buckets()
+        # txid -> (bucket index, tip height when first seen)
+        self.tracked = {}
+        # (confirmation height, bucket index, blocks waited)
+        self.observations = deque()
+        self.height = None
+        self.tip_hash = None
+        self.table = {}
+
+    def bucket_for(self, fee_rate):
+        return max(0, bisect.bisect_right(self.buckets, fee_rate) - 1)
+
+    def track(self, transaction, height):
+        """
+        Start timing a transaction that entered the mempool while the tip was at `height`.
+        """
+        if transaction.id in self.tracked:
+            return
+        self.tracked[transaction.id] = (self.bucket_for(transaction.fee_rate()), height)
+
+    def process_chain(self, chain, pending_ids=()):
+        """
+        Record confirmations from blocks appended since the last call and rebuild the table.
+        Tracked transactions that left the mempool without confirming are forgotten.
+        """
+        tip_height = len(chain) - 1
+        if self.height is None:
+            self.height = tip_height
+            self.tip_hash = chain[-1].hash
+            return
+
+        start = min(self.height + 1, len(chain))
+        for height in range(start, len(chain)):
+            if not self.tracked:
+                break
+            for transaction in chain[height].data:
+                entry = self.tracked.pop(transaction.get("id"), None)
+                if entry:
+                    bucket, seen_height = entry
+                    self.observations.append((height, bucket, max(1, height - seen_height)))
+
+        self.height = tip_height
+        self.tip_hash = chain[-1].hash
+
+        oldest = tip_height - self.history_blocks
+        while self.observations and self.observations[0][0] <= oldest:
+            self.observations.popleft()
+        self.tracked = {
+            txid: entry
+            for txid, entry in self.tracked.items()
+            if txid in pending_ids and entry[1] > oldest
+        }
+        self._rebuild_table()
+
+    def _rebuild_table(self):
+        confirmed = [[0] * (self.max_target + 1) for _ in self.buckets]
+        totals = [0] * len(self.buckets)
+        for _, bucket, delay in self.observations:
+            totals[bucket] += 1
+            if delay <= self.max_target:
+                confirmed[bucket][delay] += 1
+
+        # Still-pending transactions count as misses for every target they already outwaited.
+        waiting = [[0] * (self.max_target + 1) for _ in self.buckets]
+        for bucket, seen_height in self.tracked.values():
+            age = min(self.max_target, self.height - seen_height)
+            if age > 0:
+                waiting[bucket][age] += 1
+
+        # Running sums turn per-delay counts into "confirmed within t" / "waited at least t".
+        for bucket in range(len(self.buckets)):
+            for target in range(1, self.max_target + 1):
+                confirmed[bucket][target] += confirmed[bucket][target - 1]
+            for target in range(self.max_target - 1, 0, -1):
+                waiting[bucket][target] += waiting[bucket][target + 1]
+
+        table = {}
+        for target in range(1, self.max_target + 1):
+            best = None
+            group_hits = group_total = 0
+            # Walk down from the highest fee rate, pooling sparse buckets until they have enough
+            # samples; stop at the first pooled group that misses the success threshold.
+            for bucket in range(len(self.buckets) - 1, -1, -1):
+                group_hits += confirmed[bucket][target]
+                group_total += totals[bucket] + waiting[bucket][target]
+                if group_total < self.min_samples:
+                    continue
+                if group_hits / group_total < self.success_rate:
+                    break
+                best = self.buckets[bucket]
+                group_hits = group_total = 0
+            if best is not None:
+                table[target] = best
+        self.table = table
+
+    def estimate_fee_rate(self, target_blocks):
+        """
+        Lowest per-byte fee rate that historically confirmed within `target_blocks`,
+        or None when there is not enough data yet.
+        """
+        target = max(1, min(self.max_target, int(target_blocks)))
+        # A rate that confirmed within fewer blocks also satisfies a longer target.
+        for candidate in range(target, 0, -1):
+            if candidate in self.table:
+                return self.table[candidate]
+        return None
+
+    def estimates(self):
+        return dict(self.table)
@@ -35,6 +35,9 @@ class Transaction:
                 sender_wallet.address: provisional_change
             }
             computed_fee = self.compute_fee(provisional_output, mempool_size=mempool_size)
+            # An explicit fee (e.g. from the fee estimator) can only raise the policy minimum.
+            if fee is not None:
+                computed_fee = max(computed_fee, int(fee))
             if amount + computed_fee > balance:
                 raise Exception("Amount plus fee exceeds balance")
 
@@ -100,14 +103,46 @@ class Transaction:
         """
         return self.__dict__
 
+    def size_bytes(self):
+        """
+        Serialized size of the transaction as it is stored in a block.
+        """
+        return len(json.dumps(self.to_json()).encode("utf-8"))
+
+    def fee_rate(self):
+        """
+        Fee paid per serialized byte.
+        """
+        return self.input.get("fee", 0) / max(1, self.size_bytes())
+
+    @staticmethod
+    def estimate_size(output, sender_wallet):
+        """
+        Approximate serialized size of a signed transaction paying `output`, before signing.
+        """
+        max_signature_part = 2 ** 256 - 1
+        return len(json.dumps({
+            'id': '0' * 8,
+            'output': output,
+            'input': {
+                'timestamp': time.time_ns(),
+                'amount': sum(output.values()),
+                'address': sender_wallet.address,
+                'public_key': sender_wallet.public_key,
+                'signature': [max_signature_part, max_signature_part],
+                'fee': MIN_ABSOLUTE_FEE,
+            },
+        }).encode("utf-8"))
+
     @staticmethod
     def from_json(transaction_json):
         return Transaction(**transaction_json)
 
     @staticmethod
-    def is_valid_transaction(transaction):
+    def is_valid_transaction(transaction, verify_signature=True):
         """
-        Validate a transaction.
+        Validate a transaction. The signature check can be skipped for blocks already known
+        to be valid (below a checkpoint).
         """
         if transaction.input.get("type") == "GENESIS":
             return
@@ -133,7 +168,7 @@ class Transaction:
         if transaction.input["amount"] != output_total + fee:
             raise Exception("Invalid transaction output values")
 
-        if not Wallet.verify(
+        if verify_signature and not Wallet.verify(
             transaction.input["public_key"],
             transaction.output,
             transaction.input["signature"]
@@ -1,25 +1,91 @@
 import json
+from types import MappingProxyType
+
 from backend.wallet.transaction import Transaction
-from backend.wallet.wallet import Wallet
-from backend.config import MINING_REWARD_INPUT
+from backend.wallet.fee_estimator import FeeEstimator
+from backend.config import MINING_REWARD_INPUT, MAX_BLOCK_BYTES, BLOCK_RESERVED_BYTES
+
+
+class TransactionMap(dict):
+    """
+    txid -> transaction dict whose `version` changes after every insertion or removal, so readers
+    can tell the mempool changed without comparing its contents.
+    """
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self.version += 1
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.version += 1
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self.version += 1
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+class MempoolSnapshot:
+    """
+    Read-only copy of the mempool at one TransactionMap version, for readers on other threads.
+    """
+    def __init__(self, version, transactions):
+        self.version = version
+        self.transactions = MappingProxyType(transactions)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def prioritized(self):
+        """
+        Transactions sorted by fee-per-byte descending, as prioritized_transactions orders them.
+        """
+        return sorted(self.transactions.values(), key=lambda tx: tx.fee_rate(), reverse=True)
 
 
 class TransactionPool:
     def __init__(self, blockchain=None):
-        self.transaction_map = {}
+        self.transaction_map = TransactionMap()
         # Optional reference to the blockchain for balance checks on mempool admission.
         self.blockchain = blockchain
+        # txid -> (input dict, serialized size); reused across block templates.
+        self._size_cache = {}
+        # txid -> (input dict, JSON text the transaction arrived as)
+        self._encoded = {}
+        self.fee_estimator = FeeEstimator()
+        self._snapshot = MempoolSnapshot(0, {})
 
-    def set_transaction(self, transaction):
+    def set_transaction(self, transaction, encoded=None):
         """
         Store a validated transaction, rejecting double spends from the same sender in the mempool.
+        `encoded` is the JSON text it was parsed from, kept for relaying it unchanged.
         """
         Transaction.is_valid_transaction(transaction)
         # Allow multiple pending txs from same sender, but ensure aggregate spend fits balance.
         if self.blockchain and transaction.input != MINING_REWARD_INPUT:
             sender = transaction.input["address"]
             try:
-                balance = Wallet.calculate_balance(self.blockchain, sender)
+                balance = self.blockchain.balance_of(sender)
             except Exception:
                 balance = None
             if balance is not None:
@@ -39,6 +105,39 @@ class TransactionPool:
                     raise Exception("Amount exceeds current on-chain balance")
 
         self.transaction_map[transaction.id] = transaction
+        if encoded is not None:
+            self._encoded[transaction.id] = (transaction.input, encoded)
+        height = len(self.blockchain.chain) - 1 if self.blockchain else 0
+        self.fee_estimator.track(transaction, height)
+
+    @property
+    def version(self) -> int:
+        return self.transaction_map.version
+
+    def snapshot(self) -> MempoolSnapshot:
+        """
+        The mempool as one consistent copy, shared by readers until the next change. Writers
+        hold blockchain.lock; the copy is retaken if the version moved while it was made.
+        """
+        snapshot = self._snapshot
+        while snapshot.version != self.transaction_map.version:
+            version = self.transaction_map.version
+            transactions = self.transaction_map.copy()
+            if self.transaction_map.version == version:
+                snapshot = self._snapshot = MempoolSnapshot(version, transactions)
+        return snapshot
+
+    def encoded(self, transaction) -> str:
+        """
+        JSON text of a mempool transaction, reusing the payload it arrived as while unchanged.
+        """
+        cached = self._encoded.get(transaction.id)
+        # Transaction.update replaces the input dict, which invalidates the stored text.
+        if cached and cached[0] is transaction.input:
+            return cached[1]
+        text = json.dumps(transaction.to_json())
+        self._encoded[transaction.id] = (transaction.input, text)
+        return text
 
     def existing_transaction(self, address):
         for transaction in self.transaction_map.values():
@@ -53,16 +152,51 @@ class TransactionPool:
         Return transactions sorted by fee-per-byte descending.
         """
         txs = list(self.transaction_map.values())
-        txs.sort(
-            key=lambda tx: (
-                tx.input.get("fee", 0) / max(1, len(json.dumps(tx.to_json()).encode("utf-8")))
-            ),
-            reverse=True
-        )
+        txs.sort(key=lambda tx: tx.fee_rate(), reverse=True)
         if limit:
             txs = txs[:limit]
         return txs
 
+    def block_template(self, max_bytes=MAX_BLOCK_BYTES - BLOCK_RESERVED_BYTES, accept=None):
+        """
+        Pack mempool transactions into a byte budget, maximizing collected fees.
+
+        Greedy knapsack by fee-per-byte: candidates are taken in descending fee rate and a
+        transaction that no longer fits is skipped so smaller ones can still fill the space.
+        `accept(tx)` may veto a candidate that fits (e.g. balance checks).
+        """
+        # Each tx costs its own size plus the ", " list separator inside the block data.
+        candidates = []
+        size_cache = {}
+        for tx in list(self.transaction_map.values()):
+            cached = self._size_cache.get(tx.id)
+            # Transaction.update replaces the input dict, which invalidates the cached size.
+            if cached and cached[0] is tx.input:
+                size = cached[1]
+            else:
+                size = tx.size_bytes() + 2
+            size_cache[tx.id] = (tx.input, size)
+            candidates.append((tx.input.get("fee", 0) / size, size, tx))
+        self._size_cache = size_cache
+        if not candidates:
+            return []
+
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        smallest = min(size for _, size, _ in candidates)
+
+        selected = []
+        remaining = max_bytes
+        for _, size, tx in candidates:
+            if remaining < smallest:
+                break
+            if size > remaining:
+                continue
+            if accept is not None and not accept(tx):
+                continue
+            selected.append(tx)
+            remaining -= size
+        return selected
+
     def clear_blockchain_transactions(self, blockchain):
         for block in blockchain.chain:
             for transaction in block.data:
@@ -70,3 +204,5 @@ class TransactionPool:
                     del self.transaction_map[transaction["id"]]
                 except KeyError:
                     pass
+        self._encoded = {txid: entry for txid, entry in self._encoded.items() if txid in self.transaction_map}
+        self.fee_estimator.process_chain(blockchain.chain, self.transaction_map)
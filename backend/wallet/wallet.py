@@ -26,7 +26,9 @@ class Wallet:
 
     @property
     def balance(self):
-        return Wallet.calculate_balance(self.blockchain, self.address)
+        if not self.blockchain:
+            return 0
+        return self.blockchain.balance_of(self.address)
 
     def sign(self, data):
         return decode_dss_signature(